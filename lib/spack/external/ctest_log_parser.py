@@ -69,14 +69,22 @@
 from __future__ import division
 
 import re
-import math
+import itertools
 import multiprocessing
 import time
+from collections import deque
 from contextlib import contextmanager
 
 from six import StringIO
 from six import string_types
 
+try:
+    from re import _parser as sre_parse  # novm
+    from re import _constants as sre_constants  # novm
+except ImportError:
+    import sre_parse
+    import sre_constants
+
 class prefilter(object):
     """Make regular expressions faster with a simple prefiltering predicate.
 
@@ -110,6 +118,75 @@ def match(self, text):
         return self.pre(text) and any(p.match(text) for p in self.patterns)
 
 
+def _required_literal(pattern):
+    """Longest literal string that any text matched by ``pattern`` contains.
+
+    Only literal characters at the top level of the pattern are taken
+    into account, so this may return an empty string even if the pattern
+    requires some literal text.
+    """
+    longest = current = ''
+    for op, arg in sre_parse.parse(pattern):
+        if op == sre_constants.LITERAL:
+            current += chr(arg)
+        else:
+            longest = max(longest, current, key=len)
+            current = ''
+    return max(longest, current, key=len)
+
+
+class merged(object):
+    """Searches a list of regular expressions and prefilters all at once.
+
+    Build logs are mostly made of lines that match none of CTest's
+    expressions, and testing each line against each expression is what
+    makes parsing slow. Here, each plain expression is indexed by a
+    literal string that all its matches contain (e.g. ``"ld: fatal: "``
+    for ``"ld: fatal: "`` and ``"Unresolved:"`` for ``"^Unresolved:"``).
+    Expressions sharing a literal are merged in a single regex, which is
+    evaluated only on lines containing that literal. Looking for all the
+    literals in a line is a single, cheap, pass over the line.
+
+    Prefilters already have their own precondition and are kept as they
+    are. Expressions without a usable literal are merged together and
+    evaluated on every line.
+    """
+    #: literals shorter than this don't filter out enough lines
+    min_literal_length = 3
+
+    def __init__(self, regexes):
+        self.prefilters = [r for r in regexes if isinstance(r, prefilter)]
+
+        by_literal = {}
+        for regex in regexes:
+            if isinstance(regex, prefilter):
+                continue
+            literal = _required_literal(regex)
+            if len(literal) < self.min_literal_length:
+                literal = ''
+            by_literal.setdefault(literal, []).append(regex)
+
+        unfiltered = by_literal.pop('', [])
+        self.unfiltered = _merge(unfiltered) if unfiltered else None
+        self.filtered = dict(
+            (literal, _merge(patterns))
+            for literal, patterns in by_literal.items())
+        self.literals = sorted(self.filtered)
+
+    def search(self, text):
+        if any(p.search(text) for p in self.prefilters):
+            return True
+        for literal in filter(text.__contains__, self.literals):
+            if self.filtered[literal].search(text):
+                return True
+        return bool(self.unfiltered and self.unfiltered.search(text))
+
+
+def _merge(patterns):
+    """Compile a list of patterns into a regex that matches any of them."""
+    return re.compile('|'.join('(?:%s)' % p for p in patterns))
+
+
 _error_matches = [
     prefilter(
         lambda x: any(s in x for s in (
@@ -298,10 +375,20 @@ class BuildWarning(LogEvent):
     """LogEvent subclass for build warnings."""
 
 
-def chunks(l, n):
-    """Divide l into n approximately-even chunks."""
-    chunksize = int(math.ceil(len(l) / n))
-    return [l[i:i + chunksize] for i in range(0, len(l), chunksize)]
+def chunks(stream, size):
+    """Read a stream in chunks of at most ``size`` lines.
+
+    Yields tuples with the index of the first line in the chunk and the
+    list of lines in the chunk.
+    """
+    offset = 0
+    stream = iter(stream)
+    while True:
+        lines = list(itertools.islice(stream, size))
+        if not lines:
+            return
+        yield offset, lines
+        offset += len(lines)
 
 
 @contextmanager
@@ -340,20 +427,35 @@ def _profile_match(matches, exceptions, line, match_times, exc_times):
         return True
 
 
+#: Merged error and warning expressions, lazily compiled once per process
+_merged = None
+
+
 def _parse(lines, offset, profile):
+    global _merged
+
     def compile(regex_array):
         return [regex if isinstance(regex, prefilter) else re.compile(regex)
                 for regex in regex_array]
 
-    error_matches      = compile(_error_matches)
-    error_exceptions   = compile(_error_exceptions)
-    warning_matches    = compile(_warning_matches)
-    warning_exceptions = compile(_warning_exceptions)
     file_line_matches  = compile(_file_line_matches)
 
     matcher, args = _match, []
     timings = []
-    if profile:
+    if not profile:
+        if _merged is None:
+            _merged = [[merged(regexes)] for regexes in (
+                _error_matches, _error_exceptions,
+                _warning_matches, _warning_exceptions)]
+        (error_matches, error_exceptions,
+         warning_matches, warning_exceptions) = _merged
+    else:
+        # Time each expression on its own
+        error_matches      = compile(_error_matches)
+        error_exceptions   = compile(_error_exceptions)
+        warning_matches    = compile(_warning_matches)
+        warning_exceptions = compile(_warning_exceptions)
+
         matcher = _profile_match
         timings = [
             [0.0] * len(error_matches), [0.0] * len(error_exceptions),
@@ -381,10 +483,6 @@ def compile(regex_array):
     return errors, warnings, timings
 
 
-def _parse_unpack(args):
-    return _parse(*args)
-
-
 class CTestLogParser(object):
     """Log file parser that extracts errors and warnings."""
     def __init__(self, profile=False):
@@ -410,13 +508,19 @@ def stringify(elt):
                     self.timings[index][i] * 1e6, stringify(elt)))
             index += 1
 
-
-    def parse(self, stream, context=6, jobs=None):
+    def parse(self, stream, context=6, jobs=None, max_errors=None):
         """Parse a log file by searching each line for errors and warnings.
 
+        The log is read in chunks, so that memory usage doesn't depend
+        on its size, and chunks are parsed in parallel for long logs.
+
         Args:
             stream (str or file-like): filename or stream to read from
             context (int): lines of context to extract around each log event
+            jobs (int): number of processes used to parse long logs;
+                default is the number of cpus
+            max_errors (int or None): stop parsing after this many errors
+                have been found; ``None`` parses the whole log
 
         Returns:
             (tuple): two lists containing ``BuildError`` and
@@ -424,48 +528,121 @@ def parse(self, stream, context=6, jobs=None):
         """
         if isinstance(stream, string_types):
             with open(stream) as f:
-                return self.parse(f, context, jobs)
-
-        lines = [line for line in stream]
+                return self.parse(f, context, jobs, max_errors)
 
         if jobs is None:
             jobs = multiprocessing.cpu_count()
 
-        # single-thread small logs
-        if len(lines) < 10 * jobs:
-            errors, warnings, self.timings = _parse(lines, 0, self.profile)
+        # single-thread logs that fit in a chunk
+        stream = chunks(stream, self.chunk_size)
+        head = list(itertools.islice(stream, 2))
+        if len(head) < 2:
+            jobs = 1
+        stream = itertools.chain(head, stream)
 
-        else:
-            # Build arguments for parallel jobs
-            args = []
-            offset = 0
-            for chunk in chunks(lines, jobs):
-                args.append((chunk, offset, self.profile))
-                offset += len(chunk)
-
-            # create a pool and farm out the matching job
-            pool = multiprocessing.Pool(jobs)
-            try:
-                # this is a workaround for a Python bug in Pool with ctrl-C
-                results = pool.map_async(_parse_unpack, args, 1).get(9999999)
-                errors, warnings, timings = zip(*results)
-            finally:
-                pool.terminate()
-
-            # merge results
-            errors = sum(errors, [])
-            warnings = sum(warnings, [])
-
-            if self.profile:
-                self.timings = [
-                    [sum(i) for i in zip(*t)] for t in zip(*timings)]
-
-        # add log context to all events
-        for event in (errors + warnings):
-            i = event.line_no - 1
-            event.pre_context = [
-                l.rstrip() for l in lines[i - context:i]]
-            event.post_context = [
-                l.rstrip() for l in lines[i + 1:i + context + 1]]
+        errors, warnings = [], []
+        self.timings = []
+
+        # lines preceding the current chunk, and events from previous
+        # chunks that need lines from the current chunk as context
+        tail = deque(maxlen=context)
+        pending = []
+
+        # set once max_errors errors have been found, to stop parsing
+        done = []
+
+        parsed = self._parse_chunks(stream, jobs, done)
+        try:
+            for offset, lines, result in parsed:
+                for event in pending:
+                    missing = context - len(event.post_context)
+                    event.post_context.extend(
+                        line.rstrip() for line in lines[:missing])
+                pending = [e for e in pending
+                           if len(e.post_context) < context]
+
+                if result is not None and not done:
+                    chunk_errors, chunk_warnings, timings = result
+                    if max_errors is not None:
+                        del chunk_errors[max_errors - len(errors):]
+                        if len(errors) + len(chunk_errors) >= max_errors:
+                            # keep only the warnings before the last error
+                            last = chunk_errors[-1].line_no \
+                                if chunk_errors else offset
+                            chunk_warnings = [w for w in chunk_warnings
+                                              if w.line_no < last]
+                            done.append(True)
+                    errors.extend(chunk_errors)
+                    warnings.extend(chunk_warnings)
+
+                    if self.profile:
+                        self.timings = timings if not self.timings else [
+                            [sum(i) for i in zip(*t)]
+                            for t in zip(self.timings, timings)]
+
+                    # add log context to all events
+                    for event in chunk_errors + chunk_warnings:
+                        i = event.line_no - 1 - offset
+                        event.pre_context = [
+                            line.rstrip()
+                            for line in lines[max(i - context, 0):i]]
+                        missing = context - len(event.pre_context)
+                        if missing > 0 and tail:
+                            event.pre_context[:0] = list(tail)[-missing:]
+                        event.post_context = [
+                            line.rstrip()
+                            for line in lines[i + 1:i + context + 1]]
+                        if len(event.post_context) < context:
+                            pending.append(event)
+
+                if done and not pending:
+                    break
+                tail.extend(
+                    line.rstrip()
+                    for line in lines[max(len(lines) - context, 0):])
+        finally:
+            parsed.close()
 
         return errors, warnings
+
+    #: number of lines in each chunk of the log that is parsed
+    chunk_size = 10000
+
+    def _parse_chunks(self, stream, jobs, done):
+        """Parse chunks of a log, yielding their offset, lines and events.
+
+        Chunks are parsed by ``jobs`` processes, and at most ``2 * jobs``
+        chunks are read ahead of the one being yielded. Once ``done`` is
+        set, the following chunks are yielded without being parsed.
+        """
+        if jobs <= 1:
+            for offset, lines in stream:
+                result = None
+                if not done:
+                    result = _parse(lines, offset, self.profile)
+                yield offset, lines, result
+            return
+
+        def _get(item):
+            offset, lines, result = item
+            if result is not None:
+                # this is a workaround for a Python bug in Pool with ctrl-C
+                result = result.get(9999999)
+            return offset, lines, result
+
+        pool = multiprocessing.Pool(jobs)
+        try:
+            window = deque()
+            for offset, lines in stream:
+                result = None
+                if not done:
+                    result = pool.apply_async(
+                        _parse, (lines, offset, self.profile))
+                window.append((offset, lines, result))
+                if len(window) >= 2 * jobs:
+                    yield _get(window.popleft())
+
+            while window:
+                yield _get(window.popleft())
+        finally:
+            pool.terminate()
@@ -83,24 +83,39 @@ def __init__(
         self.compilers = compilers
         self.generation = generation
 
+        # Micro-architectures are immutable once the DAG has been read
+        # from file, so what is derived from the parents is computed
+        # lazily and then cached
+        self._ancestors = None
+        self._node_set = None
+
     @property
     def ancestors(self):
-        value = self.parents[:]
-        for parent in self.parents:
-            value.extend(a for a in parent.ancestors if a not in value)
-        return value
+        if self._ancestors is None:
+            value = self.parents[:]
+            for parent in self.parents:
+                value.extend(a for a in parent.ancestors if a not in value)
+            self._ancestors = value
+        return self._ancestors
 
     def _to_set(self):
         """Returns a set of the nodes in this microarchitecture DAG."""
         # This function is used to implement subset semantics with
         # comparison operators
-        return set([str(self)] + [str(x) for x in self.ancestors])
+        if self._node_set is None:
+            self._node_set = frozenset(
+                [str(self)] + [str(x) for x in self.ancestors]
+            )
+        return self._node_set
 
     @coerce_target_names
     def __eq__(self, other):
         if not isinstance(other, Microarchitecture):
             return NotImplemented
 
+        if self is other:
+            return True
+
         return (self.name == other.name and
                 self.vendor == other.vendor and
                 self.features == other.features and
@@ -29,6 +29,38 @@ def remove_link(src, dest):
         os.remove(dest)
 
 
+def merge_directory(dest):
+    """Create ``dest`` as part of a merge, or mark it if it is empty."""
+    if not os.path.exists(dest):
+        mkdirp(dest)
+        return
+
+    if not os.path.isdir(dest):
+        raise ValueError("File blocks directory: %s" % dest)
+
+    # mark empty directories so they aren't removed on unmerge.
+    if not os.listdir(dest):
+        marker = os.path.join(dest, empty_file_name)
+        touch(marker)
+
+
+def unmerge_directory(dest):
+    """Remove ``dest`` as part of an unmerge if nothing else is in it."""
+    if not os.path.exists(dest):
+        return
+    elif not os.path.isdir(dest):
+        raise ValueError("File blocks directory: %s" % dest)
+
+    # remove directory if it is empty.
+    if not os.listdir(dest):
+        shutil.rmtree(dest, ignore_errors=True)
+
+    # remove empty dir marker if present.
+    marker = os.path.join(dest, empty_file_name)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+
 class LinkTree(object):
     """Class to create trees of symbolic links from a source directory.
 
@@ -79,38 +111,49 @@ def get_file_map(self, dest_root, ignore):
                 merge_map[src] = dest
         return merge_map
 
-    def merge_directories(self, dest_root, ignore):
-        for src, dest in traverse_tree(self._root, dest_root, ignore=ignore):
+    def get_merge_maps(self, dest_root, ignore):
+        """Walk the source tree once and return what merging it would do.
+
+        This is equivalent to calling ``get_file_map`` and collecting the
+        directories visited by ``merge_directories``, but it only traverses
+        the source tree a single time.
+
+        Returns:
+            (tuple): a list of ``(src, dest)`` directory pairs in pre-order
+            and a dictionary mapping source files to destination files
+        """
+        dirs, merge_map = [], {}
+        kwargs = {'follow_nonexisting': True, 'ignore': ignore}
+        for src, dest in traverse_tree(self._root, dest_root, **kwargs):
             if os.path.isdir(src):
-                if not os.path.exists(dest):
-                    mkdirp(dest)
-                    continue
+                dirs.append((src, dest))
+            else:
+                merge_map[src] = dest
+        return dirs, merge_map
 
-                if not os.path.isdir(dest):
-                    raise ValueError("File blocks directory: %s" % dest)
+    @staticmethod
+    def find_merge_map_conflicts(dirs, merge_map):
+        """Same as ``find_dir_conflicts``, for maps from ``get_merge_maps``.
+        """
+        conflicts = []
+        for src, dest in dirs:
+            if os.path.exists(dest) and not os.path.isdir(dest):
+                conflicts.append("File blocks directory: %s" % dest)
+        for dest in merge_map.values():
+            if os.path.exists(dest) and os.path.isdir(dest):
+                conflicts.append("Directory blocks directory: %s" % dest)
+        return conflicts
 
-                # mark empty directories so they aren't removed on unmerge.
-                if not os.listdir(dest):
-                    marker = os.path.join(dest, empty_file_name)
-                    touch(marker)
+    def merge_directories(self, dest_root, ignore):
+        for src, dest in traverse_tree(self._root, dest_root, ignore=ignore):
+            if os.path.isdir(src):
+                merge_directory(dest)
 
     def unmerge_directories(self, dest_root, ignore):
         for src, dest in traverse_tree(
                 self._root, dest_root, ignore=ignore, order='post'):
             if os.path.isdir(src):
-                if not os.path.exists(dest):
-                    continue
-                elif not os.path.isdir(dest):
-                    raise ValueError("File blocks directory: %s" % dest)
-
-                # remove directory if it is empty.
-                if not os.listdir(dest):
-                    shutil.rmtree(dest, ignore_errors=True)
-
-                # remove empty dir marker if present.
-                marker = os.path.join(dest, empty_file_name)
-                if os.path.exists(marker):
-                    os.remove(marker)
+                unmerge_directory(dest)
 
     def merge(self, dest_root, ignore_conflicts=False, ignore=None,
               link=os.symlink, relative=False):
@@ -6,6 +6,7 @@
 import os
 import fcntl
 import errno
+import random
 import time
 import socket
 from datetime import datetime
@@ -15,7 +16,7 @@
 
 
 __all__ = ['Lock', 'LockTransaction', 'WriteTransaction', 'ReadTransaction',
-           'LockError', 'LockTimeoutError',
+           'LockStats', 'lock_stats', 'LockError', 'LockTimeoutError',
            'LockPermissionError', 'LockROFileError', 'CantCreateLockError']
 
 #: Mapping of supported locks to description
@@ -26,6 +27,152 @@
 true_fn = lambda: True
 
 
+#: Acquisition statistics of this process, keyed by lock file path
+lock_stats = {}
+
+
+class LockStats(object):
+    """Aggregated acquisition statistics for the locks on one file.
+
+    Every lock taken on the file counts, regardless of its byte range, so
+    e.g. all of Spack's prefix locks are reported together.
+    """
+
+    def __init__(self):
+        self.acquired = 0   # number of locks acquired
+        self.contended = 0  # acquisitions that needed more than one attempt
+        self.timeouts = 0   # acquisitions that timed out
+        self.attempts = 0   # total number of attempts
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.holders = {}   # 'pid@host' -> times seen holding the lock
+
+    def record(self, wait_time, nattempts, timed_out=False):
+        """Record one acquisition (or timeout) of the lock."""
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.acquired += 1
+        if nattempts > 1:
+            self.contended += 1
+        self.attempts += nattempts
+        self.wait_time += wait_time
+        self.max_wait = max(self.max_wait, wait_time)
+
+    def record_holder(self, pid, host):
+        holder = '{0}@{1}'.format(pid, host)
+        self.holders[holder] = self.holders.get(holder, 0) + 1
+
+    def merge(self, other):
+        """Add the statistics in ``other`` to these."""
+        self.acquired += other.acquired
+        self.contended += other.contended
+        self.timeouts += other.timeouts
+        self.attempts += other.attempts
+        self.wait_time += other.wait_time
+        self.max_wait = max(self.max_wait, other.max_wait)
+        for holder, count in other.holders.items():
+            self.holders[holder] = self.holders.get(holder, 0) + count
+
+    def to_dict(self):
+        return dict((k, getattr(self, k)) for k in self._fields)
+
+    @staticmethod
+    def from_dict(d):
+        stats = LockStats()
+        for k in LockStats._fields:
+            setattr(stats, k, d.get(k, getattr(stats, k)))
+        return stats
+
+    _fields = ('acquired', 'contended', 'timeouts', 'attempts',
+               'wait_time', 'max_wait', 'holders')
+
+
+class OpenFile(object):
+    """An open lock file, with the number of locks that are using it."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.refs = 0
+
+
+class OpenFileTracker(object):
+    """Shares one open file per lock file among the locks of a process.
+
+    POSIX locks belong to a process and a file, not to a file descriptor:
+    closing *any* descriptor for a file releases all of the process's locks
+    on it. Locks on different byte ranges of the same file (like Spack's
+    prefix locks) must therefore share a descriptor that is closed only
+    once the last of them is released. Sharing also keeps a process that
+    holds thousands of locks from running out of file descriptors.
+
+    Files are identified by device and inode, so different paths to the
+    same file share a descriptor, and by PID, so that forked children
+    never use the files of their parent.
+    """
+
+    def __init__(self):
+        self._files = {}
+
+    def get_fh(self, path):
+        """Return an open file handle for ``path``, opening it if needed.
+
+        Writable (or new) files are opened ``'r+'`` so they can be locked
+        for writing, others are opened ``'r'``.
+        """
+        pid = os.getpid()
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            stat = None
+
+            # the file does not exist -- fail if we can't create it
+            parent = os.path.dirname(path) or '.'
+            if not os.access(parent, os.W_OK):
+                raise CantCreateLockError(path)
+        else:
+            open_file = self._files.get((stat.st_dev, stat.st_ino, pid))
+            if open_file:
+                open_file.refs += 1
+                return open_file.fh
+
+        # Open writable files as 'r+' so we can upgrade to write later
+        os_mode, fh_mode = (os.O_RDWR | os.O_CREAT), 'r+'
+        if stat and not os.access(path, os.W_OK):
+            # can still lock read-only files for reading if we open 'r'
+            os_mode, fh_mode = os.O_RDONLY, 'r'
+
+        fh = os.fdopen(os.open(path, os_mode), fh_mode)
+        stat = os.fstat(fh.fileno())
+
+        open_file = OpenFile(fh)
+        open_file.refs += 1
+        self._files[(stat.st_dev, stat.st_ino, pid)] = open_file
+        return fh
+
+    def release_fh(self, fh):
+        """Release a handle from ``get_fh()``, closing it if unused."""
+        stat = os.fstat(fh.fileno())
+        key = (stat.st_dev, stat.st_ino, os.getpid())
+        open_file = self._files.get(key)
+        assert open_file and open_file.fh is fh, \
+            'Released a lock file that is not open: %s' % fh.name
+
+        open_file.refs -= 1
+        if not open_file.refs:
+            del self._files[key]
+            fh.close()
+
+    def __len__(self):
+        return len(self._files)
+
+
+#: Open lock files of this process, shared by all of its locks
+file_tracker = OpenFileTracker()
+
+
 def _attempts_str(wait_time, nattempts):
     # Don't print anything if we succeeded on the first try
     if nattempts <= 1:
@@ -50,7 +197,7 @@ class Lock(object):
     """
 
     def __init__(self, path, start=0, length=0, default_timeout=None,
-                 debug=False, desc=''):
+                 debug=False, desc='', poll_intervals=None, jitter=0):
         """Construct a new lock on the file at ``path``.
 
         By default, the lock applies to the whole file.  Optionally,
@@ -71,6 +218,11 @@ def __init__(self, path, start=0, length=0, default_timeout=None,
             debug (bool): debug mode specific to locking
             desc (str): optional debug message lock description, which is
                 helpful for distinguishing between different Spack locks.
+            poll_intervals (tuple): the three wait times used while the lock
+                is contended (see ``_poll_interval_generator``)
+            jitter (float): randomize each wait time by up to this fraction,
+                so that processes waiting on the same lock do not poll it
+                in lockstep
         """
         self.path = path
         self._file = None
@@ -92,12 +244,16 @@ def __init__(self, path, start=0, length=0, default_timeout=None,
         # user sets a timeout for each attempt)
         self.default_timeout = default_timeout or None
 
+        # backoff policy used while the lock is contended
+        self._poll_intervals = poll_intervals
+        self._jitter = jitter
+
         # PID and host of lock holder (only used in debug mode)
         self.pid = self.old_pid = None
         self.host = self.old_host = None
 
     @staticmethod
-    def _poll_interval_generator(_wait_times=None):
+    def _poll_interval_generator(_wait_times=None, jitter=0):
         """This implements a backoff scheme for polling a contended resource
         by suggesting a succession of wait times between polls.
 
@@ -108,6 +264,9 @@ def _poll_interval_generator(_wait_times=None):
         This doesn't actually track elapsed time, it estimates the waiting
         time as though the caller always waits for the full length of time
         suggested by this function.
+
+        With a nonzero ``jitter``, each wait time is scaled by a random
+        factor in ``[1 - jitter, 1 + jitter]``.
         """
         num_requests = 0
         stage1, stage2, stage3 = _wait_times or (1e-1, 2e-1, 5e-1)
@@ -118,7 +277,10 @@ def _poll_interval_generator(_wait_times=None):
             elif num_requests >= 20:  # 20 * .1 = 2
                 wait_time = stage2
             num_requests += 1
-            yield wait_time
+            if jitter:
+                yield wait_time * random.uniform(1 - jitter, 1 + jitter)
+            else:
+                yield wait_time
 
     def __repr__(self):
         """Formal representation of the lock."""
@@ -151,23 +313,14 @@ def _lock(self, op, timeout=None):
 
         # Create file and parent directories if they don't exist.
         if self._file is None:
-            parent = self._ensure_parent_directory()
+            self._ensure_parent_directory()
+            self._file = file_tracker.get_fh(self.path)
 
-            # Open writable files as 'r+' so we can upgrade to write later
-            os_mode, fd_mode = (os.O_RDWR | os.O_CREAT), 'r+'
-            if os.path.exists(self.path):
-                if not os.access(self.path, os.W_OK):
-                    if op == fcntl.LOCK_SH:
-                        # can still lock read-only files if we open 'r'
-                        os_mode, fd_mode = os.O_RDONLY, 'r'
-                    else:
-                        raise LockROFileError(self.path)
-
-            elif not os.access(parent, os.W_OK):
-                raise CantCreateLockError(self.path)
-
-            fd = os.open(self.path, os_mode)
-            self._file = os.fdopen(fd, fd_mode)
+            if op == fcntl.LOCK_EX and self._file.mode == 'r':
+                # can only lock read-only files for reading
+                file_tracker.release_fh(self._file)
+                self._file = None
+                raise LockROFileError(self.path)
 
         elif op == fcntl.LOCK_EX and self._file.mode == 'r':
             # Attempt to upgrade to write lock w/a read-only file.
@@ -177,23 +330,30 @@ def _lock(self, op, timeout=None):
         tty.debug("{0} locking [{1}:{2}]: timeout {3} sec"
                   .format(lock_type[op], self._start, self._length, timeout))
 
-        poll_intervals = iter(Lock._poll_interval_generator())
+        poll_intervals = iter(Lock._poll_interval_generator(
+            self._poll_intervals, self._jitter))
         start_time = time.time()
         num_attempts = 0
         while (not timeout) or (time.time() - start_time) < timeout:
             num_attempts += 1
             if self._poll_lock(op):
                 total_wait_time = time.time() - start_time
+                self._record_stats(total_wait_time, num_attempts)
                 return total_wait_time, num_attempts
 
+            if num_attempts == 1:
+                self._record_holder()
             time.sleep(next(poll_intervals))
 
         # TBD: Is an extra attempt after timeout needed/appropriate?
         num_attempts += 1
         if self._poll_lock(op):
             total_wait_time = time.time() - start_time
+            self._record_stats(total_wait_time, num_attempts)
             return total_wait_time, num_attempts
 
+        self._record_stats(time.time() - start_time, num_attempts,
+                           timed_out=True)
         raise LockTimeoutError("Timed out waiting for a {0} lock."
                                .format(lock_type[op]))
 
@@ -245,17 +405,53 @@ def _ensure_parent_directory(self):
                 raise
         return parent
 
+    def _stats(self):
+        path = os.path.abspath(self.path)
+        stats = lock_stats.get(path)
+        if stats is None:
+            stats = lock_stats[path] = LockStats()
+        return stats
+
+    def _record_stats(self, wait_time, nattempts, timed_out=False):
+        self._stats().record(wait_time, nattempts, timed_out)
+
+    def _record_holder(self):
+        """Record who holds the lock we are waiting for, if it is known.
+
+        Holders only write their PID and host to the file in debug mode.
+        """
+        if self.debug:
+            holder = self._read_holder()
+            if holder:
+                self._stats().record_holder(*holder)
+
+    def _read_holder(self):
+        """Return the (PID, host) written to the file, or None.
+
+        The line may be only partially written by its holder, and is
+        then ignored.
+        """
+        self._file.seek(0)
+        line = self._file.read()
+        if not line:
+            return None
+
+        try:
+            pid, host = line.strip().split(',')
+            _, _, pid = pid.rpartition('=')
+            _, _, host = host.rpartition('=')
+            return int(pid), host
+        except ValueError:
+            return None
+
     def _read_debug_data(self):
         """Read PID and host data out of the file if it is there."""
         self.old_pid = self.pid
         self.old_host = self.host
 
-        line = self._file.read()
-        if line:
-            pid, host = line.strip().split(',')
-            _, _, self.pid = pid.rpartition('=')
-            _, _, self.host = host.rpartition('=')
-            self.pid = int(self.pid)
+        holder = self._read_holder()
+        if holder:
+            self.pid, self.host = holder
 
     def _write_debug_data(self):
         """Write PID and host data to the file, recording old values."""
@@ -281,7 +477,7 @@ def _unlock(self):
         """
         fcntl.lockf(self._file, fcntl.LOCK_UN,
                     self._length, self._start, os.SEEK_SET)
-        self._file.close()
+        file_tracker.release_fh(self._file)
         self._file = None
         self._reads = 0
         self._writes = 0
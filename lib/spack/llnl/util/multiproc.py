@@ -8,9 +8,21 @@
 than multiprocessing.Pool.apply() can.  For example, apply() will fail
 to pickle functions if they're passed indirectly as parameters.
 """
+import multiprocessing
+import sys
 from multiprocessing import Semaphore, Value
 
-__all__ = ['Barrier']
+__all__ = ['Barrier', 'fork_available']
+
+
+def fork_available():
+    """True if worker processes of a multiprocessing pool are forked,
+    and thus inherit the state of their parent."""
+    if sys.platform == 'win32':
+        return False
+    if sys.version_info >= (3, 4):
+        return multiprocessing.get_start_method() == 'fork'  # novm
+    return True
 
 
 class Barrier:
@@ -9,6 +9,8 @@
 
 import atexit
 import errno
+import gzip
+import io
 import multiprocessing
 import os
 import re
@@ -39,6 +41,15 @@
 xon, xoff = '\x11\n', '\x13\n'
 control = re.compile('(\x11\n|\x13\n)')
 
+# Same as above, for the raw output relayed by the writer daemon
+_escape_bytes = re.compile(br'\x1b[^m]*m|\x1b\[?1034h')
+_control_bytes = re.compile(b'(\x11\n|\x13\n)')
+_xon_bytes = b'\x11\n'
+
+# Size of the reads of the writer daemon, which also splits lines longer
+# than this
+_read_size = 64 * 1024
+
 
 @contextmanager
 def ignore_signal(signum):
@@ -64,6 +75,39 @@ def _strip(line):
     return _escape.sub('', line)
 
 
+def _bytes_writer(stream):
+    """Return a function writing bytes to a text or a binary stream."""
+    if hasattr(stream, 'buffer'):
+        # Python 3 text files, write to the underlying binary file
+        stream.flush()
+        return stream.buffer.write
+    elif isinstance(stream, (io.TextIOBase, StringIO)):
+        return lambda data: stream.write(data.decode('utf-8', 'replace'))
+    else:
+        # binary files, and Python 2 files
+        return stream.write
+
+
+def _relay_output(data, echo, force_echo, write_out, write_log):
+    """Write a block of output to the log, and to ``stdout`` if echo is
+    enabled or forced.
+
+    Returns:
+        (bool): the force_echo setting after the control characters of
+            the block
+    """
+    # Output between the control characters, which are at odd indices
+    parts = _control_bytes.split(data)
+    for i, part in enumerate(parts):
+        if i % 2:
+            force_echo = part == _xon_bytes
+        elif part:
+            if echo or force_echo:
+                write_out(part)
+            write_log(_escape_bytes.sub(b'', part))
+    return force_echo
+
+
 class keyboard_input(object):
     """Context manager to disable line editing and echoing.
 
@@ -336,8 +380,9 @@ def __init__(self, file_like=None, echo=False, debug=False, buffer=False):
 
         log_output can take either a file object or a filename. If a
         filename is passed, the file will be opened and closed entirely
-        within ``__enter__`` and ``__exit__``. If a file object is passed,
-        this assumes the caller owns it and will close it.
+        within ``__enter__`` and ``__exit__``, and if it ends in ``.gz``
+        the log is compressed with gzip. If a file object is passed, this
+        assumes the caller owns it and will close it.
 
         By default, we unbuffer sys.stdout and sys.stderr because the
         logger will include output from executed programs and from python
@@ -395,7 +440,13 @@ def __enter__(self):
         self.close_log_in_parent = True
         self.write_log_in_parent = False
         if isinstance(self.file_like, string_types):
-            self.log_file = open(self.file_like, 'w')
+            if self.file_like.endswith('.gz'):
+                # Only the daemon can write the gzip trailer, it opens
+                # the file itself
+                self.log_file = self.file_like
+                self.close_log_in_parent = False
+            else:
+                self.log_file = open(self.file_like, 'w')
 
         elif _file_descriptors_work(self.file_like):
             self.log_file = self.file_like
@@ -597,18 +648,26 @@ def _writer_daemon(stdin, read_fd, write_fd, echo, log_file, control_pipe):
             immediately closed by the writer daemon)
         echo (bool): initial echo setting -- controlled by user and
             preserved across multiple writer daemons
-        log_file (file-like): file to log all output
+        log_file (file-like or str): file to log all output, or path of
+            a gzip file to create
         control_pipe (Pipe): multiprocessing pipe on which to send control
             information to the parent
 
+    The output is relayed as raw bytes, in blocks of up to ``_read_size``
+    bytes cut at the end of the last complete line, which is much faster
+    than going line by line through a text stream for builds with a lot
+    of output.
     """
-    # Use line buffering (3rd param = 1) since Python 3 has a bug
-    # that prevents unbuffered text I/O.
-    in_pipe = os.fdopen(read_fd, 'r', 1)
     os.close(write_fd)
+    if isinstance(log_file, string_types):
+        log_file = gzip.open(log_file, 'wb')
+
+    write_out = _bytes_writer(sys.stdout)
+    write_log = _bytes_writer(log_file)
+    pending = b''           # incomplete last line of the output
 
     # list of streams to select from
-    istreams = [in_pipe, stdin] if stdin else [in_pipe]
+    istreams = [read_fd, stdin] if stdin else [read_fd]
     force_echo = False      # parent can force echo for certain output
 
     try:
@@ -639,29 +698,25 @@ def _writer_daemon(stdin, read_fd, write_fd, echo, log_file, control_pipe):
                             if e.errno != errno.EIO:
                                 raise
 
-                if in_pipe in rlist:
-                    # Handle output from the calling process.
-                    line = _retry(in_pipe.readline)()
-                    if not line:
-                        break
-
-                    # find control characters and strip them.
-                    controls = control.findall(line)
-                    line = control.sub('', line)
-
-                    # Echo to stdout if requested or forced.
-                    if echo or force_echo:
-                        sys.stdout.write(line)
-                        sys.stdout.flush()
-
-                    # Stripped output to log file.
-                    log_file.write(_strip(line))
+                if read_fd in rlist:
+                    # Handle output from the calling process, up to its
+                    # last complete line if there is one.
+                    data = _retry(os.read)(read_fd, _read_size)
+                    pending += data
+                    end = pending.rfind(b'\n') + 1
+                    if data and not end and len(pending) < _read_size:
+                        continue
+                    if not data or not end:
+                        end = len(pending)
+                    block, pending = pending[:end], pending[end:]
+
+                    force_echo = _relay_output(
+                        block, echo, force_echo, write_out, write_log)
+                    sys.stdout.flush()
                     log_file.flush()
 
-                    if xon in controls:
-                        force_echo = True
-                    if xoff in controls:
-                        force_echo = False
+                    if not data:
+                        break
 
     except BaseException:
         tty.error("Exception occurred in writer daemon!")
@@ -701,7 +756,7 @@ def wrapped(*args, **kwargs):
         while True:
             try:
                 return function(*args, **kwargs)
-            except IOError as e:
+            except (IOError, OSError) as e:
                 if e.errno == errno.EINTR:
                     continue
                 raise
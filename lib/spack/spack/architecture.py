@@ -110,9 +110,8 @@ def __init__(self, name, module_name=None):
                 like Cray (e.g. craype-compiler)
         """
         if not isinstance(name, cpu.Microarchitecture):
-            name = cpu.targets.get(
-                name, cpu.generic_microarchitecture(name)
-            )
+            name = cpu.targets.get(name) or \
+                cpu.generic_microarchitecture(name)
         self.microarchitecture = name
         self.module_name = module_name
 
@@ -751,6 +751,7 @@ def extract_tarball(spec, filename, allow_root=False, unsigned=False,
         shutil.rmtree(spec.prefix)
         raise e
     else:
+        spack.store.layout.index_install_directory(spec)
         manifest_file = os.path.join(spec.prefix,
                                      spack.store.layout.metadata_dir,
                                      spack.store.layout.manifest_file_name)
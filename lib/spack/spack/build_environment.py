@@ -37,6 +37,7 @@
 import os
 import shutil
 import sys
+import time
 import traceback
 import types
 from six import StringIO
@@ -51,6 +52,7 @@
 import spack.config
 import spack.main
 import spack.paths
+import spack.profiling
 import spack.schema.environment
 import spack.store
 from spack.util.string import plural
@@ -671,9 +673,11 @@ def load_external_modules(pkg):
     Args:
         pkg (PackageBase): package to load deps for
     """
+    loaded = set()
     for dep in list(pkg.spec.traverse()):
-        if dep.external_module:
+        if dep.external_module and dep.external_module not in loaded:
             load_module(dep.external_module)
+            loaded.add(dep.external_module)
 
 
 def setup_package(pkg, dirty):
@@ -786,6 +790,26 @@ def child_fun():
     passes it to the parent wrapped in a ChildError.  The parent is
     expected to handle (or re-raise) the ChildError.
     """
+    return start_fork(pkg, function, dirty, fake).result()
+
+
+def start_fork(pkg, function, dirty, fake, forward_stdin=True):
+    """Like ``fork``, but returns as soon as the child process is started.
+
+    Args:
+        pkg (PackageBase): package whose environment we should set up the
+            forked process for.
+        function (callable): argless function to run in the child
+            process.
+        dirty (bool): If True, do NOT clean the environment before
+            building.
+        fake (bool): If True, skip package setup b/c it's not a real build
+        forward_stdin (bool): If True, let the child read from the
+            terminal. Children running alongside others should not.
+
+    Returns:
+        ForkedProcess: handle to wait for the result of ``function``
+    """
 
     def child_process(child_pipe, input_stream):
         # We are in the child process. Python sets sys.stdin to
@@ -796,6 +820,10 @@ def child_process(child_pipe, input_stream):
         if input_stream is not None:
             sys.stdin = input_stream
 
+        # Profile the child on its own, or its profile is lost when it exits
+        spack.profiling.start_child(
+            'fork-%s-%s' % (pkg.name, pkg.spec.dag_hash(7)))
+
         try:
             if not fake:
                 setup_package(pkg, dirty=dirty)
@@ -833,13 +861,15 @@ def child_process(child_pipe, input_stream):
             child_pipe.send(ce)
 
         finally:
+            spack.profiling.finish()
             child_pipe.close()
 
     parent_pipe, child_pipe = multiprocessing.Pipe()
     input_stream = None
     try:
         # Forward sys.stdin when appropriate, to allow toggling verbosity
-        if sys.stdin.isatty() and hasattr(sys.stdin, 'fileno'):
+        if forward_stdin and sys.stdin.isatty() and \
+                hasattr(sys.stdin, 'fileno'):
             input_stream = os.fdopen(os.dup(sys.stdin.fileno()))
 
         p = multiprocessing.Process(
@@ -855,22 +885,44 @@ def child_process(child_pipe, input_stream):
         if input_stream is not None:
             input_stream.close()
 
-    child_result = parent_pipe.recv()
-    p.join()
+    return ForkedProcess(pkg, p, parent_pipe)
 
-    # let the caller know which package went wrong.
-    if isinstance(child_result, InstallError):
-        child_result.pkg = pkg
 
-    # If the child process raised an error, print its output here rather
-    # than waiting until the call to SpackError.die() in main(). This
-    # allows exception handling output to be logged from within Spack.
-    # see spack.main.SpackCommand.
-    if isinstance(child_result, ChildError):
-        child_result.print_context()
-        raise child_result
+class ForkedProcess(object):
+    """A child process started by ``start_fork``."""
 
-    return child_result
+    def __init__(self, pkg, process, pipe):
+        self.pkg = pkg
+        self.process = process
+        self.pipe = pipe
+        self.start_time = time.time()
+
+    def done(self):
+        """Whether the child has sent its result, or exited."""
+        return self.pipe.poll()
+
+    def result(self):
+        """Waits for the child, and returns what its function returned.
+
+        Raises:
+            ChildError: if anything went wrong in the child process
+        """
+        child_result = self.pipe.recv()
+        self.process.join()
+
+        # let the caller know which package went wrong.
+        if isinstance(child_result, InstallError):
+            child_result.pkg = self.pkg
+
+        # If the child process raised an error, print its output here rather
+        # than waiting until the call to SpackError.die() in main(). This
+        # allows exception handling output to be logged from within Spack.
+        # see spack.main.SpackCommand.
+        if isinstance(child_result, ChildError):
+            child_result.print_context()
+            raise child_result
+
+        return child_result
 
 
 def get_package_context(traceback, context=3):
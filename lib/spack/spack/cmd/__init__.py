@@ -68,6 +68,19 @@ def require_cmd_name(cname):
 #: global, cached list of all commands -- access through all_commands()
 _all_commands = None
 
+#: global, cached map from command names to their python files
+_command_files = None
+
+#: global, cached index of command properties -- access through
+#: command_index()
+_command_index = None
+
+#: command module properties recorded in the command index
+indexed_command_properties = ('description', 'section', 'level')
+
+#: key of the command index in the misc cache
+command_index_key = 'commands/index.json'
+
 
 def all_commands():
     """Get a sorted list of all spack commands.
@@ -76,22 +89,69 @@ def all_commands():
     commands there to construct the list.  It does not actually import
     the python files -- just gets the names.
     """
-    global _all_commands
+    global _all_commands, _command_files
     if _all_commands is None:
         _all_commands = []
+        _command_files = {}
         command_paths = [spack.paths.command_path]  # Built-in commands
         command_paths += spack.extensions.get_command_paths()  # Extensions
         for path in command_paths:
             for file in os.listdir(path):
                 if file.endswith(".py") and not re.search(ignore_files, file):
-                    cmd = re.sub(r'.py$', '', file)
-                    _all_commands.append(cmd_name(cmd))
+                    cmd = cmd_name(re.sub(r'.py$', '', file))
+                    _all_commands.append(cmd)
+                    _command_files.setdefault(cmd, os.path.join(path, file))
 
         _all_commands.sort()
 
     return _all_commands
 
 
+def command_index():
+    """Get the description, section and level of every spack command.
+
+    Reading these properties requires importing every command module,
+    which is slow, so they are cached in the misc cache. The cache is
+    regenerated when the set of commands changes or when any command
+    module is newer than it.
+
+    Returns:
+        dict: maps command names to dictionaries of properties
+    """
+    global _command_index
+    if _command_index is not None:
+        return _command_index
+
+    import spack.caches  # avoid circular import at module level
+    misc_cache = spack.caches.misc_cache
+
+    commands = all_commands()
+    newest = max(os.path.getmtime(f) for f in _command_files.values())
+
+    index = None
+    if misc_cache.init_entry(command_index_key) and \
+            misc_cache.mtime(command_index_key) >= newest:
+        try:
+            with misc_cache.read_transaction(command_index_key) as f:
+                index = sjson.load(f)['commands']
+        except (ValueError, KeyError, TypeError):
+            index = None
+
+    if index is None or sorted(index) != commands:
+        index = {}
+        for command in commands:
+            module = get_module(command)
+            index[command] = dict(
+                (p, getattr(module, p, None))
+                for p in indexed_command_properties)
+
+        with misc_cache.write_transaction(command_index_key) as (old, new):
+            sjson.dump({'commands': index}, new)
+
+    _command_index = index
+    return _command_index
+
+
 def remove_options(parser, *options):
     """Remove some options from a parser."""
     for option in options:
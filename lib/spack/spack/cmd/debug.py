@@ -5,9 +5,13 @@
 
 from __future__ import print_function
 
+import argparse
 import os
 import platform
 import re
+import subprocess
+import sys
+import time
 from datetime import datetime
 from glob import glob
 
@@ -16,6 +20,7 @@
 
 import spack.architecture as architecture
 import spack.paths
+import spack.util.lock
 from spack.main import get_version
 from spack.util.executable import which
 
@@ -30,6 +35,27 @@ def setup_parser(subparser):
                   help="create a tarball of Spack's installation metadata")
     sp.add_parser('report', help='print information useful for bug reports')
 
+    startup = sp.add_parser(
+        'startup', help='time the startup of a spack command')
+    startup.add_argument(
+        '-n', '--top', type=int, default=20,
+        help='number of slowest module imports to show (default: 20)')
+    startup.add_argument(
+        '--budget', type=float, default=None, metavar='SECONDS',
+        help='fail if the command takes longer than this')
+    startup.add_argument(
+        'spack_args', nargs=argparse.REMAINDER,
+        help='spack command to time (default: --version)')
+
+    locks = sp.add_parser(
+        'locks', help='show lock contention statistics of spack processes')
+    locks.add_argument(
+        '-n', '--top', type=int, default=20,
+        help='number of most contended lock files to show (default: 20)')
+    locks.add_argument(
+        '--clear', action='store_true',
+        help='remove the statistics recorded so far')
+
 
 def _debug_tarball_suffix():
     now = datetime.now()
@@ -91,9 +117,85 @@ def report(args):
         architecture.platform(), 'frontend', 'frontend'))
 
 
+def parse_import_times(text):
+    """Parse the output of ``python -X importtime``.
+
+    Returns:
+        list: (cumulative microseconds, module name) tuples, slowest first
+    """
+    times = []
+    for line in text.splitlines():
+        match = re.match(
+            r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S+)', line)
+        if match:
+            times.append((int(match.group(2)), match.group(3)))
+    return sorted(times, reverse=True)
+
+
+def startup(args):
+    spack_args = args.spack_args or ['--version']
+    cmd = [sys.executable]
+    importtime = sys.version_info >= (3, 7)
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += [spack.paths.spack_script] + spack_args
+
+    start = time.time()
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, err = proc.communicate()
+    elapsed = time.time() - start
+
+    if importtime:
+        times = parse_import_times(err.decode('utf-8', 'replace'))
+        if times:
+            print('Slowest imports (cumulative):')
+            for usec, module in times[:args.top]:
+                print('  %8.1f ms  %s' % (usec / 1000.0, module))
+            print()
+    else:
+        tty.warn('Per-module import times require Python 3.7 or later')
+
+    print('Startup of `spack %s`: %.3f s' % (' '.join(spack_args), elapsed))
+    if args.budget is not None and elapsed > args.budget:
+        tty.die('Startup took longer than the budget of %.3f s'
+                % args.budget)
+
+
+def locks(args):
+    if args.clear:
+        spack.util.lock.clear_stats()
+        tty.msg('Removed lock statistics in %s'
+                % spack.util.lock.stats_dir())
+        return
+
+    nprocs, stats = spack.util.lock.load_stats()
+    if not stats:
+        print('No lock statistics recorded. '
+              'Set config:lock_stats to true to record them.')
+        return
+
+    print('Lock statistics of %d spack processes:' % nprocs)
+    print('%10s %10s %10s %10s %10s  %s' % (
+        'wait (s)', 'max (s)', 'acquired', 'contended', 'timeouts', 'path'))
+
+    by_wait = sorted(
+        stats.items(), key=lambda item: item[1].wait_time, reverse=True)
+    for path, s in by_wait[:args.top]:
+        print('%10.2f %10.2f %10d %10d %10d  %s' % (
+            s.wait_time, s.max_wait, s.acquired, s.contended, s.timeouts,
+            path))
+        holders = sorted(
+            s.holders.items(), key=lambda item: item[1], reverse=True)
+        for holder, count in holders[:3]:
+            print('%54s  held by %s (%d times)' % ('', holder, count))
+
+
 def debug(parser, args):
     action = {
         'create-db-tarball': create_db_tarball,
         'report': report,
+        'startup': startup,
+        'locks': locks,
     }
     action[args.debug_command](args)
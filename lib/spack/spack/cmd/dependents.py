@@ -29,25 +29,23 @@ def setup_parser(subparser):
 
 
 def inverted_dependencies():
-    """Iterate through all packages and return a dictionary mapping package
-       names to possible dependencies.
+    """Return a dictionary mapping package names to possible dependents,
+       from the dependents index of the package repositories.
 
        Virtual packages are included as sources, so that you can query
        dependents of, e.g., `mpi`, but virtuals are not included as
        actual dependents.
     """
-    dag = {}
-    for pkg in spack.repo.path.all_packages():
-        dag.setdefault(pkg.name, set())
-        for dep in pkg.dependencies:
-            deps = [dep]
-
-            # expand virtuals if necessary
-            if spack.repo.path.is_virtual(dep):
-                deps += [s.name for s in spack.repo.path.providers_for(dep)]
-
-            for d in deps:
-                dag.setdefault(d, set()).add(pkg.name)
+    dag = dict((name, set()) for name in spack.repo.path.all_package_names())
+    for dep, dependents in spack.repo.path.dependents_index.items():
+        deps = [dep]
+
+        # expand virtuals if necessary
+        if spack.repo.path.is_virtual(dep):
+            deps += [s.name for s in spack.repo.path.providers_for(dep)]
+
+        for d in deps:
+            dag.setdefault(d, set()).update(dependents)
     return dag
 
 
@@ -16,7 +16,9 @@
 
 
 def setup_parser(subparser):
-    spack.cmd.common.arguments.add_common_arguments(subparser, ['yes_to_all'])
+    spack.cmd.common.arguments.add_common_arguments(
+        subparser, ['yes_to_all'])
+    spack.cmd.uninstall.add_jobs_argument(subparser)
 
 
 def gc(parser, args):
@@ -44,4 +46,4 @@ def gc(parser, args):
     if not args.yes_to_all:
         spack.cmd.uninstall.confirm_removal(specs)
 
-    spack.cmd.uninstall.do_uninstall(None, specs, force=False)
+    spack.cmd.uninstall.do_uninstall(None, specs, force=False, jobs=args.jobs)
@@ -44,6 +44,7 @@ def update_kwargs_from_args(args, kwargs):
         'explicit': True,  # Always true for install command
         'stop_at': args.until,
         'unsigned': args.unsigned,
+        'defer_tests': args.defer_tests,
     })
 
     kwargs.update({
@@ -140,6 +141,10 @@ def setup_parser(subparser):
         '--run-tests', action='store_true',
         help='run package tests during installation (same as --test=all)'
     )
+    subparser.add_argument(
+        '--defer-tests', action='store_true',
+        help="run package tests in a separate stage after each build, "
+        "concurrently with the builds that follow")
     subparser.add_argument(
         '--log-format',
         default=None,
@@ -6,11 +6,13 @@
 """Implementation details of the ``spack module`` command."""
 
 import collections
+import multiprocessing
 import os.path
 import shutil
 import sys
 
 from llnl.util import filesystem, tty
+from llnl.util.multiproc import fork_available
 
 import spack.cmd
 import spack.modules
@@ -41,6 +43,10 @@ def setup_parser(subparser):
     arguments.add_common_arguments(
         refresh_parser, ['constraint', 'yes_to_all']
     )
+    refresh_parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='number of module files written in parallel (default: 1)'
+    )
 
     find_parser = sp.add_parser('find', help='find module files for packages')
     find_parser.add_argument(
@@ -297,14 +303,61 @@ def refresh(module_type, specs, args):
     if os.path.isdir(module_type_root) and args.delete_tree:
         shutil.rmtree(module_type_root, ignore_errors=False)
     filesystem.mkdirp(module_type_root)
-    for x in writers:
-        try:
-            x.write(overwrite=True)
-        except Exception as e:
-            tty.debug(e)
-            msg = 'Could not write module file [{0}]'
-            tty.warn(msg.format(x.layout.filename))
-            tty.warn('\t--> {0} <--'.format(str(e)))
+    jobs = getattr(args, 'jobs', None) or 1
+    for filename, error in write_module_files(writers, jobs):
+        msg = 'Could not write module file [{0}]'
+        tty.warn(msg.format(filename))
+        tty.warn('\t--> {0} <--'.format(error))
+
+
+#: Writers being processed by ``write_module_files``. Worker processes
+#: are forked, so they inherit this list and receive only indices into it.
+_writers = []
+
+
+def _write_module_file(index):
+    """Writes a single module file, returning the filename and the error
+    message if it could not be written.
+    """
+    writer = _writers[index]
+    try:
+        writer.write(overwrite=True)
+    except Exception as e:
+        tty.debug(e)
+        return writer.layout.filename, str(e)
+
+
+def write_module_files(writers, jobs=1):
+    """Writes the module files for a list of writers, using up to ``jobs``
+    worker processes.
+
+    Module files whose content did not change are left untouched, see
+    ``BaseModuleFileWriter.write``.
+
+    Args:
+        writers (list): module file writers to be processed
+        jobs (int): maximum number of worker processes
+
+    Returns:
+        list of (filename, error message) for the files that could not
+        be written
+    """
+    global _writers
+    _writers = writers
+    indices = range(len(writers))
+    try:
+        if jobs > 1 and len(writers) > 1 and fork_available():
+            pool = multiprocessing.Pool(min(jobs, len(writers)))
+            try:
+                results = pool.map(_write_module_file, indices)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_write_module_file(i) for i in indices]
+    finally:
+        _writers = []
+    return [x for x in results if x]
 
 
 #: Dictionary populated with the list of sub-commands.
@@ -0,0 +1,115 @@
+# Copyright 2013-2020 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+from __future__ import print_function
+
+import llnl.util.tty as tty
+
+import spack.perf
+from spack.util.string import plural
+
+description = "run benchmarks of spack's core and compare their results"
+section = "developer"
+level = "long"
+
+
+def setup_parser(subparser):
+    sp = subparser.add_subparsers(metavar='SUBCOMMAND', dest='perf_command')
+    sp.add_parser('list', help='list the available benchmarks')
+
+    run = sp.add_parser('run', help='run benchmarks')
+    run.add_argument(
+        '-r', '--repeat', type=int, default=5,
+        help='number of timed runs of each benchmark (default: 5)')
+    run.add_argument(
+        '-s', '--scale', type=float, default=1.0,
+        help='factor applied to the problem sizes (default: 1.0)')
+    run.add_argument(
+        '-o', '--output', metavar='FILE',
+        help='write the results to FILE, as JSON')
+    run.add_argument(
+        '-b', '--baseline', metavar='FILE',
+        help='compare the results with those saved in FILE')
+    add_threshold_argument(run)
+    run.add_argument(
+        'names', nargs='*', metavar='benchmark',
+        help='benchmarks to run (default: all)')
+
+    compare = sp.add_parser(
+        'compare', help='compare results with those of a baseline')
+    add_threshold_argument(compare)
+    compare.add_argument('baseline', help='results file of the baseline')
+    compare.add_argument('results', help='results file to compare')
+
+
+def add_threshold_argument(parser):
+    parser.add_argument(
+        '-t', '--threshold', type=float, default=10.0, metavar='PERCENT',
+        help='slowdown reported as a regression (default: 10%%)')
+
+
+def list_benchmarks(args):
+    for name in spack.perf.benchmark_names():
+        print('%-20s %s' % (name, spack.perf.benchmarks[name].description()))
+
+
+def print_result(name, result):
+    print('%-20s %10.4f %10.4f %10.4f' % (
+        name, result['min'], result['median'], result['stdev']))
+
+
+def print_comparison(baseline, results, threshold):
+    comparison = spack.perf.compare(baseline, results, threshold / 100)
+
+    print('%-20s %10s %10s %8s' % ('benchmark', 'base (s)', 'new (s)',
+                                   'change'))
+    for name, before, after, change, regressed in comparison:
+        print('%-20s %10.4f %10.4f %+7.1f%%%s' % (
+            name, before, after, change * 100,
+            '  REGRESSION' if regressed else ''))
+
+    regressions = [c for c in comparison if c[-1]]
+    if regressions:
+        tty.die('%s slower than the baseline by more than %g%%'
+                % (plural(len(regressions), 'benchmark is', 'benchmarks are'),
+                   threshold))
+
+
+def run(args):
+    if args.repeat < 1:
+        tty.die('The number of runs must be at least 1')
+
+    baseline = None
+    if args.baseline:
+        baseline = spack.perf.load_results(args.baseline)
+
+    print('%-20s %10s %10s %10s' % ('benchmark', 'min (s)', 'median (s)',
+                                    'stdev (s)'))
+    results = spack.perf.run_benchmarks(
+        args.names, repeat=args.repeat, scale=args.scale,
+        callback=print_result)
+
+    if args.output:
+        spack.perf.save_results(results, args.output)
+        tty.msg('Results written to %s' % args.output)
+
+    if baseline:
+        print()
+        print_comparison(baseline, results, args.threshold)
+
+
+def compare(args):
+    print_comparison(spack.perf.load_results(args.baseline),
+                     spack.perf.load_results(args.results),
+                     args.threshold)
+
+
+def perf(parser, args):
+    action = {
+        'list': list_benchmarks,
+        'run': run,
+        'compare': compare,
+    }
+    action[args.perf_command](args)
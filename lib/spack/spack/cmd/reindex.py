@@ -10,5 +10,14 @@
 level = "long"
 
 
+def setup_parser(subparser):
+    subparser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='number of processes reading spec files (default: 1)')
+    subparser.add_argument(
+        '--resume', action='store_true',
+        help="continue an interrupted reindex where it stopped")
+
+
 def reindex(parser, args):
-    spack.store.store.reindex()
+    spack.store.store.reindex(jobs=args.jobs, resume=args.resume)
@@ -10,10 +10,8 @@
 
 import spack.cmd
 import spack.environment as ev
-import spack.error
 import spack.package
 import spack.cmd.common.arguments as arguments
-import spack.repo
 import spack.store
 from spack.database import InstallStatuses
 
@@ -44,7 +42,9 @@ def setup_parser(subparser):
         help="remove regardless of whether other packages or environments "
         "depend on this one")
     arguments.add_common_arguments(
-        subparser, ['recurse_dependents', 'yes_to_all', 'installed_specs'])
+        subparser, ['recurse_dependents', 'yes_to_all'])
+    add_jobs_argument(subparser)
+    arguments.add_common_arguments(subparser, ['installed_specs'])
     subparser.add_argument(
         '-a', '--all', action='store_true', dest='all',
         help="USE CAREFULLY. Remove ALL installed packages that match each "
@@ -55,6 +55,12 @@ def setup_parser(subparser):
         "will be uninstalled.")
 
 
+def add_jobs_argument(subparser):
+    subparser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='number of prefixes deleted concurrently (default: 1)')
+
+
 def find_matching_specs(env, specs, allow_multiple_matches=False, force=False):
     """Returns a list of specs matching the not necessarily
        concretized specs given from cli
@@ -122,10 +128,9 @@ def installed_dependents(specs, env):
 
     env_hashes = set(env.all_hashes()) if env else set()
 
-    all_specs_in_db = spack.store.db.query()
-
     for spec in specs:
-        installed = [x for x in all_specs_in_db if spec in x]
+        installed = spack.store.db.installed_relatives(
+            spec, 'parents', True)
 
         # separate installed dependents into dpts in this environment and
         # dpts that are outside this environment
@@ -188,41 +193,17 @@ def _remove_from_env(spec, env):
         pass  # ignore non-root specs
 
 
-def do_uninstall(env, specs, force):
+def do_uninstall(env, specs, force, jobs=1):
     """Uninstalls all the specs in a list.
 
     Args:
         env (Environment): active environment, or ``None`` if there is not one
         specs (list): list of specs to be uninstalled
         force (bool): force uninstallation (boolean)
+        jobs (int): number of prefixes deleted concurrently, one at a
+            time by default
     """
-    packages = []
-    for item in specs:
-        try:
-            # should work if package is known to spack
-            packages.append(item.package)
-        except spack.repo.UnknownEntityError:
-            # The package.py file has gone away -- but still
-            # want to uninstall.
-            spack.package.Package.uninstall_by_spec(item, force=True)
-
-    # A package is ready to be uninstalled when nothing else references it,
-    # unless we are requested to force uninstall it.
-    is_ready = lambda x: not spack.store.db.query_by_spec_hash(x)[1].ref_count
-    if force:
-        is_ready = lambda x: True
-
-    while packages:
-        ready = [x for x in packages if is_ready(x.spec.dag_hash())]
-        if not ready:
-            msg = 'unexpected error [cannot proceed uninstalling specs with' \
-                  ' remaining dependents {0}]'
-            msg = msg.format(', '.join(x.name for x in packages))
-            raise spack.error.SpackError(msg)
-
-        packages = [x for x in packages if x not in ready]
-        for item in ready:
-            item.do_uninstall(force=force)
+    spack.package.Package.uninstall_by_specs(specs, force=force, jobs=jobs)
 
 
 def get_uninstall_list(args, specs, env):
@@ -320,7 +301,7 @@ def uninstall_specs(args, specs):
             env.write()
 
     # Uninstall everything on the list
-    do_uninstall(env, uninstall_list, args.force)
+    do_uninstall(env, uninstall_list, args.force, args.jobs)
 
 
 def confirm_removal(specs):
@@ -48,6 +48,7 @@
 
 import spack.paths
 import spack.architecture
+import spack.profiling
 import spack.schema
 import spack.schema.compilers
 import spack.schema.mirrors
@@ -725,11 +726,12 @@ def _read_config_file(filename, schema):
 
     try:
         tty.debug("Reading config file %s" % filename)
-        with open(filename) as f:
-            data = syaml.load_config(f)
+        with spack.profiling.span('config', filename):
+            with open(filename) as f:
+                data = syaml.load_config(f)
 
-        if data:
-            validate(data, schema)
+            if data:
+                validate(data, schema)
         return data
 
     except MarkedYAMLError as e:
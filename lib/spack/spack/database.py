@@ -35,6 +35,7 @@
 
 import llnl.util.tty as tty
 import six
+import spack.dependency as dp
 import spack.repo
 import spack.spec
 import spack.store
@@ -86,6 +87,9 @@
 # Types of dependencies tracked by the database
 _tracked_deps = ('link', 'run')
 
+# Seconds between two saves of the progress of a reindex
+_reindex_save_interval = 60
+
 
 def _now():
     """Returns the time since the epoch"""
@@ -221,6 +225,39 @@ def __getattribute__(self, name):
             "Cannot access attribute '{0}' of lock".format(name))
 
 
+class _ReindexLayout(object):
+    """Directory layout used by ``Database.reindex()`` to add specs.
+
+    Spec files are only read once. ``check_installed()`` trusts the spec
+    files that were read already, and defers checking those that were
+    not, as they will be read later.
+    """
+
+    def __init__(self, layout, spec_files):
+        self.layout = layout
+        self.spec_files = set(spec_files)
+
+        #: DAG hashes of the specs read, by spec file
+        self.hashes = {}
+
+        #: (DAG hash, spec file) of the installations to check at the end
+        self.deferred = []
+
+    def __getattr__(self, name):
+        return getattr(self.layout, name)
+
+    def check_installed(self, spec):
+        spec_file = self.layout.spec_file_path(spec)
+        if spec_file in self.hashes:
+            if self.hashes[spec_file] == spec.dag_hash():
+                return self.layout.path_for_spec(spec)
+        elif spec_file in self.spec_files:
+            self.deferred.append((spec.dag_hash(), spec_file))
+            return self.layout.path_for_spec(spec)
+
+        return self.layout.check_installed(spec)
+
+
 _query_docstring = """
 
         Args:
@@ -301,6 +338,7 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
         # Set up layout of database files within the db dir
         self._index_path = os.path.join(self._db_dir, 'index.json')
         self._verifier_path = os.path.join(self._db_dir, 'index_verifier')
+        self._reindex_path = os.path.join(self._db_dir, 'reindex.json')
         self._lock_path = os.path.join(self._db_dir, 'lock')
 
         # This is for other classes to use to lock prefix directories.
@@ -324,6 +362,10 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
         self.is_upstream = is_upstream
         self.last_seen_verifier = ''
 
+        # Prefix and failure locks are spread over this many lock files
+        self.prefix_lock_shards = (
+            spack.config.get('config:prefix_lock_shards') or 1)
+
         # initialize rest of state.
         self.db_lock_timeout = (
             spack.config.get('config:db_lock_timeout') or _db_lock_timeout)
@@ -345,6 +387,10 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
                                 desc='database')
         self._data = {}
 
+        # Dependents of each record, for the records in _data, see
+        # _dependents_index()
+        self._dependents = None
+
         self.upstream_dbs = list(upstream_dbs) if upstream_dbs else []
 
         # whether there was an error at the start of a read transaction
@@ -436,10 +482,9 @@ def mark_failed(self, spec):
 
         prefix = spec.prefix
         if prefix not in self._prefix_failures:
+            path, start = self._prefix_lock_range(self.prefix_fail_path, spec)
             mark = lk.Lock(
-                self.prefix_fail_path,
-                start=spec.dag_hash_bit_prefix(bit_length(sys.maxsize)),
-                length=1,
+                path, start=start, length=1,
                 default_timeout=self.package_lock_timeout, desc=spec.name)
 
             try:
@@ -474,10 +519,9 @@ def prefix_failed(self, spec):
 
     def prefix_failure_locked(self, spec):
         """Return True if a process has a failure lock on the spec."""
+        path, start = self._prefix_lock_range(self.prefix_fail_path, spec)
         check = lk.Lock(
-            self.prefix_fail_path,
-            start=spec.dag_hash_bit_prefix(bit_length(sys.maxsize)),
-            length=1,
+            path, start=start, length=1,
             default_timeout=self.package_lock_timeout, desc=spec.name)
 
         return check.is_write_locked()
@@ -486,6 +530,22 @@ def prefix_failure_marked(self, spec):
         """Determine if the spec has a persistent failure marking."""
         return os.path.exists(self._failed_spec_path(spec))
 
+    def _prefix_lock_range(self, path, spec):
+        """Return the lock file and byte offset of ``spec``'s lock.
+
+        The offset is the sys.maxsize-bit prefix of the DAG hash. When the
+        locks are sharded, the next 32 bits of the hash choose the file
+        ``<path>.<shard>``, which adds to the keyspace and spreads
+        contention over several files.
+        """
+        offset_bits = bit_length(sys.maxsize)
+        if self.prefix_lock_shards == 1:
+            return path, spec.dag_hash_bit_prefix(offset_bits)
+
+        key = spec.dag_hash_bit_prefix(offset_bits + 32)
+        shard = (key & 0xffffffff) % self.prefix_lock_shards
+        return '{0}.{1}'.format(path, shard), key >> 32
+
     def prefix_lock(self, spec, timeout=None):
         """Get a lock on a particular spec's installation directory.
 
@@ -500,14 +560,16 @@ def prefix_lock(self, spec, timeout=None):
         likelihood of collision is very low AND it gives us
         readers-writer lock semantics with just a single lockfile, so no
         cleanup required.
+
+        With ``config:prefix_lock_shards`` set, the locks are spread over
+        that many lock files (see ``_prefix_lock_range()``).
         """
         timeout = timeout or self.package_lock_timeout
         prefix = spec.prefix
         if prefix not in self._prefix_locks:
+            path, start = self._prefix_lock_range(self.prefix_lock_path, spec)
             self._prefix_locks[prefix] = lk.Lock(
-                self.prefix_lock_path,
-                start=spec.dag_hash_bit_prefix(bit_length(sys.maxsize)),
-                length=1,
+                path, start=start, length=1,
                 default_timeout=timeout, desc=spec.name)
         elif timeout != self._prefix_locks[prefix].default_timeout:
             self._prefix_locks[prefix].default_timeout = timeout
@@ -656,6 +718,13 @@ def _read_from_file(self, filename):
         except Exception as e:
             raise CorruptDatabaseError("error parsing database:", str(e))
 
+        self._read_from_dict(fdata)
+
+    def _read_from_dict(self, fdata):
+        """Fill database from the JSON data of a database file.
+
+        Does not do any locking.
+        """
         if fdata is None:
             return
 
@@ -741,10 +810,16 @@ def invalid_record(hash_key, error):
 
         self._data = data
 
-    def reindex(self, directory_layout):
+    def reindex(self, directory_layout, jobs=1, resume=False):
         """Build database index from scratch based on a directory layout.
 
         Locks the DB if it isn't locked already.
+
+        Args:
+            directory_layout: layout of the installations to index
+            jobs (int): number of processes reading spec files
+            resume (bool): start from the progress saved by an
+                interrupted reindex, if there is one
         """
         if self.is_upstream:
             raise UpstreamDatabaseLockingError(
@@ -775,12 +850,15 @@ def _read_suppress_error():
             old_data = self._data
             try:
                 self._construct_from_directory_layout(
-                    directory_layout, old_data)
+                    directory_layout, old_data, jobs, resume)
             except BaseException:
                 # If anything explodes, restore old data, skip write.
                 self._data = old_data
                 raise
 
+        if os.path.exists(self._reindex_path):
+            os.remove(self._reindex_path)
+
     def _construct_entry_from_directory_layout(self, directory_layout,
                                                old_data, spec,
                                                deprecator=None):
@@ -806,7 +884,94 @@ def _construct_entry_from_directory_layout(self, directory_layout,
         if deprecator:
             self._deprecate(spec, deprecator)
 
-    def _construct_from_directory_layout(self, directory_layout, old_data):
+    def _construct_from_spec_files(self, directory_layout, old_data,
+                                   jobs=1, resume=False):
+        """Add the specs of all the spec files in a directory layout,
+        read by up to ``jobs`` processes.
+
+        Progress is saved regularly, and when reading fails, so that a
+        reindex can be resumed.
+
+        Returns:
+            (set): DAG hashes of the specs read
+        """
+        # The layout is walked: prefixes created behind its back are not
+        # in its index, and the index is rewritten from what is read here
+        spec_files = directory_layout.all_spec_files(use_index=False)
+        layout = _ReindexLayout(directory_layout, spec_files)
+
+        if resume and os.path.isfile(self._reindex_path):
+            with open(self._reindex_path) as f:
+                progress = sjson.load(f)
+            self._read_from_dict(progress)
+            layout.hashes = progress['reindex']['spec_files']
+            layout.deferred = [
+                tuple(x) for x in progress['reindex']['deferred']]
+            tty.msg('Resuming reindex with {0} spec files already read'
+                    .format(len(layout.hashes)))
+
+        remaining = [x for x in spec_files if x not in layout.hashes]
+        total, done = len(spec_files), len(spec_files) - len(remaining)
+        reported = 10 * done // max(total, 1)
+        saved = time.time()
+        try:
+            for path, spec in directory_layout.read_specs(remaining, jobs):
+                self._construct_entry_from_directory_layout(
+                    layout, old_data, spec)
+                layout.hashes[path] = spec.dag_hash()
+
+                done += 1
+                if 10 * done // total > reported:
+                    reported = 10 * done // total
+                    tty.msg('Read {0} of {1} spec files [{2}%]'.format(
+                        done, total, 100 * done // total))
+
+                if time.time() - saved > _reindex_save_interval:
+                    self._write_reindex_progress(layout)
+                    saved = time.time()
+        except BaseException:
+            self._write_reindex_progress(layout)
+            raise
+
+        # Check the installations whose spec files were not read yet
+        # when they were added as dependencies
+        for key, spec_file in layout.deferred:
+            if layout.hashes.get(spec_file) == key:
+                continue
+            record = self._data[key]
+            try:
+                directory_layout.check_installed(record.spec)
+            except DirectoryLayoutError as e:
+                tty.warn(
+                    'Dependency missing: may be deprecated or corrupted:',
+                    record.path, str(e))
+                record.installed = False
+
+        directory_layout.write_index(layout.hashes)
+        return set(layout.hashes.values())
+
+    def _write_reindex_progress(self, layout):
+        """Save the records built by a reindex, with the spec files they
+        were read from, so that it can be resumed."""
+        installs = dict((k, v.to_dict()) for k, v in self._data.items())
+        progress = {
+            'database': {
+                'installs': installs,
+                'version': str(_db_version)
+            },
+            'reindex': {
+                'spec_files': layout.hashes,
+                'deferred': layout.deferred
+            }
+        }
+
+        temp_file = self._reindex_path + '.temp'
+        with open(temp_file, 'w') as f:
+            sjson.dump(progress, f)
+        os.rename(temp_file, self._reindex_path)
+
+    def _construct_from_directory_layout(self, directory_layout, old_data,
+                                         jobs=1, resume=False):
         # Read first the `spec.yaml` files in the prefixes. They should be
         # considered authoritative with respect to DB reindexing, as
         # entries in the DB may be corrupted in a way that still makes
@@ -817,23 +982,19 @@ def _construct_from_directory_layout(self, directory_layout, old_data):
             self._data = {}
 
             # Start inspecting the installed prefixes
-            processed_specs = set()
-
-            for spec in directory_layout.all_specs():
-                self._construct_entry_from_directory_layout(directory_layout,
-                                                            old_data, spec)
-                processed_specs.add(spec)
+            processed = self._construct_from_spec_files(
+                directory_layout, old_data, jobs, resume)
 
             for spec, deprecator in directory_layout.all_deprecated_specs():
                 self._construct_entry_from_directory_layout(directory_layout,
                                                             old_data, spec,
                                                             deprecator)
-                processed_specs.add(spec)
+                processed.add(spec.dag_hash())
 
             for key, entry in old_data.items():
                 # We already took care of this spec using
                 # `spec.yaml` from its prefix.
-                if entry.spec in processed_specs:
+                if key in processed:
                     msg = 'SKIPPING RECONSTRUCTION FROM OLD DB: {0}'
                     msg += ' [already reconstructed from spec.yaml]'
                     tty.debug(msg.format(entry.spec))
@@ -862,7 +1023,7 @@ def _construct_from_directory_layout(self, directory_layout, old_data):
                             'installation_time': entry.installation_time  # noqa: E501
                         }
                         self._add(**kwargs)
-                        processed_specs.add(entry.spec)
+                        processed.add(key)
                 except Exception as e:
                     # Something went wrong, so the spec was not restored
                     # from old data
@@ -1056,6 +1217,7 @@ def _add(
             # the original hash of concrete specs.
             new_spec._mark_concrete()
             new_spec._hash = key
+            self._index_dependencies(key, new_spec)
 
         else:
             # If it is already there, mark it as installed.
@@ -1105,6 +1267,7 @@ def _decrement_ref_count(self, spec):
 
         if rec.ref_count == 0 and not rec.installed:
             del self._data[key]
+            self._index_dependencies(key, rec.spec, remove=True)
             for dep in spec.dependencies(_tracked_deps):
                 self._decrement_ref_count(dep)
 
@@ -1127,6 +1290,7 @@ def _remove(self, spec):
             return rec.spec
 
         del self._data[key]
+        self._index_dependencies(key, rec.spec, remove=True)
         for dep in rec.spec.dependencies(_tracked_deps):
             # FIXME: the two lines below needs to be updated once #11983 is
             # FIXME: fixed. The "if" statement should be deleted and specs are
@@ -1200,20 +1364,80 @@ def deprecate(self, spec, deprecator):
         with self.write_transaction():
             return self._deprecate(spec, deprecator)
 
+    def _dependents_index(self):
+        """Map the DAG hash of each record to the hashes of the records
+        depending directly on it, and the types of these dependencies.
+
+        The index is built on first use and then kept up to date as
+        records are added and removed, until the records are read again.
+        Dependents can't be found from the specs, which only know one
+        dependent per package name.
+        """
+        if self._dependents is None or self._dependents[0] is not self._data:
+            self._dependents = (self._data, {})
+            for key, rec in self._data.items():
+                self._index_dependencies(key, rec.spec)
+        return self._dependents[1]
+
+    def _index_dependencies(self, key, spec, remove=False):
+        """Add or remove the record of a spec in the dependents index."""
+        if self._dependents is None or self._dependents[0] is not self._data:
+            return  # the index will be built from scratch when needed
+
+        index = self._dependents[1]
+        for dep in spec.dependencies_dict().values():
+            dependents = index.setdefault(dep.spec.dag_hash(), {})
+            if remove:
+                dependents.pop(key, None)
+            else:
+                dependents[key] = dep.deptypes
+
+    def _installed_dependents(self, spec, transitive, deptype):
+        """Specs of the records depending on a spec, from the dependents
+        indexes of this database and of its upstreams."""
+        deptype = dp.canonical_deptype(deptype)
+        indexes = [self._dependents_index()]
+        indexes += [db._dependents_index() for db in self.upstream_dbs]
+
+        found, stack = set(), [spec.dag_hash()]
+        while stack:
+            key = stack.pop()
+            for index in indexes:
+                for parent, deptypes in index.get(key, {}).items():
+                    if parent in found or not set(deptypes) & set(deptype):
+                        continue
+                    found.add(parent)
+                    if transitive:
+                        stack.append(parent)
+
+        return [self.query_by_spec_hash(key)[1].spec for key in found]
+
     @_autospec
     def installed_relatives(self, spec, direction='children', transitive=True,
                             deptype='all'):
-        """Return installed specs related to this one."""
+        """Return installed specs related to this one.
+
+        The relatives of a concrete spec are found following the links of
+        its record in the database, whether or not it is still installed.
+        """
         if direction not in ('parents', 'children'):
             raise ValueError("Invalid direction: %s" % direction)
 
+        if spec.concrete:
+            upstream, record = self.query_by_spec_hash(spec.dag_hash())
+            specs = [record.spec] if record else []
+        else:
+            specs = self.query(spec)
+
         relatives = set()
-        for spec in self.query(spec):
-            if transitive:
+        for spec in specs:
+            if direction == 'parents':
+                with self.read_transaction():
+                    to_add = self._installed_dependents(
+                        spec, transitive, deptype)
+            elif transitive:
                 to_add = spec.traverse(
                     direction=direction, root=False, deptype=deptype)
-            elif direction == 'parents':
-                to_add = spec.dependents(deptype=deptype)
             else:  # direction == 'children'
                 to_add = spec.dependencies(deptype=deptype)
 
@@ -8,14 +8,18 @@
 import glob
 import tempfile
 import re
+import multiprocessing
 from contextlib import contextmanager
 
 import ruamel.yaml as yaml
 
+import llnl.util.tty as tty
 from llnl.util.filesystem import mkdirp
+from llnl.util.multiproc import fork_available
 
 import spack.config
 import spack.spec
+import spack.util.lock as lk
 from spack.error import SpackError
 
 
@@ -25,6 +29,18 @@ def _check_concrete(spec):
         raise ValueError('Specs passed to a DirectoryLayout must be concrete!')
 
 
+def _load_spec_file(path):
+    """Load the YAML data of a spec file in a worker process.
+
+    Returns the path, and either the data or the error message.
+    """
+    try:
+        with open(path) as f:
+            return path, yaml.load(f), None
+    except Exception as e:
+        return path, None, str(e)
+
+
 class DirectoryLayout(object):
     """A directory layout is used to associate unique paths with specs.
        Different installations are going to want differnet layouts for their
@@ -63,6 +79,11 @@ def create_install_directory(self, spec):
         """Creates the installation directory for a spec."""
         raise NotImplementedError()
 
+    def index_install_directory(self, spec):
+        """Records an install directory that was not created with
+        create_install_directory(), e.g. extracted from a build cache."""
+        pass
+
     def check_installed(self, spec):
         """Checks whether a spec is installed.
 
@@ -206,6 +227,10 @@ def __init__(self, root, **kwargs):
         self.packages_dir        = 'repos'  # archive of package.py files
         self.manifest_file_name  = 'install_manifest.json'
 
+        # Append-only log of the prefixes in the layout, see read_index()
+        self.index_path = os.path.join(
+            self.root, self.metadata_dir, 'layout_index')
+
     @property
     def hidden_file_paths(self):
         return (self.metadata_dir,)
@@ -300,6 +325,100 @@ def create_install_directory(self, spec):
         mkdirp(self.metadata_path(spec), mode=perms, group=group)  # in prefix
 
         self.write_spec(spec, self.spec_file_path(spec))
+        self._append_to_index('+', spec)
+
+    def index_install_directory(self, spec):
+        self._append_to_index('+', spec)
+
+    def remove_install_directory(self, spec, deprecated=False):
+        super(YamlDirectoryLayout, self).remove_install_directory(
+            spec, deprecated)
+        self._append_to_index('-', spec)
+
+    def read_index(self):
+        """Read the index of the installations in this layout.
+
+        The index is a log with a ``+ <hash> <prefix>`` line for each
+        install directory created and a ``- <hash> <prefix>`` line for
+        each one removed, prefixes being relative to the root.
+
+        Returns:
+            (dict): relative prefixes by DAG hash, or None if there is
+                no index or it is not consistent with the layout
+        """
+        try:
+            with open(self.index_path) as f:
+                lines = f.read().split('\n')
+        except (IOError, OSError):
+            return None
+
+        # A last line not terminated was only partially written
+        if lines.pop():
+            return None
+
+        prefixes = {}
+        for line in lines:
+            fields = line.split(' ', 2)
+            if len(fields) != 3 or fields[0] not in '+-':
+                return None
+            op, dag_hash, prefix = fields
+            if op == '+':
+                prefixes[dag_hash] = prefix
+            elif prefixes.get(dag_hash) == prefix:
+                del prefixes[dag_hash]
+
+        for prefix in prefixes.values():
+            spec_file = os.path.join(
+                self.root, prefix, self.metadata_dir, self.spec_file_name)
+            if not os.path.isfile(spec_file):
+                tty.debug('Layout index is out of date, missing: ' +
+                          spec_file)
+                return None
+        return prefixes
+
+    def write_index(self, spec_files):
+        """Replace the index with one listing the given installations.
+
+        Args:
+            spec_files (dict): DAG hashes by spec file path. Deprecated
+                specs, whose prefixes link to their deprecator, are left
+                out.
+        """
+        if not os.path.isdir(self.root):
+            return
+
+        lines = []
+        for path, dag_hash in spec_files.items():
+            prefix = os.path.dirname(os.path.dirname(path))
+            if not os.path.islink(prefix):
+                prefix = os.path.relpath(prefix, self.root)
+                lines.append('+ %s %s\n' % (dag_hash, prefix))
+
+        try:
+            with lk.WriteTransaction(self._index_lock()):
+                temp_file = self.index_path + '.temp'
+                with open(temp_file, 'w') as f:
+                    f.write(''.join(sorted(set(lines))))
+                os.rename(temp_file, self.index_path)
+        except (IOError, OSError, lk.LockError) as e:
+            tty.debug('Unable to write layout index: %s' % str(e))
+
+    def _index_lock(self):
+        return lk.Lock(self.index_path + '.lock', desc='layout index')
+
+    def _append_to_index(self, op, spec):
+        # Without an index, all_specs() walks the layout and writes one
+        if not os.path.isfile(self.index_path):
+            return
+
+        line = '%s %s %s\n' % (
+            op, spec.dag_hash(), self.relative_path_for_spec(spec))
+        try:
+            with lk.WriteTransaction(self._index_lock()):
+                with open(self.index_path, 'a') as f:
+                    f.write(line)
+        except (IOError, OSError, lk.LockError) as e:
+            tty.debug('Unable to update layout index: %s' % str(e))
 
     def check_installed(self, spec):
         _check_concrete(spec)
@@ -331,15 +450,78 @@ def check_installed(self, spec):
             raise InconsistentInstallDirectoryError(
                 'Spec file in %s does not match hash!' % spec_file_path)
 
-    def all_specs(self):
+    def all_spec_files(self, use_index=True):
+        """Paths of the spec files of all the installations.
+
+        They are listed by the index when it is consistent and
+        ``use_index`` is True, and found by walking the layout otherwise.
+        """
+        if not use_index:
+            return self._find_spec_files()
+        indexed = self._indexed_spec_files()
+        return self._find_spec_files() if indexed is None else indexed
+
+    def _indexed_spec_files(self):
+        prefixes = self.read_index()
+        if prefixes is None:
+            return None
+        return sorted(
+            os.path.join(self.root, p, self.metadata_dir, self.spec_file_name)
+            for p in prefixes.values())
+
+    def _find_spec_files(self):
         if not os.path.isdir(self.root):
             return []
 
         path_elems = ["*"] * len(self.path_scheme.split(os.sep))
         path_elems += [self.metadata_dir, self.spec_file_name]
         pattern = os.path.join(self.root, *path_elems)
-        spec_files = glob.glob(pattern)
-        return [self.read_spec(s) for s in spec_files]
+        return sorted(glob.glob(pattern))
+
+    def all_specs(self):
+        indexed = self._indexed_spec_files()
+        if indexed is not None:
+            return [self.read_spec(s) for s in indexed]
+
+        spec_files = dict((s, self.read_spec(s))
+                          for s in self._find_spec_files())
+        self.write_index(dict(
+            (s, spec.dag_hash()) for s, spec in spec_files.items()))
+        return list(spec_files.values())
+
+    def read_specs(self, paths, jobs=1):
+        """Read spec files with up to ``jobs`` worker processes.
+
+        Workers only load the YAML files, specs are constructed here.
+
+        Yields:
+            (path, spec) tuples, in no particular order
+        """
+        if jobs < 2 or len(paths) < 2 or not fork_available():
+            for path in paths:
+                yield path, self.read_spec(path)
+            return
+
+        pool = multiprocessing.Pool(min(jobs, len(paths)))
+        try:
+            for path, data, error in pool.imap_unordered(
+                    _load_spec_file, paths, chunksize=16):
+                try:
+                    spec = spack.spec.Spec.from_dict(data) if data else None
+                except Exception as e:
+                    error = str(e)
+                if error or not spec:
+                    raise SpecReadError(
+                        'Unable to read file: %s' % path,
+                        'Cause: ' + (error or 'no spec in file'))
+
+                # Specs read from actual installations are always concrete
+                spec._mark_concrete()
+                yield path, spec
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
 
     def all_deprecated_specs(self):
         if not os.path.isdir(self.root):
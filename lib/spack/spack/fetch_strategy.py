@@ -24,6 +24,7 @@
 """
 import copy
 import functools
+import hashlib
 import os
 import os.path
 import re
@@ -36,6 +37,7 @@
 import spack.config
 import spack.error
 import spack.util.crypto as crypto
+import spack.util.lock
 import spack.util.pattern as pattern
 import spack.util.url as url_util
 import spack.util.web as web_util
@@ -793,7 +795,10 @@ def fetch(self):
         tty.msg("Cloning git repository: {0}".format(self._repo_info()))
 
         git = self.git
-        if self.commit:
+        if self._use_repo_cache():
+            self._clone_from_repo_cache()
+
+        elif self.commit:
             # Need to do a regular clone and check out everything if
             # they asked for a particular commit.
             debug = spack.config.get('config:debug')
@@ -881,6 +886,76 @@ def fetch(self):
                     args.insert(1, '--quiet')
                 git(*args)
 
+    def _use_repo_cache(self):
+        """Whether to clone from a local cache of the repository.
+
+        The cache is used if ``config:git_repo_cache`` is set, for fetches
+        of a specific commit, tag or branch, and lives in the source cache.
+        """
+        import spack.caches  # avoid circular import at module level
+        if not spack.config.get('config:git_repo_cache'):
+            return False
+        if not getattr(spack.caches.fetch_cache, 'root', None):
+            return False
+        return bool(self.commit or self.tag or self.branch)
+
+    def _repo_cache_path(self):
+        """Path of the bare repository caching objects from ``self.url``."""
+        import spack.caches  # avoid circular import at module level
+        digest = hashlib.sha256(self.url.encode('utf-8')).hexdigest()
+        return os.path.join(spack.caches.fetch_cache.root, 'git-repos',
+                            digest[:2], digest + '.git')
+
+    def _in_repo_cache(self, cache):
+        """Whether the revision to fetch is already in the cache. Branches
+        are always fetched again, as they move."""
+        if self.commit:
+            ref = '{0}^{{commit}}'.format(self.commit)
+        elif self.tag:
+            ref = 'refs/tags/{0}'.format(self.tag)
+        else:
+            return False
+
+        self.git('--git-dir', cache, 'rev-parse', '--quiet', '--verify', ref,
+                 output=os.devnull, error=os.devnull, fail_on_error=False)
+        return self.git.returncode == 0
+
+    def _clone_from_repo_cache(self):
+        """Fetch into the repository cache if needed, then clone from it.
+
+        The clone hardlinks or copies objects from the cache, so it works
+        without the cache afterwards and needs no network access. Its
+        ``origin`` remote is set back to ``self.url``.
+        """
+        git = self.git
+        quiet = [] if spack.config.get('config:debug') else ['--quiet']
+
+        cache = self._repo_cache_path()
+        lock = spack.util.lock.Lock(cache + '.lock', desc=self.url)
+        with spack.util.lock.WriteTransaction(lock):
+            if not os.path.isdir(cache):
+                mkdirp(os.path.dirname(cache))
+                git('init', '--bare', *(quiet + [cache]))
+
+            if not self._in_repo_cache(cache):
+                tty.debug('Fetching {0} into {1}'.format(self.url, cache))
+                git('--git-dir', cache, 'fetch', *(quiet + [
+                    '--tags', self.url, '+refs/heads/*:refs/heads/*']))
+
+            repo_name = os.path.basename(self.url.rstrip('/'))
+            if repo_name.endswith('.git'):
+                repo_name = repo_name[:-len('.git')]
+
+            with temp_cwd():
+                git('clone', *(quiet + [cache, repo_name]))
+                self.stage.srcdir = repo_name
+                shutil.move(repo_name, self.stage.source_path)
+
+        with working_dir(self.stage.source_path):
+            git('remote', 'set-url', 'origin', self.url)
+            revision = self.commit or self.tag or self.branch
+            git('checkout', *(quiet + [revision]))
+
     def archive(self, destination):
         super(GitFetchStrategy, self).archive(destination, exclude='.git')
 
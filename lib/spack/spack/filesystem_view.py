@@ -5,18 +5,21 @@
 
 import filecmp
 import functools as ft
+import multiprocessing.pool
 import os
 import re
 import shutil
 import sys
 
-from llnl.util.link_tree import LinkTree, MergeConflictError
+from llnl.util.link_tree import (
+    LinkTree, MergeConflictError, merge_directory, unmerge_directory)
 from llnl.util import tty
 from llnl.util.lang import match_predicate, index_by
 from llnl.util.tty.color import colorize
 from llnl.util.filesystem import (
     mkdirp, remove_dead_links, remove_empty_directories)
 
+import spack.util.spack_json as sjson
 import spack.util.spack_yaml as s_yaml
 
 import spack.spec
@@ -38,6 +41,7 @@
 
 
 _projections_path = '.spack/projections.yaml'
+_manifests_path = '.spack/.manifests'
 
 
 class FilesystemView(object):
@@ -69,6 +73,10 @@ def __init__(self, root, layout, **kwargs):
         self.link = kwargs.get("link", os.symlink)
         self.verbose = kwargs.get("verbose", False)
 
+        # Number of threads used to walk and link independent packages;
+        # None means one per CPU.
+        self.jobs = kwargs.get("jobs", None)
+
     def add_specs(self, *specs, **kwargs):
         """
             Add given specs to view.
@@ -245,7 +253,7 @@ def add_specs(self, *specs, **kwargs):
 
         set(map(self._check_no_ext_conflicts, extensions))
         # fail on first error, otherwise link extensions as well
-        if all(map(self.add_standalone, standalones)):
+        if self.add_standalones(*standalones):
             all(map(self.add_extension, extensions))
 
     def add_extension(self, spec):
@@ -271,84 +279,185 @@ def add_extension(self, spec):
         return True
 
     def add_standalone(self, spec):
-        if spec.package.is_extension:
-            tty.error(self._croot + 'Package %s is an extension.'
-                      % spec.name)
-            return False
-
-        if spec.external:
-            tty.warn(self._croot + 'Skipping external package: %s'
-                     % colorize_spec(spec))
-            return True
+        return self.add_standalones(spec)
 
-        if self.check_added(spec):
-            tty.warn(self._croot + 'Skipping already linked package: %s'
-                     % colorize_spec(spec))
-            return True
+    def add_standalones(self, *specs):
+        """
+            Add (link) several standalone packages into this view.
 
-        if spec.package.extendable:
-            # Check for globally activated extensions in the extendee that
-            # we're looking at.
-            activated = [p.spec for p in
-                         spack.store.db.activated_extensions_for(spec)]
-            if activated:
-                tty.error("Globally activated extensions cannot be used in "
-                          "conjunction with filesystem views. "
-                          "Please deactivate the following specs: ")
-                spack.cmd.display_specs(activated, flags=True, variants=True,
-                                        long=False)
+            The file trees of the packages are walked and their files are
+            linked concurrently. Returns False without linking anything if
+            any of the specs cannot be added.
+        """
+        to_merge = []
+        for spec in specs:
+            if spec.package.is_extension:
+                tty.error(self._croot + 'Package %s is an extension.'
+                          % spec.name)
                 return False
 
-        self.merge(spec)
-
-        self.link_meta_folder(spec)
+            if spec.external:
+                tty.warn(self._croot + 'Skipping external package: %s'
+                         % colorize_spec(spec))
+                continue
+
+            if self.check_added(spec):
+                tty.warn(self._croot + 'Skipping already linked package: %s'
+                         % colorize_spec(spec))
+                continue
+
+            if spec.package.extendable:
+                # Check for globally activated extensions in the extendee
+                # that we're looking at.
+                activated = [p.spec for p in
+                             spack.store.db.activated_extensions_for(spec)]
+                if activated:
+                    tty.error("Globally activated extensions cannot be used "
+                              "in conjunction with filesystem views. "
+                              "Please deactivate the following specs: ")
+                    spack.cmd.display_specs(activated, flags=True,
+                                            variants=True, long=False)
+                    return False
+
+            to_merge.append(spec)
+
+        self.merge_all(to_merge)
+
+        for spec in to_merge:
+            self.link_meta_folder(spec)
 
-        if self.verbose:
-            tty.info(self._croot + 'Linked package: %s' % colorize_spec(spec))
+            if self.verbose:
+                tty.info(self._croot + 'Linked package: %s'
+                         % colorize_spec(spec))
         return True
 
-    def merge(self, spec, ignore=None):
+    def _merge_plan(self, spec, ignore=None):
         pkg = spec.package
-        view_source = pkg.view_source()
-        view_dst = pkg.view_destination(self)
-
-        tree = LinkTree(view_source)
-
         ignore = ignore or (lambda f: False)
         ignore_file = match_predicate(
             self.layout.hidden_file_paths, ignore)
+        return _MergePlan(spec, pkg.view_source(), pkg.view_destination(self),
+                          ignore_file)
 
-        # check for dir conflicts
-        conflicts = tree.find_dir_conflicts(view_dst, ignore_file)
+    def _map(self, fn, items):
+        """Apply ``fn`` to each item using a pool of ``self.jobs`` threads.
 
-        merge_map = tree.get_file_map(view_dst, ignore_file)
-        if not self.ignore_conflicts:
-            conflicts.extend(pkg.view_file_conflicts(self, merge_map))
+        Linking a view is dominated by filesystem calls, which release
+        the GIL, so threads are enough to overlap them.
+        """
+        items = list(items)
+        if len(items) < 2 or self.jobs == 1:
+            return list(map(fn, items))
+
+        tp = multiprocessing.pool.ThreadPool(self.jobs)
+        try:
+            return tp.map(fn, items)
+        finally:
+            tp.close()
+
+    def merge_all(self, specs):
+        """Merge several specs into the view.
+
+        The prefixes of all specs are walked concurrently, then the
+        directory structure is created and the files of each spec are
+        linked concurrently. If the view ignores conflicts, a file provided
+        by more than one spec is linked from the first of them only.
+        """
+        plans = [self._merge_plan(s) for s in specs]
+        self._map(_MergePlan.walk, plans)
+
+        conflicts = []
+        seen = set()
+        for plan in plans:
+            conflicts.extend(plan.conflicts)
+            if not self.ignore_conflicts:
+                conflicts.extend(plan.spec.package.view_file_conflicts(
+                    self, plan.merge_map))
+                conflicts.extend(
+                    dst for dst in plan.merge_map.values() if dst in seen)
+            else:
+                plan.merge_map = dict(
+                    (src, dst) for src, dst in plan.merge_map.items()
+                    if dst not in seen)
+            seen.update(plan.merge_map.values())
 
         if conflicts:
             raise MergeConflictError(conflicts[0])
 
-        # merge directories with the tree
-        tree.merge_directories(view_dst, ignore_file)
+        # directories are shared between packages, create them serially
+        for plan in plans:
+            for src, dst in plan.dirs:
+                merge_directory(dst)
 
-        pkg.add_files_to_view(self, merge_map)
+        def add_files(args):
+            pkg, merge_map = args
+            pkg.add_files_to_view(self, merge_map)
+        self._map(add_files, [(p.spec.package, p.merge_map) for p in plans])
 
-    def unmerge(self, spec, ignore=None):
-        pkg = spec.package
-        view_source = pkg.view_source()
-        view_dst = pkg.view_destination(self)
+        for plan in plans:
+            self.write_manifest(plan)
 
-        tree = LinkTree(view_source)
+    def merge(self, spec, ignore=None):
+        plan = self._merge_plan(spec, ignore).walk()
 
-        ignore = ignore or (lambda f: False)
-        ignore_file = match_predicate(
-            self.layout.hidden_file_paths, ignore)
+        conflicts = plan.conflicts
+        if not self.ignore_conflicts:
+            conflicts.extend(
+                spec.package.view_file_conflicts(self, plan.merge_map))
+
+        if conflicts:
+            raise MergeConflictError(conflicts[0])
+
+        # merge directories with the tree
+        for src, dst in plan.dirs:
+            merge_directory(dst)
 
-        merge_map = tree.get_file_map(view_dst, ignore_file)
-        pkg.remove_files_from_view(self, merge_map)
+        spec.package.add_files_to_view(self, plan.merge_map)
 
-        # now unmerge the directory tree
-        tree.unmerge_directories(view_dst, ignore_file)
+        self.write_manifest(plan)
+
+    def unmerge(self, spec, ignore=None):
+        plan = self.read_manifest(spec)
+        if plan is None:
+            # No manifest (e.g. the spec was linked by an older Spack):
+            # walk the prefix to find what has to be removed.
+            plan = self._merge_plan(spec, ignore).walk()
+
+        spec.package.remove_files_from_view(self, plan.merge_map)
+
+        # now unmerge the directory tree, children before their parents
+        for src, dst in reversed(plan.dirs):
+            unmerge_directory(dst)
+
+        self.remove_manifest(spec)
+
+    def get_manifest_path(self, spec):
+        """Path of the file recording what ``spec`` linked in this view."""
+        return os.path.join(self._root, _manifests_path,
+                            '%s-%s.json' % (spec.name, spec.dag_hash()))
+
+    def write_manifest(self, plan):
+        """Record the directories and files merged for a spec, so that it
+        can be removed without walking its prefix again."""
+        path = self.get_manifest_path(plan.spec)
+        mkdirp(os.path.dirname(path))
+        with open(path, 'w') as f:
+            sjson.dump(plan.to_dict(), f)
+
+    def read_manifest(self, spec):
+        """Return the merge plan recorded for ``spec``, or None if there is
+        no manifest for it in this view."""
+        try:
+            with open(self.get_manifest_path(spec)) as f:
+                data = sjson.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        return _MergePlan.from_dict(spec, data)
+
+    def remove_manifest(self, spec):
+        path = self.get_manifest_path(spec)
+        if os.path.exists(path):
+            os.remove(path)
 
     def remove_file(self, src, dest):
         if not os.path.lexists(dest):
@@ -358,8 +467,12 @@ def remove_file(self, src, dest):
             raise ValueError("%s is not a link tree!" % dest)
         # remove if dest is a hardlink/symlink to src; this will only
         # be false if two packages are merged into a prefix and have a
-        # conflicting file
-        if filecmp.cmp(src, dest, shallow=True):
+        # conflicting file. If src is gone the link is only removed when it
+        # is dangling, as it cannot point to another package's file.
+        if not os.path.exists(src):
+            if not os.path.exists(dest):
+                os.remove(dest)
+        elif filecmp.cmp(src, dest, shallow=True):
             os.remove(dest)
 
     def check_added(self, spec):
@@ -623,6 +736,55 @@ def _check_no_ext_conflicts(self, spec):
                      'Skipping already activated package: %s' % spec.name)
 
 
+class _MergePlan(object):
+    """Directories and files that linking a spec into a view creates.
+
+    Plans are computed by walking the spec's view source once. They are
+    stored in the view as per-spec manifests, with paths relative to the
+    source and destination roots.
+    """
+    def __init__(self, spec, source, destination, ignore=None):
+        self.spec = spec
+        self.source = source
+        self.destination = destination
+        self.ignore = ignore
+        self.dirs = []
+        self.merge_map = {}
+        self.conflicts = []
+
+    def walk(self):
+        tree = LinkTree(self.source)
+        self.dirs, self.merge_map = tree.get_merge_maps(
+            self.destination, self.ignore)
+        self.conflicts = tree.find_merge_map_conflicts(
+            self.dirs, self.merge_map)
+        return self
+
+    def _relative(self, path):
+        rel = os.path.relpath(path, self.source)
+        return '' if rel == os.curdir else rel
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'destination': self.destination,
+            'directories': [self._relative(src) for src, _ in self.dirs],
+            'files': sorted(self._relative(src) for src in self.merge_map),
+        }
+
+    @staticmethod
+    def from_dict(spec, data):
+        source, destination = data['source'], data['destination']
+        plan = _MergePlan(spec, source, destination)
+        plan.dirs = [
+            (os.path.join(source, rel), os.path.join(destination, rel))
+            for rel in data['directories']]
+        plan.merge_map = dict(
+            (os.path.join(source, rel), os.path.join(destination, rel))
+            for rel in data['files'])
+        return plan
+
+
 #####################
 # utility functions #
 #####################
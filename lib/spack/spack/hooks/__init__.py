@@ -14,19 +14,38 @@
 
       * pre_install(spec)
       * post_install(spec)
+      * post_install_file(spec, path, header)
       * pre_uninstall(spec)
       * post_uninstall(spec)
 
    This can be used to implement support for things like module
    systems (e.g. modules, lmod, etc.) or to add other custom
    features.
+
+   ``post_install_file`` hooks are called for the prefix of a newly
+   installed spec and for every file and directory below it that is
+   not a symbolic link. ``header`` holds the first ``file_header_size``
+   bytes of regular files, and is ``None`` for anything else. All these
+   hooks are fed from a single walk of the prefix, which runs over
+   subtrees in parallel, so they must be safe to call concurrently on
+   different paths. They run before the ``post_install`` hooks.
 """
+import os
 import os.path
+import stat
+from multiprocessing.pool import ThreadPool
+
+import llnl.util.tty as tty
 
+import spack.config
+import spack.profiling
 import spack.paths
 import spack.util.imp as simp
 from llnl.util.lang import memoized, list_modules
 
+#: Number of bytes read from each file for ``post_install_file`` hooks
+file_header_size = 4096
+
 
 @memoized
 def all_hook_modules():
@@ -56,11 +75,89 @@ def __call__(self, *args, **kwargs):
             if hasattr(module, self.hook_name):
                 hook = getattr(module, self.hook_name)
                 if hasattr(hook, '__call__'):
-                    hook(*args, **kwargs)
+                    with spack.profiling.span('hooks', '%s %s' % (
+                            self.hook_name, module.__name__.split('.')[-1])):
+                        hook(*args, **kwargs)
+
+
+def _visit(spec, path, hooks):
+    """Calls file hooks on ``path``, and returns whether it is a directory
+    to descend into."""
+    mode = os.lstat(path).st_mode
+    if stat.S_ISLNK(mode):
+        return False
+
+    header = None
+    if stat.S_ISREG(mode):
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(file_header_size)
+        except (IOError, OSError) as e:
+            tty.debug('Cannot read {0}: {1}'.format(path, str(e)))
+
+    for hook in hooks:
+        hook(spec, path, header)
+    return stat.S_ISDIR(mode)
+
+
+def _scan_subtree(spec, top, hooks):
+    if not _visit(spec, top, hooks):
+        return
+
+    # Directories are visited before their contents, as with os.walk
+    for root, dirs, files in os.walk(top):
+        for name in sorted(dirs + files):
+            _visit(spec, os.path.join(root, name), hooks)
+
+
+def scan_prefix(spec, hook_name='post_install_file'):
+    """Feeds all the hooks named ``hook_name`` from one walk of the
+    prefix of ``spec``, running over its top-level entries in parallel.
+    """
+    hooks = []
+    for module in all_hook_modules():
+        hook = getattr(module, hook_name, None)
+        if hasattr(hook, '__call__'):
+            hooks.append(hook)
+
+    if spec.external:
+        tty.debug('SKIP: scanning prefix [external package]')
+        return
+
+    prefix = spec.prefix
+    if not hooks or not os.path.isdir(prefix):
+        return
+
+    for hook in hooks:
+        hook(spec, prefix, None)
+
+    tops = [os.path.join(prefix, name) for name in sorted(os.listdir(prefix))]
+    jobs = min(len(tops), spack.config.get('config:build_jobs', 16))
+    if jobs <= 1:
+        for top in tops:
+            _scan_subtree(spec, top, hooks)
+        return
+
+    pool = ThreadPool(jobs)
+    try:
+        pool.map(lambda top: _scan_subtree(spec, top, hooks), tops)
+    finally:
+        pool.close()
+        pool.join()
+
+
+class PostInstallRunner(HookRunner):
+    """Runs ``post_install_file`` hooks over the prefix of a spec, then
+    its ``post_install`` hooks."""
+
+    def __call__(self, spec):
+        with spack.profiling.span('hooks', 'post_install_file'):
+            scan_prefix(spec)
+        super(PostInstallRunner, self).__call__(spec)
 
 
 pre_install = HookRunner('pre_install')
-post_install = HookRunner('post_install')
+post_install = PostInstallRunner('post_install')
 
 pre_uninstall = HookRunner('pre_uninstall')
 post_uninstall = HookRunner('post_uninstall')
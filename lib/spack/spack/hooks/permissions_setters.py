@@ -3,19 +3,21 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
-import os
 import spack.util.file_permissions as fp
 
 
-def post_install(spec):
-    if not spec.external:
-        fp.set_permissions_by_spec(spec.prefix, spec)
+#: Permissions of the specs whose prefixes are being scanned, so that
+#: configuration is not queried again for every file
+_permissions = {}
+
+
+def post_install_file(spec, path, header):
+    key = spec.dag_hash()
+    if key not in _permissions:
+        _permissions[key] = fp.permissions_by_spec(spec)
+    fp.set_permissions_by_spec(path, spec, _permissions[key])
 
-        # os.walk explicitly set not to follow links
-        for root, dirs, files in os.walk(spec.prefix, followlinks=False):
-            for d in dirs:
-                if not os.path.islink(os.path.join(root, d)):
-                    fp.set_permissions_by_spec(os.path.join(root, d), spec)
-            for f in files:
-                if not os.path.islink(os.path.join(root, f)):
-                    fp.set_permissions_by_spec(os.path.join(root, f), spec)
+
+def post_install(spec):
+    # Runs after all the file hooks for this spec
+    _permissions.pop(spec.dag_hash(), None)
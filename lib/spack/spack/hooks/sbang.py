@@ -4,9 +4,11 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import os
-import stat
 import re
-import sys
+import shutil
+import stat
+import tempfile
+from contextlib import closing
 
 import llnl.util.tty as tty
 
@@ -18,46 +20,52 @@
 shebang_limit = 127
 
 
+def has_long_shebang(header):
+    """Detects whether the first bytes of a file start a shebang line that
+    is too long. ``header`` must hold more than ``shebang_limit`` bytes
+    unless it is the whole file."""
+    if not header.startswith(b'#!'):
+        return False
+
+    end = header.find(b'\n')
+    length = len(header) if end < 0 else end + 1
+    return length > shebang_limit
+
+
 def shebang_too_long(path):
     """Detects whether a file has a shebang line that is too long."""
     if not os.path.isfile(path):
         return False
 
     with open(path, 'rb') as script:
-        bytes = script.read(2)
-        if bytes != b'#!':
-            return False
-
-        line = bytes + script.readline()
-        return len(line) > shebang_limit
+        return has_long_shebang(script.read(shebang_limit + 1))
 
 
 def filter_shebang(path):
     """Adds a second shebang line, using sbang, at the beginning of a file."""
-    with open(path, 'rb') as original_file:
-        original = original_file.read()
-        if sys.version_info >= (2, 7):
-            original = original.decode(encoding='UTF-8')
-        else:
-            original = original.decode('UTF-8')
-
     # This line will be prepended to file
-    new_sbang_line = '#!/bin/bash %s/bin/sbang\n' % spack.paths.prefix
+    new_sbang_line = ('#!/bin/bash %s/bin/sbang\n' %
+                      spack.paths.prefix).encode('UTF-8')
 
-    # Skip files that are already using sbang.
-    if original.startswith(new_sbang_line):
-        return
+    # Only the first line is inspected and changed, the rest of the file
+    # is copied as is, without decoding it or holding it in memory.
+    with open(path, 'rb') as original_file:
+        first_line = original_file.readline()
+
+        # Skip files that are already using sbang.
+        if first_line == new_sbang_line:
+            return
 
-    # In the following, newlines have to be excluded in the regular expression
-    # else any mention of "lua" in the document will lead to spurious matches.
+        # Use --! instead of #! on second line for lua.
+        if re.match(br'#!(/[^/\n]*)*lua\b', first_line):
+            first_line = b'--' + first_line[1:]
 
-    # Use --! instead of #! on second line for lua.
-    if re.search(r'^#!(/[^/\n]*)*lua\b', original):
-        original = re.sub(r'^#', '--', original)
+        # Use //! instead of #! on second line for node.js.
+        if re.match(br'#!(/[^/\n]*)*node\b', first_line):
+            first_line = b'//' + first_line[1:]
 
-    # Use //! instead of #! on second line for node.js.
-    if re.search(r'^#!(/[^/\n]*)*node\b', original):
-        original = re.sub(r'^#', '//', original)
+        rest = tempfile.TemporaryFile()
+        shutil.copyfileobj(original_file, rest)
 
     # Change non-writable files to be writable if needed.
     saved_mode = None
@@ -66,13 +74,12 @@ def filter_shebang(path):
         saved_mode = st.st_mode
         os.chmod(path, saved_mode | stat.S_IWRITE)
 
-    with open(path, 'wb') as new_file:
-        if sys.version_info >= (2, 7):
-            new_file.write(new_sbang_line.encode(encoding='UTF-8'))
-            new_file.write(original.encode(encoding='UTF-8'))
-        else:
-            new_file.write(new_sbang_line.encode('UTF-8'))
-            new_file.write(original.encode('UTF-8'))
+    with closing(rest):
+        rest.seek(0)
+        with open(path, 'wb') as new_file:
+            new_file.write(new_sbang_line)
+            new_file.write(first_line)
+            shutil.copyfileobj(rest, new_file)
 
     # Restore original permissions.
     if saved_mode is not None:
@@ -102,14 +109,10 @@ def filter_shebangs_in_directory(directory, filenames=None):
             filter_shebang(path)
 
 
-def post_install(spec):
+def post_install_file(spec, path, header):
     """This hook edits scripts so that they call /bin/bash
     $spack_prefix/bin/sbang instead of something longer than the
     shebang limit.
     """
-    if spec.external:
-        tty.debug('SKIP: shebang filtering [external package]')
-        return
-
-    for directory, _, filenames in os.walk(spec.prefix):
-        filter_shebangs_in_directory(directory, filenames)
+    if header is not None and has_long_shebang(header):
+        filter_shebang(path)
@@ -39,12 +39,12 @@
 import llnl.util.filesystem as fs
 import llnl.util.lock as lk
 import llnl.util.tty as tty
-import spack.binary_distribution as binary_distribution
 import spack.compilers
 import spack.error
 import spack.hooks
 import spack.package
 import spack.package_prefs as prefs
+import spack.profiling
 import spack.repo
 import spack.store
 
@@ -317,6 +317,7 @@ def _process_binary_cache_tarball(pkg, binary_spec, explicit, unsigned):
         (bool) ``True`` if the package was installed from binary cache,
             else ``False``
     """
+    import spack.binary_distribution as binary_distribution
     tarball = binary_distribution.download_tarball(binary_spec)
     # see #10063 : install from source if tarball doesn't exist
     if tarball is None:
@@ -343,6 +344,7 @@ def _try_install_from_binary_cache(pkg, explicit, unsigned=False):
         unsigned (bool): ``True`` if binary package signatures to be checked,
             otherwise, ``False``
     """
+    import spack.binary_distribution as binary_distribution
     pkg_id = package_id(pkg)
     tty.debug('Searching for binary cache of {0}'.format(pkg_id))
     specs = binary_distribution.get_spec(pkg.spec, force=False)
@@ -546,6 +548,8 @@ def package_id(pkg):
 
 install_args_docstring = """
             cache_only (bool): Fail if binary package unavailable.
+            defer_tests (bool): Run the tests of packages in a separate stage
+                after their build, concurrently with the builds that follow.
             dirty (bool): Don't clean the build environment before installing.
             explicit (bool): True if package was explicitly installed, False
                 if package was implicitly installed (as a dependency).
@@ -629,6 +633,12 @@ def __init__(self, pkg):
         # Locks on specs being built, keyed on the package's unique id
         self.locks = {}
 
+        # Deferred test stages still running, keyed on the package's id
+        self.test_runs = {}
+
+        # Unique ids of the packages whose deferred tests failed
+        self.test_failures = []
+
     def __repr__(self):
         """Returns a formal representation of the package installer."""
         rep = '{0}('.format(self.__class__.__name__)
@@ -1013,6 +1023,7 @@ def _install_task(self, task, **kwargs):
             task (BuildTask): the installation build task for a package"""
 
         cache_only = kwargs.get('cache_only', False)
+        defer_tests = kwargs.get('defer_tests', False)
         dirty = kwargs.get('dirty', False)
         fake = kwargs.get('fake', False)
         install_source = kwargs.get('install_source', False)
@@ -1038,6 +1049,7 @@ def _install_task(self, task, **kwargs):
             return
 
         pkg.run_tests = (tests is True or tests and pkg.name in tests)
+        pkg.defer_tests = bool(pkg.run_tests and defer_tests and not fake)
 
         pre = '{0}: {1}:'.format(self.pid, pkg.name)
 
@@ -1066,7 +1078,8 @@ def build_process():
             if spack.package.PackageBase._verbose is not None:
                 echo = spack.package.PackageBase._verbose
 
-            pkg.stage.keep = keep_stage
+            # deferred tests run in the stage after the build
+            pkg.stage.keep = keep_stage or pkg.defer_tests
 
             # parent process already has a prefix write lock
             with pkg.stage:
@@ -1120,7 +1133,9 @@ def build_process():
 
                                 # Redirect stdout and stderr to daemon pipe
                                 phase = getattr(pkg, phase_attr)
-                                phase(pkg.spec, pkg.prefix)
+                                with spack.profiling.span('build', '%s %s' % (
+                                        pkg.name, phase_name)):
+                                    phase(pkg.spec, pkg.prefix)
 
                     echo = logger.echo
                     log(pkg)
@@ -1165,6 +1180,9 @@ def build_process():
                 spack.compilers.add_compilers_to_config(
                     spack.compilers.find_compilers([pkg.spec.prefix]))
 
+            if pkg.defer_tests:
+                self._start_tests(pkg, dirty, keep_stage)
+
         except StopIteration as e:
             # A StopIteration exception means that do_install was asked to
             # stop early from clients.
@@ -1174,6 +1192,72 @@ def build_process():
 
     _install_task.__doc__ += install_args_docstring
 
+    def _start_tests(self, pkg, dirty, keep_stage):
+        """
+        Start the deferred tests of a package that was just installed, in a
+        child process with the build environment of the package.
+
+        Args:
+            pkg (PackageBase): the package that was installed and built
+            dirty (bool): Don't clean the build environment for the tests
+            keep_stage (bool): Keep the stage once the tests are done
+        """
+        def test_process():
+            try:
+                with fs.working_dir(pkg.stage.source_path):
+                    with log_output(pkg.test_log_path, False, True):
+                        pkg.run_deferred_tests()
+            finally:
+                if os.path.exists(pkg.test_log_path):
+                    fs.install(pkg.test_log_path, pkg.install_test_log_path)
+
+        pkg_id = package_id(pkg)
+        tty.msg('{0}: {1}: Testing {2} in the background'
+                .format(self.pid, pkg.name, pkg_id))
+        run = spack.build_environment.start_fork(
+            pkg, test_process, dirty=dirty, fake=False, forward_stdin=False)
+        self.test_runs[pkg_id] = (pkg, run, keep_stage)
+
+    def _finish_tests(self, pkg, run, keep_stage):
+        """
+        Wait for the deferred tests of a package, and clean up its stage.
+
+        Args:
+            pkg (PackageBase): the package being tested
+            run (ForkedProcess): the child process running the tests
+            keep_stage (bool): Keep the stage once the tests are done
+
+        Raises:
+            ChildError: if the tests failed
+        """
+        try:
+            run.result()
+            tty.msg('{0}: {1}: Tests of {2} passed [{3}]'
+                    .format(self.pid, pkg.name, package_id(pkg),
+                            _hms(time.time() - run.start_time)))
+        finally:
+            if not keep_stage:
+                pkg.stage.destroy()
+
+    def _collect_tests(self, wait=False):
+        """
+        Collect the deferred tests that are done, and record failures.
+
+        Args:
+            wait (bool): Wait for all the tests that are still running
+        """
+        for pkg_id, (pkg, run, keep_stage) in list(self.test_runs.items()):
+            if not (wait or run.done()):
+                continue
+
+            del self.test_runs[pkg_id]
+            try:
+                self._finish_tests(pkg, run, keep_stage)
+            except (Exception, KeyboardInterrupt, SystemExit) as exc:
+                tty.error('Tests of {0} failed, see {1}: {2}'.format(
+                    pkg_id, pkg.install_test_log_path, str(exc)))
+                self.test_failures.append(pkg_id)
+
     def _next_is_pri0(self):
         """
         Determine if the next build task has priority 0
@@ -1380,9 +1464,6 @@ def install(self, **kwargs):
         Args:"""
 
         install_deps = kwargs.get('install_deps', True)
-        keep_prefix = kwargs.get('keep_prefix', False)
-        keep_stage = kwargs.get('keep_stage', False)
-        restage = kwargs.get('restage', False)
 
         # install_package defaults True and is popped so that dependencies are
         # always installed regardless of whether the root was installed
@@ -1401,8 +1482,37 @@ def install(self, **kwargs):
         # Initialize the build task queue
         self._init_queue(install_deps, install_package)
 
-        # Proceed with the installation
+        # Proceed with the installation, waiting for deferred tests before
+        # read locks are released
+        try:
+            self._install_tasks(**kwargs)
+        finally:
+            self._collect_tests(wait=True)
+
+        # Cleanup, which includes releasing all of the read locks
+        self._cleanup_all_tasks()
+
+        # Ensure we properly report if the original/explicit pkg is failed
+        if self.pkg_id in self.failed:
+            msg = ('Installation of {0} failed.  Review log for details'
+                   .format(self.pkg_id))
+            raise InstallError(msg)
+
+        if self.test_failures:
+            raise InstallError('Tests failed for {0}.  Review test logs for '
+                               'details'.format(', '.join(self.test_failures)))
+
+    install.__doc__ += install_args_docstring
+
+    def _install_tasks(self, **kwargs):
+        """Process the build task queue until it is empty."""
+        keep_prefix = kwargs.get('keep_prefix', False)
+        keep_stage = kwargs.get('keep_stage', False)
+        restage = kwargs.get('restage', False)
+
         while self.build_pq:
+            self._collect_tests()
+
             task = self._pop_task()
             if task is None:
                 continue
@@ -1510,7 +1620,8 @@ def install(self, **kwargs):
             # Proceed with the installation since we have an exclusive write
             # lock on the package.
             try:
-                self._install_task(task, **kwargs)
+                with spack.profiling.span('install', pkg.name):
+                    self._install_task(task, **kwargs)
                 self._update_installed(task)
 
                 # If we installed then we should keep the prefix
@@ -1550,17 +1661,6 @@ def install(self, **kwargs):
             # include downgrading the write to a read lock
             self._cleanup_task(pkg)
 
-        # Cleanup, which includes releasing all of the read locks
-        self._cleanup_all_tasks()
-
-        # Ensure we properly report if the original/explicit pkg is failed
-        if self.pkg_id in self.failed:
-            msg = ('Installation of {0} failed.  Review log for details'
-                   .format(self.pkg_id))
-            raise InstallError(msg)
-
-    install.__doc__ += install_args_docstring
-
     # Helper method to "smooth" the transition from the
     # spack.package.PackageBase class
     @property
@@ -12,11 +12,13 @@
 
 import sys
 import re
+import atexit
 import os
 import os.path
 import inspect
 import pstats
 import argparse
+import time
 import traceback
 import warnings
 from six import StringIO
@@ -33,9 +35,11 @@
 import spack.cmd
 import spack.environment as ev
 import spack.paths
+import spack.profiling
 import spack.repo
 import spack.store
 import spack.util.debug
+import spack.util.lock
 import spack.util.path
 import spack.util.executable as exe
 from spack.error import SpackError
@@ -142,27 +146,46 @@ def get_version():
 def index_commands():
     """create an index of commands by section for this help level"""
     index = {}
+    command_index = spack.cmd.command_index()
     for command in spack.cmd.all_commands():
-        cmd_module = spack.cmd.get_module(command)
+        properties = command_index[command]
 
         # make sure command modules have required properties
         for p in required_command_properties:
-            prop = getattr(cmd_module, p, None)
-            if not prop:
+            if not properties.get(p):
                 tty.die("Command doesn't define a property '%s': %s"
                         % (p, command))
 
         # add commands to lists for their level and higher levels
         for level in reversed(levels):
             level_sections = index.setdefault(level, {})
-            commands = level_sections.setdefault(cmd_module.section, [])
+            commands = level_sections.setdefault(properties['section'], [])
             commands.append(command)
-            if level == cmd_module.level:
+            if level == properties['level']:
                 break
 
     return index
 
 
+def command_help_actions():
+    """Argparse actions describing each command in the top-level help.
+
+    These are built from the cached command index, so that printing help
+    does not require importing every command module.
+    """
+    command_index = spack.cmd.command_index()
+    actions = []
+    for command in spack.cmd.all_commands():
+        alias_list = [k for k, v in aliases.items() if v == command]
+        metavar = command
+        if alias_list:
+            metavar += ' (%s)' % ', '.join(alias_list)
+        actions.append(argparse.Action(
+            option_strings=[], dest=command, metavar=metavar,
+            help=command_index[command]['description']))
+    return actions
+
+
 class SpackHelpFormatter(argparse.RawTextHelpFormatter):
     def _format_actions_usage(self, actions, groups):
         """Formatter with more concise usage strings."""
@@ -189,16 +212,13 @@ def format_help_sections(self, level):
         if level not in levels:
             raise ValueError("level must be one of: %s" % levels)
 
-        # lazily add all commands to the parser when needed.
-        add_all_commands(self)
-
         """Print help on subcommands in neatly formatted sections."""
         formatter = self._get_formatter()
 
-        # Create a list of subcommand actions. Argparse internals are nasty!
-        # Note: you can only call _get_subactions() once.  Even nastier!
+        # Describe commands from the command index instead of adding them
+        # all to the parser, which would import every command module.
         if not hasattr(self, 'actions'):
-            self.actions = self._subparsers._actions[-1]._get_subactions()
+            self.actions = command_help_actions()
 
         # make a set of commands not yet added.
         remaining = set(spack.cmd.all_commands())
@@ -236,7 +256,9 @@ def add_subcommand_group(title, commands):
 
         # custom, more concise usage for top level
         help_options = self._optionals._group_actions
-        help_options = help_options + [self._positionals._group_actions[-1]]
+        help_options = help_options + [argparse.Action(
+            option_strings=[], dest='command', metavar='COMMAND',
+            nargs=argparse.PARSER)]
         formatter.add_usage(
             self.usage, help_options, self._mutually_exclusive_groups)
 
@@ -406,6 +428,10 @@ def make_argument_parser(**kwargs):
     parser.add_argument(
         '--lines', default=20, action='store',
         help="lines of profile output or 'all' (default: 20)")
+    parser.add_argument(
+        '--profile-dir', default=None, metavar='DIR',
+        help="profile execution and write raw profiles, sampled stacks and "
+        "phase timings of spack and its build processes to DIR")
     parser.add_argument(
         '-v', '--verbose', action='store_true',
         help="print additional output during builds")
@@ -452,6 +478,10 @@ def setup_main_options(args):
         spack.util.lock.check_lock_safety(spack.paths.prefix)
         spack.config.set('config:locks', False, scope='command_line')
 
+    # save lock statistics on exit, for `spack debug locks`
+    if spack.config.get('config:lock_stats'):
+        atexit.register(spack.util.lock.save_stats)
+
     if args.mock:
         rp = spack.repo.RepoPath(spack.paths.mock_packages_path)
         spack.repo.set_path(rp)
@@ -571,8 +601,6 @@ def _log_command_output(self, out):
 
 
 def _profile_wrapper(command, parser, args, unknown_args):
-    import cProfile
-
     try:
         nlines = int(args.lines)
     except ValueError:
@@ -589,18 +617,20 @@ def _profile_wrapper(command, parser, args, unknown_args):
                 tty.die("Invalid sort field: %s" % stat)
 
     try:
-        # make a profiler and run the code.
-        pr = cProfile.Profile()
-        pr.enable()
-        return _invoke_command(command, parser, args, unknown_args)
+        with spack.profiling.span('command', args.command):
+            return _invoke_command(command, parser, args, unknown_args)
 
     finally:
-        pr.disable()
+        spack.profiling.stop()
+
+        # print out profile stats, including those of build processes.
+        if args.spack_profile or args.sorted_profile:
+            stats = spack.profiling.stats()
+            stats.sort_stats(*sortby)
+            stats.print_stats(nlines)
 
-        # print out profile stats.
-        stats = pstats.Stats(pr)
-        stats.sort_stats(*sortby)
-        stats.print_stats(nlines)
+        if spack.profiling.finish():
+            tty.msg('Profiles written to %s' % args.profile_dir)
 
 
 def print_setup_info(*info):
@@ -678,6 +708,8 @@ def main(argv=None):
         argv (list of str or None): command line arguments, NOT including
             the executable name. If None, parses from sys.argv.
     """
+    start_time = time.time()
+
     # Create a parser with a simple positional argument first.  We'll
     # lazily load the subcommand(s) we need later. This allows us to
     # avoid loading all the modules from spack.cmd when we don't need
@@ -686,6 +718,13 @@ def main(argv=None):
     parser.add_argument('command', nargs=argparse.REMAINDER)
     args, unknown = parser.parse_known_args(argv)
 
+    # Start profiling early enough to cover environments and configuration
+    profile = args.spack_profile or args.sorted_profile or args.profile_dir
+    if profile and args.command:
+        name = re.sub(r'[^\w.-]', '_', 'spack-' + args.command[0])
+        spack.profiling.start(args.profile_dir, name)
+        spack.profiling.add_span('parse', None, start_time, time.time())
+
     # Recover stored LD_LIBRARY_PATH variables from spack shell function
     # This is necessary because MacOS System Integrity Protection clears
     # (DY?)LD_LIBRARY_PATH variables on process start.
@@ -740,17 +779,18 @@ def main(argv=None):
         cmd_name = args.command[0]
         cmd_name = aliases.get(cmd_name, cmd_name)
 
-        command = parser.add_command(cmd_name)
+        with spack.profiling.span('parse', cmd_name):
+            command = parser.add_command(cmd_name)
 
-        # Re-parse with the proper sub-parser added.
-        args, unknown = parser.parse_known_args()
+            # Re-parse with the proper sub-parser added.
+            args, unknown = parser.parse_known_args()
 
         # many operations will fail without a working directory.
         set_working_dir()
 
         # now we can actually execute the command.
-        if args.spack_profile or args.sorted_profile:
-            _profile_wrapper(command, parser, args, unknown)
+        if profile:
+            return _profile_wrapper(command, parser, args, unknown)
         elif args.pdb:
             import pdb
             pdb.runctx('_invoke_command(command, parser, args, unknown)',
@@ -815,9 +815,16 @@ def write(self, overwrite=False):
 
         # Render the template
         text = template.render(context)
-        # Write it to file
-        with open(self.layout.filename, 'w') as f:
-            f.write(text)
+
+        # Skip writing if the module file on disk is already up to date
+        if _module_file_unchanged(
+                self.layout.filename, text, str(context['timestamp'])):
+            msg = '\tUNCHANGED: {0} [{1}]'
+            tty.debug(msg.format(self.spec.cshort_spec, self.layout.filename))
+        else:
+            # Write it to file
+            with open(self.layout.filename, 'w') as f:
+                f.write(text)
 
         # Set the file permissions of the module to match that of the package
         if os.path.exists(self.layout.filename):
@@ -837,6 +844,32 @@ def remove(self):
                 pass
 
 
+def _module_file_unchanged(filename, text, timestamp):
+    """Returns True if the module file at ``filename`` has already the
+    content in ``text``.
+
+    Lines that contain the timestamp of the new module file are not
+    compared, as they differ at every refresh.
+
+    Args:
+        filename (str): path of the module file
+        text (str): new content of the module file
+        timestamp (str): timestamp rendered in the new module file
+    """
+    if not os.path.exists(filename):
+        return False
+
+    with open(filename, 'r') as f:
+        old_text = f.read()
+
+    old_lines, new_lines = old_text.splitlines(), text.splitlines()
+    if len(old_lines) != len(new_lines):
+        return False
+
+    return all(old == new or timestamp in new
+               for old, new in zip(old_lines, new_lines))
+
+
 class ModulesError(spack.error.SpackError):
     """Base error for modules."""
 
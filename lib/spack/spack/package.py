@@ -22,6 +22,7 @@
 import sys
 import textwrap
 import time
+from multiprocessing.pool import ThreadPool
 from six import StringIO
 from six import string_types
 from six import with_metaclass
@@ -43,6 +44,7 @@
 import spack.mixins
 import spack.multimethod
 import spack.repo
+import spack.stage
 import spack.url
 import spack.util.environment
 import spack.util.web
@@ -71,6 +73,9 @@
 # Filename for the Spack configure args file.
 _spack_configure_argsfile = 'spack-configure-args.txt'
 
+# Filename for the output of tests run after the build.
+_spack_test_logfile = 'spack-test-out.txt'
+
 
 class InstallPhase(object):
     """Manages a single phase of the installation.
@@ -109,6 +114,10 @@ def phase_wrapper(spec, prefix):
             # Execute phase sanity_checks,
             # and give them the chance to fail
             for callback in self.run_after:
+                # Tests may be left for a separate stage after the build
+                if getattr(instance, 'defer_tests', False) and \
+                        _is_test_callback(callback):
+                    continue
                 callback(instance)
             # Check instance attributes at the end of a phase
             self._on_phase_exit(instance)
@@ -293,11 +302,20 @@ def _wrapper(instance, *args, **kwargs):
                 )
                 if has_the_right_values:
                     func(instance, *args, **kwargs)
+
+        # Remember the conditions, e.g. to tell test callbacks apart
+        _wrapper.package_attributes = attr_dict
         return _wrapper
 
     return _execute_under_condition
 
 
+def _is_test_callback(callback):
+    """Whether a phase callback only runs when the package runs tests."""
+    conditions = getattr(callback, 'package_attributes', {})
+    return conditions.get('run_tests') is True
+
+
 class PackageViewMixin(object):
     """This collects all functionality related to adding installed Spack
     package to views. Packages can customize how they are added to views by
@@ -449,6 +467,11 @@ class PackageBase(with_metaclass(PackageMeta, PackageViewMixin, object)):
     #: By default do not run tests within package's install()
     run_tests = False
 
+    #: If ``True``, test callbacks are skipped during the build phases and
+    #: left for ``run_deferred_tests``, which runs them once the package is
+    #: installed, in a process of their own.
+    defer_tests = False
+
     # FIXME: this is a bad object-oriented design, should be moved to Clang.
     #: By default do not setup mockup XCode on macOS with Clang
     use_xcode = False
@@ -906,6 +929,17 @@ def install_log_path(self):
         # Otherwise, return the current install log path name.
         return os.path.join(install_path, _spack_build_logfile)
 
+    @property
+    def test_log_path(self):
+        """Return the log file path of deferred tests in the stage."""
+        return os.path.join(self.stage.path, _spack_test_logfile)
+
+    @property
+    def install_test_log_path(self):
+        """Return the log file path of deferred tests on installation."""
+        install_path = spack.store.layout.metadata_path(self.spec)
+        return os.path.join(install_path, _spack_test_logfile)
+
     @property
     def configure_args_path(self):
         """Return the configure args file path associated with staging."""
@@ -1178,6 +1212,12 @@ def do_patch(self):
         if not self.spec.concrete:
             raise ValueError("Can only patch concrete packages.")
 
+        # The patched source may be in the source pool (see below), in
+        # which case the stage copies it from there.
+        patched_key = self._patched_source_key()
+        if patched_key:
+            self.stage[0].patched_key = patched_key
+
         # Kick off the stage first.  This creates the stage.
         self.do_stage()
 
@@ -1198,6 +1238,7 @@ def do_patch(self):
         good_file = os.path.join(archive_dir, '.spack_patched')
         no_patches_file = os.path.join(archive_dir, '.spack_no_patches')
         bad_file = os.path.join(archive_dir, '.spack_patch_failed')
+        applied_file = os.path.join(archive_dir, '.spack_patches_applied')
 
         # If we encounter an archive that failed to patch, restage it
         # so that we can apply all the patches again.
@@ -1213,21 +1254,34 @@ def do_patch(self):
             tty.msg("No patches needed for %s" % self.name)
             return
 
-        # Apply all the patches for specs that match this one
+        # Apply all the patches for specs that match this one, unless the
+        # source came from the source pool with the patches already applied
         patched = False
-        for patch in patches:
-            try:
-                with working_dir(self.stage.source_path):
-                    patch.apply(self.stage)
-                tty.msg('Applied patch %s' % patch.path_or_url)
-                patched = True
-            except spack.error.SpackError as e:
-                tty.debug(e)
-
-                # Touch bad file if anything goes wrong.
-                tty.msg('Patch %s failed.' % patch.path_or_url)
-                touch(bad_file)
-                raise
+        if patches and os.path.isfile(applied_file):
+            tty.msg('Patches already applied to %s' % self.name)
+            patched = True
+        elif patches:
+            for patch in patches:
+                try:
+                    with working_dir(self.stage.source_path):
+                        patch.apply(self.stage)
+                    tty.msg('Applied patch %s' % patch.path_or_url)
+                    patched = True
+                except spack.error.SpackError as e:
+                    tty.debug(e)
+
+                    # Touch bad file if anything goes wrong.
+                    tty.msg('Patch %s failed.' % patch.path_or_url)
+                    touch(bad_file)
+                    raise
+
+            # Pool the patched source for specs with the same patches. The
+            # patch() function is not part of it, as what it does can depend
+            # on anything in the spec.
+            touch(applied_file)
+            pool = spack.stage.source_pool()
+            if pool and patched_key:
+                pool.store(patched_key, archive_dir)
 
         if has_patch_fun:
             try:
@@ -1264,6 +1318,29 @@ def do_patch(self):
         else:
             touch(no_patches_file)
 
+    def _patched_source_key(self):
+        """Key of the patched source of this package in the source pool.
+
+        The key combines the id of the source (e.g. its archive checksum)
+        with the sha256, level and working directory of each patch, in
+        order. It is None if there are no patches, if the source is not
+        fixed, or if the package has resources (which are added to the
+        source before it is patched).
+        """
+        patches = self.spec.patches
+        stage = self.stage
+        if (not patches or not isinstance(stage, StageComposite) or
+                len(stage) != 1):
+            return None
+
+        source_key = stage[0]._source_key()
+        if not source_key:
+            return None
+
+        return '{0} patched with {1}'.format(source_key, ' '.join(
+            '{0.sha256}:{0.level}:{0.working_dir}'.format(p)
+            for p in patches))
+
     @classmethod
     def all_patches(cls):
         """Retrieve all patches associated with the package.
@@ -1763,6 +1840,86 @@ def uninstall_by_spec(spec, force=False, deprecator=None):
 
         tty.msg("Successfully uninstalled %s" % spec.short_spec)
 
+    @staticmethod
+    def uninstall_by_specs(specs, force=False, jobs=1):
+        """Uninstall many specs, updating the database once per wave.
+
+        Specs are uninstalled in waves, dependents before dependencies,
+        and the prefixes of each wave are deleted by up to ``jobs``
+        threads, without holding the database lock. The records of a
+        wave are then removed in a single write transaction: when a run
+        is interrupted, the records of the waves already done are gone,
+        and running it again only removes the stale records of the
+        prefixes deleted in the interrupted wave.
+
+        Args:
+            specs (list): concrete specs to uninstall
+            force (bool): uninstall specs still needed by installed
+                specs that are not uninstalled
+            jobs (int): number of prefixes deleted concurrently
+        """
+        db = spack.store.db
+        waves, dependents = _uninstall_waves(specs, force)
+
+        # Specs that could not be deleted, and the dependencies they need
+        kept = set()
+        for wave in waves:
+            if not force:
+                needed = set(s.dag_hash() for s in wave
+                             if dependents[s.dag_hash()] & kept)
+                kept.update(needed)
+                wave = [s for s in wave if s.dag_hash() not in needed]
+
+            # prefix may not exist, but DB may be inconsistent. Remove
+            # the stale records, but omit hooks.
+            stale = [s for s in wave if not os.path.isdir(s.prefix)]
+            wave = [s for s in wave if os.path.isdir(s.prefix)]
+
+            locks = []
+            removed = []
+            try:
+                for spec in wave:
+                    locks.append(db.prefix_lock(spec))
+                    locks[-1].acquire_write()
+
+                pkgs = []
+                for spec in wave:
+                    try:
+                        pkgs.append(spec.package)
+                    except spack.repo.UnknownEntityError:
+                        pkgs.append(None)
+                    if pkgs[-1] is not None:
+                        spack.hooks.pre_uninstall(spec)
+
+                errors = _delete_prefixes(wave, jobs)
+                for spec, pkg in zip(wave, pkgs):
+                    if spec.dag_hash() in errors:
+                        tty.error(str(errors[spec.dag_hash()]))
+                        kept.add(spec.dag_hash())
+                    else:
+                        removed.append((spec, pkg))
+
+                with db.write_transaction():
+                    for spec in stale:
+                        db.remove(spec)
+                        tty.msg("Removed stale DB entry for %s"
+                                % spec.short_spec)
+                    for spec, _ in removed:
+                        tty.debug('Deleting DB entry [{0}]'.format(
+                            spec.short_spec))
+                        db.remove(spec)
+            finally:
+                for lock in locks:
+                    lock.release_write()
+
+            for spec, pkg in removed:
+                if pkg is not None:
+                    spack.hooks.post_uninstall(spec)
+                tty.msg("Successfully uninstalled %s" % spec.short_spec)
+
+        if kept:
+            raise InstallError('Some packages could not be uninstalled')
+
     def do_uninstall(self, force=False):
         """Uninstall this package by spec."""
         # delegate to instance-less method.
@@ -2090,6 +2247,16 @@ def _run_default_install_time_test_callbacks(self):
                 msg = 'RUN-TESTS: method not implemented [{0}]'
                 tty.warn(msg.format(name))
 
+    def run_deferred_tests(self):
+        """Runs the test callbacks that were skipped during the build
+        because of ``defer_tests``, in the order of the phases they follow.
+        """
+        for phase_attr in self._InstallPhase_phases:
+            phase = getattr(type(self), phase_attr)
+            for callback in phase.run_after:
+                if _is_test_callback(callback):
+                    callback(self)
+
 
 inject_flags = PackageBase.inject_flags
 env_flags = PackageBase.env_flags
@@ -2123,6 +2290,88 @@ class Package(PackageBase):
     run_after('install')(PackageBase.sanity_check_prefix)
 
 
+def _uninstall_waves(specs, force):
+    """Order specs to uninstall in waves, each one having the installed
+    dependents of its specs in the previous waves.
+
+    Returns:
+        (tuple): the list of waves, and the DAG hashes of the dependents
+            in ``specs`` of each spec, by DAG hash
+    """
+    by_hash = dict((s.dag_hash(), s) for s in specs)
+
+    dependents = {}
+    for key, spec in by_hash.items():
+        parents = spack.store.db.installed_relatives(spec, 'parents', False)
+        outside = [p for p in parents if p.dag_hash() not in by_hash]
+        if outside and not force:
+            raise PackageStillNeededError(spec, outside)
+        dependents[key] = set(p.dag_hash() for p in parents) - set(
+            p.dag_hash() for p in outside)
+
+    waves = []
+    pending = dict((k, set(v)) for k, v in dependents.items())
+    while pending:
+        ready = sorted(k for k, v in pending.items() if not v)
+        for key in ready:
+            del pending[key]
+        for remaining in pending.values():
+            remaining.difference_update(ready)
+        waves.append([by_hash[k] for k in ready])
+
+    return waves, dependents
+
+
+def _remove_tree(path):
+    try:
+        shutil.rmtree(path)
+    except OSError as e:
+        return e
+
+
+def _delete_prefixes(specs, jobs):
+    """Delete the prefixes of installed specs, removing the install
+    trees with up to ``jobs`` threads.
+
+    Returns:
+        (dict): errors by DAG hash of the specs that were not deleted
+    """
+    specs = [s for s in specs if not s.external]
+    with spack.store.db.read_transaction():
+        deprecated = set(s.dag_hash() for s in specs
+                         if spack.store.db.deprecator(s))
+
+    # Deprecated prefixes are only links, the layout removes them
+    trees = [s.prefix for s in specs if s.dag_hash() not in deprecated]
+    if jobs > 1 and len(trees) > 1:
+        pool = ThreadPool(min(jobs, len(trees)))
+        try:
+            results = pool.map(_remove_tree, trees)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_remove_tree(t) for t in trees]
+    tree_errors = dict((t, e) for t, e in zip(trees, results) if e)
+
+    errors = {}
+    for spec in specs:
+        key = spec.dag_hash()
+        if spec.prefix in tree_errors:
+            errors[key] = spack.directory_layout.RemoveFailedError(
+                spec, spec.prefix, tree_errors[spec.prefix])
+            continue
+
+        # Also removes the empty parent directories, one spec at a time
+        tty.debug('Deleting package prefix [{0}]'.format(spec.short_spec))
+        try:
+            spack.store.layout.remove_install_directory(
+                spec, key in deprecated)
+        except spack.directory_layout.RemoveFailedError as e:
+            errors[key] = e
+    return errors
+
+
 def install_dependency_symlinks(pkg, spec, prefix):
     """
     Execute a dummy install and flatten dependencies.
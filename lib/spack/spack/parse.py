@@ -35,48 +35,56 @@ def __eq__(self, other):
 
 
 class Lexer(object):
-    """Base class for Lexers that keep track of line numbers."""
+    """Base class for Lexers that keep track of line numbers.
+
+    Each lexicon is a list of ``(regex, token type)`` pairs, tried in
+    order. Text matching a pair whose type is ``None`` is skipped. The
+    regexes of a lexicon are combined into a single master regex, so a
+    word is tokenized by a single sweep over it.
+
+    The lexer switches from lexicon 0 to lexicon 1 after producing a token
+    of a type in ``mode_switches_01``, and back after one in
+    ``mode_switches_10``.
+    """
 
     def __init__(self, lexicon0, mode_switches_01=[],
                  lexicon1=[], mode_switches_10=[]):
-        self.scanner0 = re.Scanner(lexicon0)
-        self.mode_switches_01 = mode_switches_01
-        self.scanner1 = re.Scanner(lexicon1)
-        self.mode_switches_10 = mode_switches_10
+        self.lexicons = (
+            self._compile(lexicon0, mode_switches_01),
+            self._compile(lexicon1, mode_switches_10))
         self.mode = 0
 
-    def token(self, type, value=''):
-        if self.mode == 0:
-            return Token(type, value,
-                         self.scanner0.match.start(0),
-                         self.scanner0.match.end(0))
-        else:
-            return Token(type, value,
-                         self.scanner1.match.start(0),
-                         self.scanner1.match.end(0))
+    @staticmethod
+    def _compile(lexicon, mode_switches):
+        """Return the master regex of a lexicon, the token types of its
+        groups, and the token types that switch modes."""
+        alternatives = []
+        types = {}
+        group = 1
+        for regex, type in lexicon:
+            alternatives.append('(%s)' % regex)
+            types[group] = type
+            # skip the groups nested in this regex
+            group += 1 + re.compile(regex).groups
+
+        master = re.compile('|'.join(alternatives))
+        return master, types, frozenset(mode_switches)
 
     def lex_word(self, word):
-        scanner = self.scanner0
-        mode_switches = self.mode_switches_01
-        if self.mode == 1:
-            scanner = self.scanner1
-            mode_switches = self.mode_switches_10
-
-        tokens, remainder = scanner.scan(word)
-        remainder_used = 0
-
-        for i, t in enumerate(tokens):
-            if t.type in mode_switches:
-                # Combine post-switch tokens with remainder and
-                # scan in other mode
-                self.mode = 1 - self.mode  # swap 0/1
-                remainder_used = 1
-                tokens = tokens[:i + 1] + self.lex_word(
-                    word[word.index(t.value) + len(t.value):])
-                break
-
-        if remainder and not remainder_used:
-            raise LexError("Invalid character", word, word.index(remainder))
+        tokens = []
+        pos, end = 0, len(word)
+        while pos < end:
+            master, types, mode_switches = self.lexicons[self.mode]
+            match = master.match(word, pos)
+            if not match or match.end() == pos:
+                raise LexError("Invalid character", word, pos)
+
+            type = types[match.lastindex]
+            if type is not None:
+                tokens.append(Token(type, match.group(), pos, match.end()))
+                if type in mode_switches:
+                    self.mode = 1 - self.mode  # swap 0/1
+            pos = match.end()
 
         return tokens
 
@@ -88,6 +96,24 @@ def lex(self, text):
         return lexed
 
 
+#: Characters that shlex.split() treats specially, besides whitespace
+_shell_quotes = re.compile(r'[\'"\\]')
+
+#: Words of a string, as split by shlex.split() if it has no quotes
+_shell_words = re.compile(r'[^ \t\r\n]+')
+
+
+def split_words(text):
+    """Split a string into words like ``shlex.split()``.
+
+    Most strings have no quotes or escapes to process, and are split
+    with a regex instead of the much slower ``shlex`` tokenizer.
+    """
+    if _shell_quotes.search(text):
+        return shlex.split(text)
+    return _shell_words.findall(text)
+
+
 class Parser(object):
     """Base class for simple recursive descent parsers."""
 
@@ -143,7 +169,7 @@ def expect(self, id):
 
     def setup(self, text):
         if isinstance(text, string_types):
-            text = shlex.split(str(text))
+            text = split_words(str(text))
         self.text = text
         self.push_tokens(self.lexer.lex(text))
 
@@ -0,0 +1,520 @@
+# Copyright 2013-2020 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Benchmarks for the hot paths of Spack's core.
+
+Benchmarks run offline: packages come from the ``builtin.mock``
+repository, configuration from the test data, and installations are
+synthetic trees created in a scratch directory. Nothing is fetched or
+built, so timings only depend on the Spack code being measured and on
+the host running it.
+
+Results are plain JSON, and a results file saved by an earlier run, e.g.
+on another branch, can be used as a baseline for ``compare()``.
+"""
+from __future__ import division
+
+import base64
+import contextlib
+import hashlib
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import llnl.util.cpu
+import llnl.util.tty as tty
+from llnl.util.filesystem import mkdirp, touch
+
+import spack
+import spack.architecture
+import spack.compilers
+import spack.config
+import spack.database
+import spack.directory_layout
+import spack.error
+import spack.filesystem_view
+import spack.modules
+import spack.paths
+import spack.relocate
+import spack.repo
+import spack.spec
+import spack.store
+import spack.util.spack_json as sjson
+
+#: Version of the format of results files
+results_version = 1
+
+#: Benchmark classes by name, in the order they are defined
+benchmarks = {}
+_benchmark_names = []
+
+
+def benchmark(cls):
+    """Class decorator that registers a benchmark."""
+    benchmarks[cls.name] = cls
+    _benchmark_names.append(cls.name)
+    return cls
+
+
+def benchmark_names():
+    """Names of all benchmarks, in the order they are defined."""
+    return list(_benchmark_names)
+
+
+class Benchmark(object):
+    """Base class for benchmarks.
+
+    Subclasses set ``name``, describe what they measure in the first
+    line of their docstring and implement ``run()``, which is the only
+    timed method. ``setup()`` is called once, in a scratch directory,
+    before the first run, and ``reset()`` before each run.
+
+    Problem sizes should go through ``size()``, so that the whole suite
+    can be scaled down, e.g. to exercise it in unit tests.
+    """
+    #: name used on the command line and in results files
+    name = None
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+
+    @classmethod
+    def description(cls):
+        return (cls.__doc__ or '').strip().split('\n')[0]
+
+    def size(self, n):
+        """Problem size ``n`` scaled by the scale of the suite."""
+        return max(1, int(n * self.scale))
+
+    def setup(self, workdir):
+        pass
+
+    def reset(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError('Benchmarks must implement run()')
+
+
+#: Specs concretized by the benchmarks. ``dttop`` has the deepest DAG
+#: of the mock packages, with all dependency types.
+dag_specs = ['dttop', 'mpileaks ^mpich', 'dt-diamond', 'mpileaks ^zmpi']
+
+
+def _concretized_specs():
+    return [spack.spec.Spec(s).concretized() for s in dag_specs]
+
+
+def _unique_nodes(specs):
+    nodes = {}
+    for spec in specs:
+        for node in spec.traverse():
+            nodes.setdefault(node.dag_hash(), node)
+    return nodes
+
+
+def _install_synthetic(specs, files):
+    """Create installation prefixes with ``files`` empty files in each
+    and register them in the database of the current store.
+    """
+    layout = spack.store.layout
+    nodes = _unique_nodes(specs).values()
+    subdirs = ('bin', 'lib', 'include', 'share/man')
+    for node in nodes:
+        layout.create_install_directory(node)
+        for subdir in subdirs:
+            mkdirp(os.path.join(node.prefix, subdir))
+        for i in range(files):
+            touch(os.path.join(
+                node.prefix, subdirs[i % 4], '%s-%d' % (node.name, i)))
+
+    with spack.store.db.write_transaction():
+        for node in nodes:
+            spack.store.db._add(node, layout, explicit=node in specs)
+
+
+@benchmark
+class Concretize(Benchmark):
+    """Concretize specs with deep and diamond-shaped DAGs."""
+    name = 'concretize'
+
+    def run(self):
+        for _ in range(self.size(2)):
+            _concretized_specs()
+
+
+@benchmark
+class SpecFromYaml(Benchmark):
+    """Read concrete specs from their YAML representation."""
+    name = 'spec_from_yaml'
+
+    def setup(self, workdir):
+        self.yaml = [s.to_yaml() for s in _concretized_specs()]
+
+    def run(self):
+        for _ in range(self.size(10)):
+            for text in self.yaml:
+                spack.spec.Spec.from_yaml(text)
+
+
+def _rehash(dag_hash, i):
+    sha = hashlib.sha1(('%s-%d' % (dag_hash, i)).encode('utf-8'))
+    return base64.b32encode(sha.digest()).lower().decode('utf-8')[:32]
+
+
+def write_synthetic_database(root, specs, records):
+    """Write a database index with about ``records`` installations.
+
+    The index holds copies of the nodes of ``specs`` which only differ
+    by their hashes, with dependencies among nodes of the same copy.
+
+    Returns:
+        Database: database for ``root`` (not read yet)
+    """
+    db = spack.database.Database(root)
+    nodes = _unique_nodes(specs)
+    now = time.time()
+
+    installs = {}
+    for i in range(max(1, records // len(nodes))):
+        for dag_hash, node in nodes.items():
+            key = _rehash(dag_hash, i)
+            node_dict = node.to_node_dict()
+            deps = node_dict[node.name].get('dependencies', {})
+            for dep in deps.values():
+                dep['hash'] = _rehash(dep['hash'], i)
+
+            installs[key] = {
+                'spec': node_dict,
+                'path': os.path.join(root, '%s-%s' % (node.name, key)),
+                'installed': True,
+                'ref_count': 0,
+                'explicit': node in specs,
+                'installation_time': now,
+            }
+
+    mkdirp(os.path.dirname(db._index_path))
+    with open(db._index_path, 'w') as f:
+        sjson.dump({'database': {
+            'installs': installs,
+            'version': str(spack.database._db_version)}}, f)
+    return db
+
+
+@benchmark
+class DatabaseRead(Benchmark):
+    """Read a database index with 10k installation records."""
+    name = 'db_read'
+
+    def setup(self, workdir):
+        self.root = os.path.join(workdir, 'db')
+        db = write_synthetic_database(
+            self.root, _concretized_specs(), self.size(10000))
+        self.index = db._index_path
+
+    def run(self):
+        db = spack.database.Database(self.root)
+        db._read_from_file(self.index)
+
+
+@benchmark
+class DatabaseQuery(Benchmark):
+    """Query a database with 10k installation records for abstract specs."""
+    name = 'db_query'
+
+    queries = ['mpileaks', 'callpath ^mpich', 'libelf@0.8.13', 'dtlink3']
+
+    def setup(self, workdir):
+        root = os.path.join(workdir, 'db')
+        self.db = write_synthetic_database(
+            root, _concretized_specs(), self.size(10000))
+        self.db._read_from_file(self.db._index_path)
+        self.queries = [spack.spec.Spec(q) for q in self.queries]
+
+    def run(self):
+        for query in self.queries:
+            self.db._query(query)
+
+
+@benchmark
+class RelocateBinary(Benchmark):
+    """Replace install prefixes in a 64 MiB binary file."""
+    name = 'relocate_binary'
+
+    old_prefix = '/old/install/root/linux-x86_64/gcc-9.3.0/pkg-abcdefgh'
+    new_prefix = '/new/root/linux-x86_64/gcc-9.3.0/pkg-abcdefgh'
+
+    def setup(self, workdir):
+        # Random bytes, with a null-terminated prefix every 64 KiB
+        chunk = 64 * 1024
+        prefix = self.old_prefix.encode('utf-8') + b'/lib\0'
+        self.original = os.path.join(workdir, 'original.bin')
+        self.path = os.path.join(workdir, 'relocated.bin')
+        with open(self.original, 'wb') as f:
+            for _ in range(self.size(1024)):
+                f.write(prefix + os.urandom(chunk - len(prefix)))
+
+    def reset(self):
+        shutil.copyfile(self.original, self.path)
+
+    def run(self):
+        spack.relocate.replace_prefix_bin(
+            self.path, self.old_prefix, self.new_prefix)
+
+
+@benchmark
+class ViewAddSpecs(Benchmark):
+    """Link synthetic installations into a filesystem view."""
+    name = 'view_add_specs'
+
+    # Specs share names, e.g. mpileaks ^mpich and mpileaks ^zmpi
+    projections = {'all': '{name}-{hash:7}'}
+
+    def setup(self, workdir):
+        self.specs = _concretized_specs()
+        _install_synthetic(self.specs, self.size(200))
+        self.root = os.path.join(workdir, 'view')
+
+    def reset(self):
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+
+    def run(self):
+        layout = spack.directory_layout.YamlDirectoryLayout(self.root)
+        view = spack.filesystem_view.YamlFilesystemView(
+            self.root, layout, projections=self.projections)
+        view.add_specs(*self.specs)
+
+
+@benchmark
+class ModuleGeneration(Benchmark):
+    """Write TCL module files for synthetic installations."""
+    name = 'module_generation'
+
+    def setup(self, workdir):
+        specs = _concretized_specs()
+        _install_synthetic(specs, self.size(200))
+        self.specs = list(_unique_nodes(specs).values())
+
+    def run(self):
+        writer_cls = spack.modules.module_types['tcl']
+        for spec in self.specs:
+            writer_cls(spec).write(overwrite=True)
+
+
+@benchmark
+class CliStartup(Benchmark):
+    """Start a spack process that prints its version."""
+    name = 'cli_startup'
+
+    def run(self):
+        proc = subprocess.Popen(
+            [sys.executable, spack.paths.spack_script, '--version'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        proc.communicate()
+
+
+@contextlib.contextmanager
+def mock_environment(workdir):
+    """Use the mock repository, the test configuration and an empty store
+    in ``workdir`` for the duration of the context.
+    """
+    # Test configuration, with compilers for the operating system we run on
+    config_dir = os.path.join(workdir, 'config')
+    shutil.copytree(
+        os.path.join(spack.paths.test_path, 'data', 'config'), config_dir)
+    host_os = spack.architecture.platform().operating_system('default_os')
+    compilers_yaml = os.path.join(config_dir, 'compilers.yaml')
+    with open(compilers_yaml) as f:
+        content = f.read().format(host_os)
+    with open(compilers_yaml, 'w') as f:
+        f.write(content)
+
+    # The mock compilers cannot optimize for recent microarchitectures, so
+    # target the generic family of the host to keep concretization quiet
+    store_root = os.path.join(workdir, 'opt')
+    overrides = {
+        'config': {
+            'install_tree': store_root,
+            'module_roots': {'tcl': os.path.join(workdir, 'modules')},
+            'build_stage': [os.path.join(workdir, 'stage')],
+            'checksum': False,
+        },
+        'packages': {
+            'all': {'target': [llnl.util.cpu.host().family.name]},
+        },
+    }
+    config = spack.config.Configuration(
+        spack.config.InternalConfigScope(
+            '_builtin', spack.config.config_defaults),
+        spack.config.ConfigScope('site', config_dir),
+        spack.config.InternalConfigScope('perf', overrides))
+
+    saved_config = spack.config.config
+    saved_compilers = spack.compilers._cache_config_file
+    saved_store = spack.store.store
+    spack.config.config = config
+    spack.compilers._cache_config_file = []
+    try:
+        spack.store.store = spack.store.Store(store_root)
+        mock_repo = spack.repo.RepoPath(spack.paths.mock_packages_path)
+        with spack.repo.swap(mock_repo):
+            yield
+    finally:
+        spack.config.config = saved_config
+        spack.compilers._cache_config_file = saved_compilers
+        spack.store.store = saved_store
+
+
+def _statistics(times):
+    mean = sum(times) / len(times)
+    ordered = sorted(times)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+    variance = sum((t - mean) ** 2 for t in times) / len(times)
+    return {
+        'times': times,
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': mean,
+        'median': median,
+        'stdev': math.sqrt(variance),
+    }
+
+
+def run_benchmark(cls, workdir, repeat=5, scale=1.0):
+    """Time ``repeat`` runs of a benchmark, after an untimed warm-up run.
+
+    Returns:
+        dict: times of the runs and their statistics
+    """
+    bench = cls(scale)
+    bench.setup(workdir)
+
+    times = []
+    for i in range(repeat + 1):
+        bench.reset()
+        start = timeit.default_timer()
+        bench.run()
+        elapsed = timeit.default_timer() - start
+        if i > 0:
+            times.append(elapsed)
+
+    result = _statistics(times)
+    result['description'] = cls.description()
+    return result
+
+
+def run_benchmarks(names=None, repeat=5, scale=1.0, callback=None):
+    """Run benchmarks in the mock environment.
+
+    Each benchmark gets its own scratch directory and store.
+
+    Args:
+        names (list): names of the benchmarks to run (default: all)
+        repeat (int): number of timed runs of each benchmark
+        scale (float): factor applied to the problem sizes
+        callback (callable): called with the name and the result of each
+            benchmark as soon as it is done
+
+    Returns:
+        dict: results, in the format written to results files
+    """
+    import spack.main  # avoid circular import at module level
+
+    names = names or benchmark_names()
+    unknown = [n for n in names if n not in benchmarks]
+    if unknown:
+        raise UnknownBenchmarkError(unknown)
+
+    results = {
+        'version': results_version,
+        'spack': spack.main.get_version(),
+        'python': platform.python_version(),
+        'platform': str(spack.architecture.sys_type()),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'scale': scale,
+        'benchmarks': {},
+    }
+
+    for name in names:
+        workdir = tempfile.mkdtemp(prefix='spack-perf-%s-' % name)
+        try:
+            with mock_environment(workdir):
+                result = run_benchmark(benchmarks[name], workdir, repeat,
+                                       scale)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        results['benchmarks'][name] = result
+        if callback:
+            callback(name, result)
+
+    return results
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        sjson.dump(results, f)
+
+
+def load_results(path):
+    with open(path) as f:
+        results = sjson.load(f)
+
+    if results.get('version') != results_version:
+        raise spack.error.SpackError(
+            '%s is not a results file of this version of spack perf' % path)
+    return results
+
+
+def compare(baseline, results, threshold=0.1):
+    """Compare results with a baseline.
+
+    Benchmarks are compared by their fastest run, which is the least
+    sensitive to noise from other processes on the host.
+
+    Args:
+        baseline (dict): results of the baseline
+        results (dict): results to compare with the baseline
+        threshold (float): relative slowdown that counts as a regression
+
+    Returns:
+        list: ``(name, baseline time, time, relative change, regressed)``
+        tuples for the benchmarks present in both results
+    """
+    if baseline.get('scale') != results.get('scale'):
+        tty.warn('Comparing results of runs with different problem sizes')
+
+    common = set(baseline['benchmarks']) & set(results['benchmarks'])
+    names = [n for n in benchmark_names() if n in common]
+    names += sorted(n for n in common if n not in benchmarks)
+
+    comparison = []
+    for name in names:
+        before = baseline['benchmarks'][name]['min']
+        after = results['benchmarks'][name]['min']
+        change = (after - before) / before if before else 0.0
+        comparison.append((name, before, after, change, change > threshold))
+    return comparison
+
+
+class UnknownBenchmarkError(spack.error.SpackError):
+    """Raised when asking for benchmarks that do not exist."""
+
+    def __init__(self, names):
+        super(UnknownBenchmarkError, self).__init__(
+            'No such benchmark: %s' % ', '.join(names),
+            'Available benchmarks: %s' % ', '.join(benchmark_names()))
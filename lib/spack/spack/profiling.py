@@ -0,0 +1,289 @@
+# Copyright 2013-2020 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+"""Profiling of Spack processes, for ``spack --profile``.
+
+``spack --profile`` prints ``cProfile`` statistics when a command is
+done. With ``spack --profile-dir DIR``, each profiled process also writes
+these files to ``DIR``:
+
+* ``<name>.prof``: raw ``cProfile`` statistics, which ``pstats``,
+  snakeviz or gprof2dot can read and merge.
+* ``<name>.collapsed``: sampled call stacks in the collapsed format of
+  ``flamegraph.pl``, which speedscope also reads.
+* ``<name>.trace.json``: wall-clock spans of the phases of Spack, like
+  argument parsing, configuration, repository indexes, concretization,
+  installation, build phases and hooks, in the trace event format of
+  chrome://tracing and Perfetto.
+
+Build processes forked by ``spack.build_environment`` are profiled on
+their own. Their files are named after the process that forked them, so
+that all the files of one command sort together, and their statistics
+are added to those printed by ``spack --profile``.
+"""
+import contextlib
+import cProfile
+import functools
+import glob
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from llnl.util.filesystem import mkdirp
+
+import spack.paths
+import spack.util.spack_json as sjson
+
+#: Seconds between two samples of the call stack of a profiled process
+sample_interval = 0.005
+
+# Profiler of this process, None when not profiling
+_profiler = None
+# Stack sampler of this process, None when only collecting statistics
+_sampler = None
+# Recorded spans: (phase, detail, thread id, start, end) tuples
+_spans = []
+# Directory where profiles are written
+_directory = None
+# Whether ``_directory`` is a temporary one of the process that forked us
+_temporary = False
+# Path of the files of this process, without extension
+_prefix = None
+# Path prefix shared by the files of a command and its children
+_session = None
+
+
+def enabled():
+    """Whether this process is being profiled."""
+    return _profiler is not None
+
+
+def start(directory=None, name='spack'):
+    """Start profiling this process.
+
+    Args:
+        directory (str): directory where to write profiles, or None to
+            only print statistics with ``stats()``
+        name (str): name of the files of this process in ``directory``
+    """
+    global _directory, _temporary, _session
+
+    _temporary = directory is None
+    if _temporary:
+        # Still needed to collect the statistics of child processes
+        directory = tempfile.mkdtemp(prefix='spack-profile-')
+    _directory = os.path.abspath(directory)
+    mkdirp(_directory)
+
+    _session = os.path.join(_directory, '%s-%d' % (name, os.getpid()))
+    _start(_session)
+
+
+def start_child(name):
+    """Profile a forked child process separately from its parent.
+
+    Children inherit the profiler of their parent, but what it records in
+    them is lost when they exit. This restarts profiling from scratch,
+    for files to be written with ``finish()`` before the child exits.
+    """
+    if not enabled():
+        return
+
+    _profiler.disable()
+    _start('%s.%s-%d' % (_session, name, os.getpid()))
+
+
+def _start(prefix):
+    global _profiler, _sampler, _spans, _prefix
+
+    _prefix = prefix
+    _spans = []
+
+    _sampler = None
+    if not _temporary:
+        _sampler = StackSampler(sample_interval)
+        _sampler.start()
+
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop():
+    """Stop profiling, without discarding what was recorded."""
+    if _profiler is not None:
+        _profiler.disable()
+    if _sampler is not None:
+        _sampler.stop()
+
+
+def stats():
+    """Statistics of this process and of the child processes it forked
+    that are done.
+
+    Returns:
+        pstats.Stats: statistics, unsorted
+    """
+    result = pstats.Stats(_profiler)
+    for path in sorted(glob.glob(_session + '.*.prof')):
+        result.add(path)
+    return result
+
+
+@contextlib.contextmanager
+def span(phase, detail=None):
+    """Record the wall-clock time spent in a phase of Spack.
+
+    Args:
+        phase (str): name of the phase, e.g. ``'concretize'``
+        detail (str): what is being done in this phase, e.g. the name of
+            the spec being concretized
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        if _profiler is not None:
+            add_span(phase, detail, start, time.time())
+
+
+def add_span(phase, detail, start, end):
+    """Record a span whose start and end (in seconds since the epoch)
+    were measured elsewhere."""
+    _spans.append(
+        (phase, detail, threading.current_thread().ident, start, end))
+
+
+def spanned(phase, detail=None):
+    """Decorator recording a span for each call of a function.
+
+    Args:
+        phase (str): name of the phase
+        detail (callable): function of the arguments of the call that
+            returns the detail of the span
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return function(*args, **kwargs)
+            with span(phase, detail(*args, **kwargs) if detail else None):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def finish():
+    """Stop profiling and write the profiles of this process.
+
+    The temporary directory of a command run without ``--profile-dir``
+    is removed, so ``stats()`` must be called before this.
+
+    Returns:
+        list: paths of the files written
+    """
+    global _profiler
+
+    if _profiler is None:
+        return []
+    stop()
+
+    paths = []
+    if _temporary and _prefix == _session:
+        shutil.rmtree(_directory, ignore_errors=True)
+    else:
+        paths.append(_prefix + '.prof')
+        _profiler.dump_stats(paths[-1])
+
+    if not _temporary:
+        paths.append(_prefix + '.collapsed')
+        with open(paths[-1], 'w') as f:
+            _sampler.write(f)
+
+        paths.append(_prefix + '.trace.json')
+        with open(paths[-1], 'w') as f:
+            sjson.dump(trace_events(), f)
+
+    _profiler = None
+    return paths
+
+
+def trace_events():
+    """Spans recorded in this process, in the trace event format."""
+    pid = os.getpid()
+    events = [{
+        'name': 'process_name', 'ph': 'M', 'pid': pid,
+        'args': {'name': os.path.basename(_prefix)},
+    }]
+    for phase, detail, tid, start, end in _spans:
+        events.append({
+            'name': phase if detail is None else '%s %s' % (phase, detail),
+            'cat': phase,
+            'ph': 'X',
+            'pid': pid,
+            'tid': tid,
+            'ts': int(start * 1e6),
+            'dur': int((end - start) * 1e6),
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def _frame_name(code):
+    filename = code.co_filename
+    if filename.startswith(spack.paths.prefix + os.sep):
+        filename = os.path.relpath(filename, spack.paths.prefix)
+    return '%s (%s:%d)' % (code.co_name, filename, code.co_firstlineno)
+
+
+class StackSampler(object):
+    """Samples the call stack of a thread at regular intervals.
+
+    Sampling happens in a background thread, and counts how many times
+    each call stack was seen. Unlike ``cProfile``, which only records
+    callers and callees, this shows the full stacks leading to the time
+    spent in each function, as flame graphs do.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.counts = {}
+        self.target = threading.current_thread().ident
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _sample(self):
+        names = {}
+        while not self._done.is_set():
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.target)
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code not in names:
+                    names[code] = _frame_name(code).replace(';', ':')
+                stack.append(names[code])
+                frame = frame.f_back
+
+            if stack:
+                key = ';'.join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def write(self, stream):
+        """Write the samples in the collapsed stack format."""
+        for stack, count in sorted(self.counts.items()):
+            stream.write('%s %d\n' % (stack, count))
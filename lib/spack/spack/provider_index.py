@@ -17,8 +17,14 @@ def _cross_provider_maps(lmap, rmap):
         lmap: main provider map
         rmap: provider map with additional constraints
     """
-    # TODO: this is pretty darned nasty, and inefficient, but there
-    # TODO: are not that many vdeps in most specs.
+    # Only providers with the same name can be crossed, so group the
+    # right providers by name instead of trying every pair.
+    rnames = {}
+    for rspec, rp_specs in rmap.items():
+        by_name = rnames[rspec] = {}
+        for rp_spec in rp_specs:
+            by_name.setdefault(rp_spec.name, []).append(rp_spec)
+
     result = {}
     for lspec, rspec in itertools.product(lmap, rmap):
         try:
@@ -27,8 +33,8 @@ def _cross_provider_maps(lmap, rmap):
             continue
 
         # lp and rp are left and right provider specs.
-        for lp_spec, rp_spec in itertools.product(lmap[lspec], rmap[rspec]):
-            if lp_spec.name == rp_spec.name:
+        for lp_spec in lmap[lspec]:
+            for rp_spec in rnames[rspec].get(lp_spec.name, ()):
                 try:
                     const = lp_spec.constrained(rp_spec, deps=False)
                     result.setdefault(constrained, set()).add(const)
@@ -37,6 +43,24 @@ def _cross_provider_maps(lmap, rmap):
     return result
 
 
+def _constrains_only_versions(spec):
+    """Whether a spec constrains nothing but its name and versions.
+
+    For such a query, a provided spec satisfies it exactly when their
+    version ranges are compatible.
+    """
+    return not (spec.concrete or spec.namespace or spec.compiler or
+                spec.variants or spec.architecture or spec._dependencies or
+                any(spec.compiler_flags.values()))
+
+
+def _node_fullname(node):
+    """Fully qualified name of a spec in its serialized node dict form."""
+    name = next(iter(node))
+    namespace = node[name].get('namespace')
+    return '%s.%s' % (namespace, name) if namespace else name
+
+
 class _IndexBase(object):
     #: This is a dict of dicts used for finding providers of particular
     #: virtual dependencies. The dict of dicts looks like:
@@ -69,14 +93,32 @@ def providers_for(self, virtual_spec):
             virtual_spec = spack.spec.Spec(virtual_spec)
 
         # Add all the providers that satisfy the vpkg spec.
-        if virtual_spec.name in self.providers:
-            for p_spec, spec_set in self.providers[virtual_spec.name].items():
-                if p_spec.satisfies(virtual_spec, deps=False):
+        if virtual_spec.name in self:
+            table = self._lookup_table(virtual_spec.name)
+            if _constrains_only_versions(virtual_spec):
+                # Plain version queries, like mpi@3:, only need the
+                # version ranges to be compared
+                versions = virtual_spec.versions
+                for p_versions, p_spec, spec_set in table:
+                    if (p_versions and versions and
+                            not p_versions.satisfies(versions)):
+                        continue
                     result.update(spec_set)
+            else:
+                for p_versions, p_spec, spec_set in table:
+                    if p_spec.satisfies(virtual_spec, deps=False):
+                        result.update(spec_set)
 
         # Return providers in order. Defensively copy.
         return sorted(s.copy() for s in result)
 
+    def _lookup_table(self, name):
+        """List of ``(versions, provided spec, providers)`` tuples used by
+        ``providers_for()`` to find the providers of a virtual.
+        """
+        return [(p_spec.versions, p_spec, spec_set)
+                for p_spec, spec_set in self.providers[name].items()]
+
     def __contains__(self, name):
         return name in self.providers
 
@@ -148,7 +190,15 @@ def __init__(self, specs=None, restrict=False):
             specs = []
 
         self.restrict = restrict
-        self.providers = {}
+        self._providers = {}
+
+        #: Serialized entries, as read by ``from_json()``, of the virtuals
+        #: that have not been looked up yet. Their specs are constructed
+        #: only when needed, one virtual at a time.
+        self._serialized = {}
+
+        #: Lookup tables of ``providers_for()``, by virtual name
+        self._tables = {}
 
         for spec in specs:
             if not isinstance(spec, spack.spec.Spec):
@@ -159,6 +209,42 @@ def __init__(self, specs=None, restrict=False):
 
             self.update(spec)
 
+    @property
+    def providers(self):
+        """Mapping of virtual names to their providers, as documented in
+        ``_IndexBase``. Constructs the specs of all the virtuals."""
+        for name in list(self._serialized):
+            self._virtual(name)
+        return self._providers
+
+    @providers.setter
+    def providers(self, providers):
+        self._providers = providers
+        self._serialized = {}
+        self._tables = {}
+
+    def _virtual(self, name):
+        """Return the providers of a single virtual, or None if there are
+        none, constructing their specs if needed."""
+        entries = self._serialized.pop(name, None)
+        if entries is not None:
+            self._providers[name] = dict(
+                (spack.spec.Spec.from_node_dict(vpkg),
+                 set(spack.spec.Spec.from_node_dict(p) for p in plist))
+                for vpkg, plist in entries)
+        return self._providers.get(name)
+
+    def _lookup_table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = [
+                (p_spec.versions, p_spec, spec_set)
+                for p_spec, spec_set in self._virtual(name).items()]
+        return table
+
+    def __contains__(self, name):
+        return name in self._providers or name in self._serialized
+
     def update(self, spec):
         """Update the provider index with additional virtual specs.
 
@@ -184,7 +270,10 @@ def update(self, spec):
                 if spec.satisfies(provider_spec, deps=False):
                     provided_name = provided_spec.name
 
-                    provider_map = self.providers.setdefault(provided_name, {})
+                    self._virtual(provided_name)
+                    self._tables.pop(provided_name, None)
+                    provider_map = self._providers.setdefault(
+                        provided_name, {})
                     if provided_spec not in provider_map:
                         provider_map[provided_spec] = set()
 
@@ -214,10 +303,14 @@ def to_json(self, stream=None):
         Args:
             stream: stream where to dump
         """
-        provider_list = self._transform(
+        provider_list = _transform(
+            self._providers,
             lambda vpkg, pset: [
                 vpkg.to_node_dict(), [p.to_node_dict() for p in pset]], list)
 
+        # Virtuals that were never looked up are written back as they were
+        provider_list.update(self._serialized)
+
         sjson.dump({'provider_index': {'providers': provider_list}}, stream)
 
     def merge(self, other):
@@ -227,13 +320,19 @@ def merge(self, other):
             other (ProviderIndex): provider index to be merged
         """
         other = other.copy()   # defensive copy.
-
-        for pkg in other.providers:
-            if pkg not in self.providers:
-                self.providers[pkg] = other.providers[pkg]
+        self._tables = {}
+
+        for pkg in list(other._serialized) + list(other._providers):
+            if pkg not in self:
+                # Serialized entries are never modified, so they can be
+                # shared without constructing any spec
+                if pkg in other._serialized:
+                    self._serialized[pkg] = other._serialized[pkg]
+                else:
+                    self._providers[pkg] = other._providers[pkg]
                 continue
 
-            spdict, opdict = self.providers[pkg], other.providers[pkg]
+            spdict, opdict = self._virtual(pkg), other._virtual(pkg)
             for provided_spec in opdict:
                 if provided_spec not in spdict:
                     spdict[provided_spec] = opdict[provided_spec]
@@ -244,8 +343,22 @@ def merge(self, other):
 
     def remove_provider(self, pkg_name):
         """Remove a provider from the ProviderIndex."""
+        self._tables = {}
+
+        for pkg, entries in list(self._serialized.items()):
+            kept = []
+            for vpkg, plist in entries:
+                plist = [p for p in plist if _node_fullname(p) != pkg_name]
+                if plist:
+                    kept.append([vpkg, plist])
+
+            if kept:
+                self._serialized[pkg] = kept
+            else:
+                del self._serialized[pkg]
+
         empty_pkg_dict = []
-        for pkg, pkg_dict in self.providers.items():
+        for pkg, pkg_dict in self._providers.items():
             empty_pset = []
             for provided, pset in pkg_dict.items():
                 same_name = set(p for p in pset if p.fullname == pkg_name)
@@ -261,13 +374,15 @@ def remove_provider(self, pkg_name):
                 empty_pkg_dict.append(pkg)
 
         for pkg in empty_pkg_dict:
-            del self.providers[pkg]
+            del self._providers[pkg]
 
     def copy(self):
         """Return a deep copy of this index."""
         clone = ProviderIndex()
-        clone.providers = self._transform(
+        clone.providers = _transform(
+            self._providers,
             lambda vpkg, pset: (vpkg, set((p.copy() for p in pset))))
+        clone._serialized = self._serialized.copy()
         return clone
 
     @staticmethod
@@ -286,13 +401,9 @@ def from_json(stream):
             raise ProviderIndexError(
                 "YAML ProviderIndex does not start with 'provider_index'")
 
+        # Specs are constructed lazily, when a virtual is looked up
         index = ProviderIndex()
-        providers = data['provider_index']['providers']
-        index.providers = _transform(
-            providers,
-            lambda vpkg, plist: (
-                spack.spec.Spec.from_node_dict(vpkg),
-                set(spack.spec.Spec.from_node_dict(p) for p in plist)))
+        index._serialized = dict(data['provider_index']['providers'])
         return index
 
 
@@ -34,6 +34,7 @@
 import spack.caches
 import spack.error
 import spack.patch
+import spack.profiling
 import spack.spec
 import spack.util.spack_json as sjson
 import spack.util.imp as simp
@@ -244,6 +245,69 @@ def update_package(self, pkg_name):
             self._tag_dict[tag].append(package.name)
 
 
+class DependentsIndex(Mapping):
+    """Maps package names to the names of the packages that may depend
+    directly on them.
+
+    Virtual packages are mapped to the packages depending on them, their
+    providers are not expanded. The direct dependencies of each package
+    are what is stored, so that updating a package doesn't need a scan,
+    and they are inverted when the index is first used.
+    """
+
+    def __init__(self):
+        self._dependencies = {}
+        self._dependents = None
+
+    def to_json(self, stream):
+        sjson.dump({'dependencies': self._dependencies}, stream)
+
+    @staticmethod
+    def from_json(stream):
+        d = sjson.load(stream)
+
+        r = DependentsIndex()
+        r._dependencies.update(d['dependencies'])
+        return r
+
+    @property
+    def dependents(self):
+        if self._dependents is None:
+            self._dependents = {}
+            for name, dependencies in self._dependencies.items():
+                for dep_name in dependencies:
+                    self._dependents.setdefault(dep_name, set()).add(name)
+        return self._dependents
+
+    def __getitem__(self, item):
+        return self.dependents[item]
+
+    def __iter__(self):
+        return iter(self.dependents)
+
+    def __len__(self):
+        return len(self.dependents)
+
+    def merge(self, other):
+        """Add the packages of another index, replacing those with the
+        same name."""
+        self._dependencies.update(other._dependencies)
+        self._dependents = None
+
+    def update_package(self, pkg_fullname):
+        """Updates a package in the dependents index.
+
+        Args:
+            pkg_fullname (str): name of the package to be updated
+
+        """
+        pkg_cls = path.get_pkg_class(pkg_fullname)
+        name = pkg_fullname.rpartition('.')[2]
+
+        self._dependencies[name] = sorted(pkg_cls.dependencies)
+        self._dependents = None
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Indexer(object):
     """Adaptor for indexes that need to be generated when repos are updated."""
@@ -315,6 +379,21 @@ def write(self, stream):
         self.index.to_json(stream)
 
 
+class DependentsIndexer(Indexer):
+    """Lifecycle methods for a DependentsIndex on a Repo."""
+    def _create(self):
+        return DependentsIndex()
+
+    def read(self, stream):
+        self.index = DependentsIndex.from_json(stream)
+
+    def update(self, pkg_fullname):
+        self.index.update_package(pkg_fullname)
+
+    def write(self, stream):
+        self.index.to_json(stream)
+
+
 class PatchIndexer(Indexer):
     """Lifecycle methods for patch cache."""
     def _create(self):
@@ -394,7 +473,9 @@ def _build_all_indexes(self):
 
         """
         for name, indexer in self.indexers.items():
-            self.indexes[name] = self._build_index(name, indexer)
+            with spack.profiling.span('repo index', '%s %s' % (
+                    self.namespace, name)):
+                self.indexes[name] = self._build_index(name, indexer)
 
     def _build_index(self, name, indexer):
         """Determine which packages need an update, and update indexes."""
@@ -449,6 +530,7 @@ def __init__(self, *repos):
         self._all_package_names = None
         self._provider_index = None
         self._patch_index = None
+        self._dependents_index = None
 
         # Add each repo to this path.
         for repo in repos:
@@ -557,6 +639,16 @@ def patch_index(self):
 
         return self._patch_index
 
+    @property
+    def dependents_index(self):
+        """Merged DependentsIndex from all Repos in the RepoPath."""
+        if self._dependents_index is None:
+            self._dependents_index = DependentsIndex()
+            for repo in reversed(self.repos):
+                self._dependents_index.merge(repo.dependents_index)
+
+        return self._dependents_index
+
     @autospec
     def providers_for(self, vpkg_spec):
         providers = self.provider_index.providers_for(vpkg_spec)
@@ -943,6 +1035,7 @@ def index(self):
             self._repo_index.add_indexer('providers', ProviderIndexer())
             self._repo_index.add_indexer('tags', TagIndexer())
             self._repo_index.add_indexer('patches', PatchIndexer())
+            self._repo_index.add_indexer('dependents', DependentsIndexer())
         return self._repo_index
 
     @property
@@ -960,6 +1053,11 @@ def patch_index(self):
         """Index of patches and packages they're defined on."""
         return self.index['patches']
 
+    @property
+    def dependents_index(self):
+        """Index of the packages that may depend on each package."""
+        return self.index['dependents']
+
     @autospec
     def providers_for(self, vpkg_spec):
         providers = self.provider_index.providers_for(vpkg_spec)
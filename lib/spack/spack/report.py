@@ -43,10 +43,22 @@ def fetch_package_log(pkg):
         )
 
 
+def fetch_test_log(pkg):
+    try:
+        with codecs.open(pkg.install_test_log_path, 'r', 'utf-8') as f:
+            return ''.join(f.readlines())
+    except Exception:
+        return 'Cannot open test log for {0}'.format(
+            pkg.spec.cshort_spec
+        )
+
+
 class InfoCollector(object):
     """Decorates PackageInstaller._install_task, which is called by
     PackageBase.do_install for each spec, to collect information
-    on the installation of certain specs.
+    on the installation of certain specs. Deferred tests, which finish
+    in PackageInstaller._finish_tests, are recorded with the package they
+    test.
 
     When exiting the context this change will be rolled-back.
 
@@ -61,12 +73,17 @@ class InfoCollector(object):
     #: Backup of PackageInstaller._install_task
     _backup__install_task = spack.package.PackageInstaller._install_task
 
+    #: Backup of PackageInstaller._finish_tests
+    _backup__finish_tests = spack.package.PackageInstaller._finish_tests
+
     def __init__(self, specs):
         #: Specs that will be installed
         self.input_specs = specs
         #: This is where we record the data that will be included
         #: in our report.
         self.specs = []
+        #: Data on the packages installed so far, by DAG hash
+        self.packages = {}
 
     def __enter__(self):
         # Initialize the spec report with the data that is available upfront.
@@ -164,6 +181,8 @@ def wrapper(installer, task, *args, **kwargs):
                 finally:
                     package['elapsed_time'] = time.time() - start_time
 
+                self.packages[pkg.spec.dag_hash()] = package
+
                 # Append the package to the correct spec report. In some
                 # cases it may happen that a spec that is asked to be
                 # installed explicitly will also be installed as a
@@ -184,15 +203,54 @@ def wrapper(installer, task, *args, **kwargs):
 
             return wrapper
 
+        def gather_test_info(_finish_tests):
+            """Decorates PackageInstaller._finish_tests to add the outcome
+            of deferred tests to the report of the package they test.
+            """
+            @functools.wraps(_finish_tests)
+            def wrapper(installer, pkg, run, *args, **kwargs):
+                package = self.packages.get(pkg.spec.dag_hash())
+                if package is None:
+                    return _finish_tests(installer, pkg, run, *args, **kwargs)
+
+                value = None
+                try:
+                    value = _finish_tests(installer, pkg, run, *args, **kwargs)
+
+                except spack.build_environment.InstallError as e:
+                    # Failing tests are a failure of the package
+                    package['result'] = 'failure'
+                    package['message'] = e.message or 'Tests failed'
+                    package['exception'] = e.traceback
+
+                except (Exception, BaseException) as e:
+                    package['result'] = 'error'
+                    package['message'] = str(e) or 'Unknown error'
+                    package['exception'] = traceback.format_exc()
+
+                finally:
+                    package['elapsed_time'] += time.time() - run.start_time
+                    package['stdout'] = package.get('stdout', '') + \
+                        fetch_test_log(pkg)
+
+                return value
+
+            return wrapper
+
         spack.package.PackageInstaller._install_task = gather_info(
             spack.package.PackageInstaller._install_task
         )
+        spack.package.PackageInstaller._finish_tests = gather_test_info(
+            spack.package.PackageInstaller._finish_tests
+        )
 
     def __exit__(self, exc_type, exc_val, exc_tb):
 
-        # Restore the original method in PackageInstaller
+        # Restore the original methods in PackageInstaller
         spack.package.PackageInstaller._install_task = \
             InfoCollector._backup__install_task
+        spack.package.PackageInstaller._finish_tests = \
+            InfoCollector._backup__finish_tests
 
         for spec in self.specs:
             spec['npackages'] = len(spec['packages'])
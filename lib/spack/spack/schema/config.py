@@ -29,6 +29,12 @@
                     {'type': 'array',
                      'items': {'type': 'string'}}],
             },
+            'build_stage_placement': {
+                'type': 'string',
+                'enum': ['ordered', 'fastest']
+            },
+            'source_pool_size': {'type': 'integer', 'minimum': 0},
+            'git_repo_cache': {'type': 'boolean'},
             'extensions': {
                 'type': 'array',
                 'items': {'type': 'string'}
@@ -56,6 +62,8 @@
             'source_cache': {'type': 'string'},
             'misc_cache': {'type': 'string'},
             'connect_timeout': {'type': 'integer', 'minimum': 0},
+            'url_fetch_concurrency': {'type': 'integer', 'minimum': 1},
+            'url_cache_ttl': {'type': 'integer', 'minimum': 0},
             'verify_ssl': {'type': 'boolean'},
             'suppress_gpg_warnings': {'type': 'boolean'},
             'install_missing_compilers': {'type': 'boolean'},
@@ -73,6 +81,16 @@
                     {'type': 'null'}
                 ],
             },
+            'lock_poll_intervals': {
+                'type': 'array',
+                'items': {'type': 'number', 'minimum': 0},
+                'minItems': 3,
+                'maxItems': 3,
+            },
+            'lock_poll_jitter': {
+                'type': 'number', 'minimum': 0, 'maximum': 1},
+            'lock_stats': {'type': 'boolean'},
+            'prefix_lock_shards': {'type': 'integer', 'minimum': 1},
         },
     },
 }
@@ -87,6 +87,7 @@
 
 import six
 import ruamel.yaml as yaml
+from ordereddict_backport import OrderedDict
 
 import llnl.util.filesystem as fs
 import llnl.util.lang as lang
@@ -101,6 +102,7 @@
 import spack.error
 import spack.hash_types as ht
 import spack.parse
+import spack.profiling
 import spack.provider_index
 import spack.repo
 import spack.store
@@ -1005,12 +1007,25 @@ def __init__(self, spec_like=None,
         self._full_hash = full_hash
 
         if isinstance(spec_like, six.string_types):
-            spec_list = SpecParser(self).parse(spec_like)
+            cacheable = not (normal or concrete or external_path or
+                             external_module or full_hash)
+            template = _parse_cache_get(spec_like) if cacheable else None
+            if template is not None:
+                self._dup(template)
+                return
+
+            parser = SpecParser(self)
+            spec_list = parser.parse(spec_like)
             if len(spec_list) > 1:
                 raise ValueError("More than one spec in string: " + spec_like)
             if len(spec_list) < 1:
                 raise ValueError("String contains no specs: " + spec_like)
 
+            # Architectures are resolved against the current platform
+            if cacheable and parser.cacheable and not any(
+                    s.architecture for s in self.traverse()):
+                _parse_cache_put(spec_like, self)
+
         elif spec_like is not None:
             raise TypeError("Can't make spec out of %s" % type(spec_like))
 
@@ -2118,6 +2133,7 @@ def feq(cfield, sfield):
 
         return changed
 
+    @spack.profiling.spanned('concretize', lambda spec, *args, **kw: spec.name)
     def concretize(self, tests=False):
         """A spec is concrete if it describes one build of a package uniquely.
         This will ensure that this spec is concrete.
@@ -3928,37 +3944,59 @@ class SpecLexer(spack.parse.Lexer):
 
     def __init__(self):
         super(SpecLexer, self).__init__([
-            (r'\^', lambda scanner, val: self.token(DEP,   val)),
-            (r'\@', lambda scanner, val: self.token(AT,    val)),
-            (r'\:', lambda scanner, val: self.token(COLON, val)),
-            (r'\,', lambda scanner, val: self.token(COMMA, val)),
-            (r'\+', lambda scanner, val: self.token(ON,    val)),
-            (r'\-', lambda scanner, val: self.token(OFF,   val)),
-            (r'\~', lambda scanner, val: self.token(OFF,   val)),
-            (r'\%', lambda scanner, val: self.token(PCT,   val)),
-            (r'\=', lambda scanner, val: self.token(EQ,    val)),
+            (r'\^', DEP),
+            (r'\@', AT),
+            (r'\:', COLON),
+            (r'\,', COMMA),
+            (r'\+', ON),
+            (r'\-', OFF),
+            (r'\~', OFF),
+            (r'\%', PCT),
+            (r'\=', EQ),
 
             # Filenames match before identifiers, so no initial filename
             # component is parsed as a spec (e.g., in subdir/spec.yaml)
-            (r'[/\w.-]+\.yaml[^\b]*', lambda scanner, v: self.token(FILE, v)),
+            (r'[/\w.-]+\.yaml[^\b]*', FILE),
 
             # Hash match after filename. No valid filename can be a hash
             # (files end w/.yaml), but a hash can match a filename prefix.
-            (r'/', lambda scanner, val: self.token(HASH, val)),
+            (r'/', HASH),
 
             # Identifiers match after filenames and hashes.
-            (spec_id_re, lambda scanner, val: self.token(ID, val)),
+            (spec_id_re, ID),
 
-            (r'\s+', lambda scanner, val: None)],
+            (r'\s+', None)],
             [EQ],
-            [(r'[\S].*', lambda scanner, val: self.token(VAL,    val)),
-             (r'\s+', lambda scanner, val: None)],
+            [(r'[\S].*', VAL),
+             (r'\s+', None)],
             [VAL])
 
 
 # Lexer is always the same for every parser.
 _lexer = SpecLexer()
 
+#: Maximum number of strings in the parse cache
+_parse_cache_size = 2048
+
+#: Specs parsed from strings by ``Spec()``, least recently used first.
+#: These are templates: ``Spec()`` returns copies and never hands them out.
+_parse_cache = OrderedDict()
+
+
+def _parse_cache_get(string):
+    """Return the template spec parsed from a string, or None."""
+    template = _parse_cache.pop(string, None)
+    if template is not None:
+        _parse_cache[string] = template  # most recently used goes last
+    return template
+
+
+def _parse_cache_put(string, spec):
+    """Store a copy of a spec parsed from a string in the parse cache."""
+    _parse_cache[string] = spec.copy()
+    if len(_parse_cache) > _parse_cache_size:
+        _parse_cache.popitem(last=False)
+
 
 class SpecParser(spack.parse.Parser):
 
@@ -3974,6 +4012,10 @@ def __init__(self, initial_spec=None):
         self.previous = None
         self._initial = initial_spec
 
+        #: False if the specs parsed depend on more than the text, i.e.
+        #: if they were read from a file or looked up by hash
+        self.cacheable = True
+
     def do_parse(self):
         specs = []
 
@@ -4111,6 +4153,7 @@ def spec_from_file(self):
         if not os.path.exists(path):
             raise NoSuchSpecFileError("No such spec file: '{0}'".format(path))
 
+        self.cacheable = False
         with open(path) as f:
             return Spec.from_yaml(f)
 
@@ -4120,6 +4163,7 @@ def parse_compiler(self, text):
 
     def spec_by_hash(self):
         self.expect(ID)
+        self.cacheable = False
 
         dag_hash = self.token.value
         matches = spack.store.db.get_by_hash(dag_hash)
@@ -10,13 +10,17 @@
 import sys
 import errno
 import hashlib
+import shutil
 import tempfile
 import getpass
+import multiprocessing
 from six import string_types
 from six import iteritems
 
+import llnl.util.lang
 import llnl.util.tty as tty
 from llnl.util.filesystem import mkdirp, can_access, install, install_tree
+from llnl.util.multiproc import fork_available
 from llnl.util.filesystem import partition_path, remove_linked_tree
 
 import spack.paths
@@ -29,6 +33,7 @@
 import spack.fetch_strategy as fs
 import spack.util.pattern as pattern
 import spack.util.path as sup
+import spack.util.spack_json as sjson
 import spack.util.url as url_util
 
 from spack.util.crypto import prefix_bits, bit_length
@@ -40,6 +45,21 @@
 # The temporary stage name prefix.
 stage_prefix = 'spack-stage-'
 
+# Directory of the source pool within the stage root.
+_source_pool_dirname = '.source-pool'
+
+#: Assumed ratio of the size of a stage after building to the size of its
+#: source archive, when there is no record of a past build
+_archive_expansion_ratio = 10
+
+#: Filesystems kept in memory, which are the fastest to build in
+_memory_filesystems = set(['tmpfs', 'ramfs'])
+
+#: Network filesystems, which are the slowest to build in
+_network_filesystems = set([
+    'nfs', 'nfs4', 'lustre', 'gpfs', 'cifs', 'smbfs', 'afs', 'panfs',
+    'beegfs', 'ceph', 'glusterfs', 'fuse.sshfs', '9p'])
+
 
 def _create_stage_root(path):
     """Create the stage root directory and ensure appropriate access perms."""
@@ -168,6 +188,191 @@ def get_stage_root():
     return _stage_root
 
 
+@llnl.util.lang.memoized
+def _mount_points():
+    """(mount point, filesystem type) pairs, longest mount points first.
+
+    Only available on Linux; elsewhere, the list is empty.
+    """
+    mounts = []
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mount = fields[1].replace('\\040', ' ')
+                    mounts.append((mount, fields[2]))
+    except (IOError, OSError):
+        pass
+    return sorted(mounts, key=lambda m: len(m[0]), reverse=True)
+
+
+def _filesystem_speed(path):
+    """Rank the filesystem of ``path``: 0 for memory-backed filesystems,
+    1 for local (or unknown) ones, and 2 for network filesystems."""
+    path = os.path.realpath(path)
+    for mount, fstype in _mount_points():
+        if path == mount or path.startswith(mount.rstrip(os.sep) + os.sep):
+            if fstype in _memory_filesystems:
+                return 0
+            elif fstype in _network_filesystems:
+                return 2
+            break
+    return 1
+
+
+def _free_space(path):
+    """Bytes available to the user on the filesystem of ``path``."""
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    st = os.statvfs(path)
+    return st.f_bavail * st.f_frsize
+
+
+def _tree_size(path):
+    """Total size in bytes of the files in the directory ``path``."""
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def _stage_roots():
+    """All candidate stage roots, starting with ``get_stage_root()``."""
+    primary = get_stage_root()
+    candidates = spack.config.get('config:build_stage') or []
+    if isinstance(candidates, string_types):
+        candidates = [candidates]
+    return [primary] + [p for p in _resolve_paths(candidates) if p != primary]
+
+
+def _select_stage_root(size):
+    """Choose the stage root for a new stage that needs ``size`` bytes.
+
+    Candidates are taken in the order of ``config:build_stage``, or from
+    the fastest filesystem to the slowest if ``config:build_stage_placement``
+    is ``fastest``. The first one with enough free space is chosen, and
+    if none has enough, the one with the most free space.
+    """
+    roots = _stage_roots()
+    if len(roots) == 1:
+        return roots[0]
+
+    if spack.config.get('config:build_stage_placement') == 'fastest':
+        roots.sort(key=_filesystem_speed)
+
+    free = [(_free_space(root), root) for root in roots]
+    for space, root in free:
+        if space >= size:
+            return root
+    return max(free)[1]
+
+
+def _stage_sizes():
+    """Sizes of past stages, keyed by source (see ``Stage._size_key``)."""
+    cache = spack.caches.misc_cache
+    if not cache.init_entry('stage-sizes.json'):
+        return {}
+    with cache.read_transaction('stage-sizes.json') as f:
+        return sjson.load(f)
+
+
+def _record_stage_size(key, size):
+    cache = spack.caches.misc_cache
+    cache.init_entry('stage-sizes.json')
+    with cache.write_transaction('stage-sizes.json') as (old, new):
+        sizes = sjson.load(old) if old else {}
+        sizes[key] = size
+        sjson.dump(sizes, new)
+
+
+class SourcePool(object):
+    """A pool of expanded source trees, shared by all stages.
+
+    Trees are stored under a key identifying their source, and copied
+    into stages that need the same source instead of expanding it again.
+    When the pool grows larger than its maximum size, the least recently
+    used trees are removed.
+    """
+
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        self._lock = spack.util.lock.Lock(
+            os.path.join(root, '.lock'), desc='source pool')
+
+    def _entry(self, key):
+        return os.path.join(
+            self.root, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def restore(self, key, dest):
+        """Copy the tree stored under ``key`` to ``dest``.
+
+        Returns:
+            bool: whether a tree was stored under ``key``
+        """
+        entry = self._entry(key)
+        with spack.util.lock.ReadTransaction(self._lock):
+            if not os.path.isdir(entry):
+                return False
+            shutil.copytree(os.path.join(entry, 'src'), dest, symlinks=True)
+            os.utime(entry, None)  # mark as recently used
+        return True
+
+    def store(self, key, src):
+        """Store a copy of the tree at ``src`` under ``key``."""
+        size = _tree_size(src)
+        if size > self.max_size:
+            return
+
+        entry = self._entry(key)
+        with spack.util.lock.WriteTransaction(self._lock):
+            if os.path.isdir(entry):
+                os.utime(entry, None)
+                return
+
+            tmp = entry + '.tmp'
+            remove_linked_tree(tmp)
+            shutil.copytree(src, os.path.join(tmp, 'src'), symlinks=True)
+            with open(os.path.join(tmp, 'size'), 'w') as f:
+                f.write(str(size))
+            os.rename(tmp, entry)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                with open(os.path.join(path, 'size')) as f:
+                    size = int(f.read())
+            except (IOError, OSError, ValueError):
+                continue
+            entries.append((os.stat(path).st_mtime, path, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.max_size:
+                break
+            remove_linked_tree(path)
+            total -= size
+
+
+def source_pool():
+    """The pool of expanded sources in the stage root, if it is enabled
+    with ``config:source_pool_size`` (in megabytes)."""
+    size = spack.config.get('config:source_pool_size')
+    if not size:
+        return None
+    root = os.path.join(get_stage_root(), _source_pool_dirname)
+    mkdirp(root, mode=stat.S_IRWXU)
+    return SourcePool(root, size * 1024 * 1024)
+
+
 def _mirror_roots():
     mirrors = spack.config.get('mirrors')
     return [
@@ -317,6 +522,10 @@ def __init__(
         # it.  This marks whether it has been created/destroyed.
         self.created = False
 
+        # Key of the patched source in the source pool, if the package
+        # that owns this stage can use one (see PackageBase.do_patch)
+        self.patched_key = None
+
     def __enter__(self):
         """
         Entering a stage context will create the stage directory
@@ -534,11 +743,48 @@ def expand_archive(self):
         archive.  Fail if the stage is not set up or if the archive is not yet
         downloaded."""
         if not self.expanded:
-            self.fetcher.expand()
+            pool = source_pool()
+            key = self._source_key()
+            if (pool and self.patched_key and
+                    pool.restore(self.patched_key, self.source_path)):
+                tty.msg("Copied patched %s from the source pool" % self.name)
+            elif pool and key and pool.restore(key, self.source_path):
+                tty.msg("Copied %s from the source pool" % self.name)
+            else:
+                self.fetcher.expand()
+                if pool and key:
+                    pool.store(key, self.source_path)
             tty.msg("Created stage in %s" % self.path)
         else:
             tty.msg("Already staged %s in %s" % (self.name, self.path))
 
+    def _source_key(self):
+        """Key identifying the source of this stage, or None if the source
+        is not fixed (e.g., the tip of a branch)."""
+        fetcher = self.default_fetcher
+        if fetcher.cachable:
+            try:
+                return fetcher.mirror_id()
+            except NotImplementedError:
+                pass
+        return None
+
+    def _size_key(self):
+        return self._source_key() or self.name
+
+    def _estimated_size(self):
+        """Estimate the size of this stage after building from its past
+        builds and from the size of its archive in the download cache."""
+        size = _stage_sizes().get(self._size_key(), 0)
+        cache_root = getattr(spack.caches.fetch_cache, 'root', None)
+        if self.mirror_paths and cache_root:
+            archive = os.path.join(
+                cache_root, self.mirror_paths.storage_path)
+            if os.path.isfile(archive):
+                size = max(size, _archive_expansion_ratio *
+                           os.path.getsize(archive))
+        return size
+
     def restage(self):
         """Removes the expanded archive path if it exists, then re-expands
            the archive.
@@ -551,17 +797,44 @@ def create(self):
         """
         # Emulate file permissions for tempfile.mkdtemp.
         if not os.path.exists(self.path):
-            mkdirp(self.path, mode=stat.S_IRWXU)
+            self._create_path()
         elif not os.path.isdir(self.path):
             os.remove(self.path)
-            mkdirp(self.path, mode=stat.S_IRWXU)
+            self._create_path()
 
         # Make sure we can actually do something with the stage we made.
         ensure_access(self.path)
         self.created = True
 
+    def _create_path(self):
+        """Create the stage directory.
+
+        Stages in the stage root may be placed in another ``build_stage``
+        root with more free space (see ``_select_stage_root``). They are then
+        linked from the stage root, so they can be found there.
+        """
+        if os.path.islink(self.path):
+            os.unlink(self.path)  # dangling link to a removed stage
+
+        root = get_stage_root()
+        if os.path.dirname(self.path) == root and len(_stage_roots()) > 1:
+            other = _select_stage_root(self._estimated_size())
+            if other != root and _first_accessible_path([other]):
+                path = os.path.join(other, self.name)
+                tty.debug('Placing stage {0} in {1}'.format(self.name, other))
+                mkdirp(path, mode=stat.S_IRWXU)
+                os.symlink(path, self.path)
+                return
+
+        mkdirp(self.path, mode=stat.S_IRWXU)
+
     def destroy(self):
         """Removes this stage directory."""
+        # Remember how large the stage got, to place it next time
+        if len(_stage_roots()) > 1 and os.path.isdir(self.path):
+            _record_stage_size(self._size_key(), _tree_size(
+                os.path.realpath(self.path)))
+
         remove_linked_tree(self.path)
 
         # Make sure we don't end up in a removed directory
@@ -746,11 +1019,57 @@ def purge():
     root = get_stage_root()
     if os.path.isdir(root):
         for stage_dir in os.listdir(root):
-            if stage_dir.startswith(stage_prefix) or stage_dir == '.lock':
+            if (stage_dir.startswith(stage_prefix) or stage_dir == '.lock' or
+                    stage_dir == _source_pool_dirname):
                 stage_path = os.path.join(root, stage_dir)
                 remove_linked_tree(stage_path)
 
 
+def _fetch_and_checksum(url, fetch_options, keep_stage, action_fn=None):
+    """Fetches the archive at url and returns its sha256 checksum, or None
+    if it could not be fetched.
+
+    Args:
+        url (str): URL of the archive
+        fetch_options (dict): Options used for the fetcher (such as timeout
+            or cookies)
+        keep_stage (bool): whether to keep the staging area
+        action_fn (callable): function that takes a Stage and a URL, run
+            on the stage after the archive has been fetched
+    """
+    try:
+        if fetch_options:
+            url_or_fs = fs.URLFetchStrategy(
+                url, fetch_options=fetch_options)
+        else:
+            url_or_fs = url
+        with Stage(url_or_fs, keep=keep_stage) as stage:
+            # Fetch the archive
+            stage.fetch()
+            if action_fn is not None:
+                action_fn(stage, url)
+
+            # Checksum the archive while it is still in the page cache
+            return spack.util.crypto.checksum(
+                hashlib.sha256, stage.archive_file)
+    except FailedDownloadError:
+        tty.msg("Failed to fetch {0}".format(url))
+    except Exception as e:
+        tty.msg("Something failed on {0}, skipping.".format(url),
+                "  ({0})".format(e))
+    return None
+
+
+def _fetch_and_checksum_wrapper(args):
+    """Wrapper for using _fetch_and_checksum with multiprocessing.
+
+    Downloads in worker processes are quiet: their messages, and the
+    progress bars curl shows on a terminal, would be interleaved.
+    """
+    with tty.SuppressOutput(msg_enabled=False):
+        return _fetch_and_checksum(*args)
+
+
 def get_checksums_for_versions(
         url_dict, name, first_stage_function=None, keep_stage=False,
         fetch_options=None):
@@ -761,6 +1080,9 @@ def get_checksums_for_versions(
     inspect the first downloaded archive, e.g., to determine the build
     system.
 
+    Up to ``config:url_fetch_concurrency`` archives are downloaded at
+    the same time.
+
     Args:
         url_dict (dict): A dictionary of the form: version -> URL
         name (str): The name of the package
@@ -798,32 +1120,47 @@ def get_checksums_for_versions(
     urls = [url_dict[v] for v in versions]
 
     tty.msg("Downloading...")
-    version_hashes = []
-    i = 0
-    for url, version in zip(urls, versions):
+    hashes = {}
+    remaining = list(zip(urls, versions))
+
+    # first_stage_function runs on the first archive that can be fetched,
+    # so archives are fetched one at a time until that happens
+    while first_stage_function and remaining and not hashes:
+        url, version = remaining.pop(0)
+        checksum = _fetch_and_checksum(
+            url, fetch_options, keep_stage, first_stage_function)
+        if checksum:
+            hashes[version] = checksum
+
+    # Download the other archives concurrently. Fetchers change the
+    # working directory, so each download needs its own process. These
+    # downloads are quiet, and those that fail are tried again serially
+    # to report what went wrong.
+    jobs = min(spack.config.get('config:url_fetch_concurrency', 16),
+               len(remaining))
+    if jobs > 1 and fork_available():
+        pool = multiprocessing.Pool(jobs)
         try:
-            if fetch_options:
-                url_or_fs = fs.URLFetchStrategy(
-                    url, fetch_options=fetch_options)
-            else:
-                url_or_fs = url
-            with Stage(url_or_fs, keep=keep_stage) as stage:
-                # Fetch the archive
-                stage.fetch()
-                if i == 0 and first_stage_function:
-                    # Only run first_stage_function the first time,
-                    # no need to run it every time
-                    first_stage_function(stage, url)
-
-                # Checksum the archive and add it to the list
-                version_hashes.append((version, spack.util.crypto.checksum(
-                    hashlib.sha256, stage.archive_file)))
-                i += 1
-        except FailedDownloadError:
-            tty.msg("Failed to fetch {0}".format(url))
-        except Exception as e:
-            tty.msg("Something failed on {0}, skipping.".format(url),
-                    "  ({0})".format(e))
+            results = pool.map(
+                _fetch_and_checksum_wrapper,
+                [(url, fetch_options, keep_stage) for url, _ in remaining])
+        finally:
+            pool.close()
+            pool.join()
+
+        for (url, version), checksum in zip(remaining, results):
+            if checksum:
+                tty.msg("Fetched and checksummed {0}".format(url))
+                hashes[version] = checksum
+        remaining = [(url, version) for url, version in remaining
+                     if version not in hashes]
+
+    for url, version in remaining:
+        checksum = _fetch_and_checksum(url, fetch_options, keep_stage)
+        if checksum:
+            hashes[version] = checksum
+
+    version_hashes = [(v, hashes[v]) for v in versions if v in hashes]
 
     if not version_hashes:
         tty.die("Could not fetch any versions for {0}".format(name))
@@ -63,9 +63,12 @@ def __init__(self, root, path_scheme=None, hash_length=None):
         self.layout = spack.directory_layout.YamlDirectoryLayout(
             root, hash_len=hash_length, path_scheme=path_scheme)
 
-    def reindex(self):
-        """Convenience function to reindex the store DB with its own layout."""
-        return self.db.reindex(self.layout)
+    def reindex(self, jobs=1, resume=False):
+        """Convenience function to reindex the store DB with its own layout.
+
+        See ``Database.reindex()`` for the arguments.
+        """
+        return self.db.reindex(self.layout, jobs=jobs, resume=resume)
 
 
 def _store():
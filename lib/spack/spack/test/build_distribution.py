@@ -9,6 +9,7 @@
 import os.path
 
 import spack.spec
+import spack.store
 import spack.binary_distribution
 
 install = spack.main.SpackCommand('install')
@@ -39,3 +40,33 @@ def test_build_tarball_overwrite(
 
         with pytest.raises(spack.binary_distribution.NoOverwriteException):
             spack.binary_distribution.build_tarball(spec, '.', unsigned=True)
+
+
+def test_extracted_tarball_is_reindexed(
+        install_mockery, mock_fetch, monkeypatch, tmpdir):
+    layout = spack.store.layout
+    spec = spack.spec.Spec('trivial-install-test-package').concretized()
+    install(str(spec))
+
+    with tmpdir.as_cwd():
+        spack.binary_distribution.build_tarball(spec, '.', unsigned=True)
+        tarball = os.path.join(
+            spack.binary_distribution.build_cache_prefix('.'),
+            spack.binary_distribution.tarball_directory_name(spec),
+            spack.binary_distribution.tarball_name(spec, '.spack'))
+
+        spec.package.do_uninstall()
+        spack.store.db.reindex(layout)
+        assert layout.read_index() == {}
+
+        spack.binary_distribution.extract_tarball(
+            spec, tarball, unsigned=True)
+
+    # The extracted prefix is in the index of the layout, and reindexing
+    # finds it whether or not the index is up to date
+    assert layout.read_index() == {
+        spec.dag_hash(): layout.relative_path_for_spec(spec)}
+
+    monkeypatch.setattr(layout, 'read_index', lambda: {})
+    spack.store.db.reindex(layout)
+    assert spack.store.db.query_one(spec, installed=True)
@@ -11,6 +11,10 @@
 import os.path
 
 import spack.architecture as architecture
+import llnl.util.lock
+
+import spack.cmd.debug
+import spack.util.lock
 from spack.main import SpackCommand, get_version
 from spack.util.executable import which
 
@@ -53,3 +57,53 @@ def test_report():
     assert get_version() in out
     assert platform.python_version() in out
     assert str(arch) in out
+
+
+def test_parse_import_times():
+    text = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   spack.util.string
+import time:      1000 |       2000 | spack.main
+"""
+    assert spack.cmd.debug.parse_import_times(text) == [
+        (2000, 'spack.main'), (120, 'spack.util.string')]
+
+
+def test_startup():
+    out = debug('startup', '-n', '3')
+    assert 'Startup of `spack --version`' in out
+
+    out = debug('startup', '-n', '3', 'arch', '-p')
+    assert 'Startup of `spack arch -p`' in out
+
+    debug('startup', '--budget', '0', fail_on_error=False)
+    assert debug.returncode != 0
+
+
+def test_locks(tmpdir, monkeypatch):
+    monkeypatch.setattr(
+        spack.util.lock, 'stats_dir', lambda: str(tmpdir.join('stats')))
+
+    out = debug('locks')
+    assert 'No lock statistics recorded' in out
+
+    # two processes waited on the same lock file
+    for pid in (10, 11):
+        stats = llnl.util.lock.LockStats()
+        stats.record(0.5, 3)
+        stats.record_holder(pid, 'host')
+        monkeypatch.setattr(llnl.util.lock, 'lock_stats', {'/db/lock': stats})
+        spack.util.lock.save_stats()
+
+    nprocs, total = spack.util.lock.load_stats()
+    assert nprocs == 2
+    assert total['/db/lock'].contended == 2
+    assert total['/db/lock'].wait_time == 1.0
+
+    out = debug('locks')
+    assert 'Lock statistics of 2 spack processes' in out
+    assert '/db/lock' in out
+    assert 'held by 10@host (1 times)' in out
+
+    debug('locks', '--clear')
+    assert 'No lock statistics recorded' in debug('locks')
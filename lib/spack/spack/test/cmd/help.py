@@ -5,6 +5,8 @@
 
 import pytest
 
+import spack.cmd
+import spack.main
 from spack.main import SpackCommand
 
 
@@ -54,3 +56,30 @@ def test_help_subcommand():
     help_cmd = SpackCommand('help')
     out = help_cmd('help')
     assert 'get help on spack and its commands' in out
+
+
+def test_help_does_not_import_commands(monkeypatch):
+    """Top-level help is built from the command index alone."""
+    spack.cmd.command_index()
+
+    def _fail(cmd_name):
+        raise AssertionError('imported command module %s' % cmd_name)
+    monkeypatch.setattr(spack.cmd, 'get_module', _fail)
+
+    parser = spack.main.make_argument_parser()
+    out = parser.format_help(level='long')
+    assert 'Complete list of spack commands:' in out
+    assert 'install' in out
+
+
+def test_command_index_is_cached(monkeypatch):
+    index = spack.cmd.command_index()
+    assert index['install']['section'] == 'build'
+
+    # A new process reads the index from the misc cache
+    monkeypatch.setattr(spack.cmd, '_command_index', None)
+
+    def _fail(cmd_name):
+        raise AssertionError('imported command module %s' % cmd_name)
+    monkeypatch.setattr(spack.cmd, 'get_module', _fail)
+    assert spack.cmd.command_index() == index
@@ -96,6 +96,14 @@ def test_remove_and_add(database, module_type):
         assert os.path.exists(item)
 
 
+@pytest.mark.db
+@pytest.mark.parametrize('jobs', ['1', '4'])
+def test_refresh_jobs(database, jobs):
+    module('tcl', 'refresh', '-y', '--delete-tree', '-j', jobs)
+    for item in _module_files('tcl', 'mpileaks'):
+        assert os.path.exists(item)
+
+
 @pytest.mark.db
 @pytest.mark.parametrize('cli_args', [
     ['libelf'],
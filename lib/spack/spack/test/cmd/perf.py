@@ -0,0 +1,80 @@
+# Copyright 2013-2020 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import pytest
+
+import spack.config
+import spack.perf
+import spack.store
+from spack.main import SpackCommand, SpackCommandError
+
+perf = SpackCommand('perf')
+
+
+def _results(**times):
+    results = {
+        'version': spack.perf.results_version,
+        'scale': 1.0,
+        'benchmarks': {},
+    }
+    for name, t in times.items():
+        results['benchmarks'][name] = {'min': t}
+    return results
+
+
+def test_perf_list():
+    out = perf('list')
+    for name in spack.perf.benchmark_names():
+        assert name in out
+
+
+def test_perf_run(tmpdir):
+    config, store = spack.config.config, spack.store.store
+    output = str(tmpdir.join('results.json'))
+
+    out = perf('run', '-r', '2', '-s', '0.01', '-o', output)
+
+    results = spack.perf.load_results(output)
+    assert results['repeat'] == 2
+    assert sorted(results['benchmarks']) == sorted(
+        spack.perf.benchmark_names())
+    for name, result in results['benchmarks'].items():
+        assert name in out
+        assert len(result['times']) == 2
+        assert result['min'] <= result['median'] <= result['max']
+
+    # The mock environment of the benchmarks is gone
+    assert spack.config.config is config
+    assert spack.store.store is store
+
+
+def test_perf_run_unknown_benchmark():
+    with pytest.raises(spack.perf.UnknownBenchmarkError):
+        spack.perf.run_benchmarks(['concretize', 'nonexistent'])
+
+
+def test_perf_compare(tmpdir):
+    baseline = _results(concretize=1.0, db_read=2.0, cli_startup=0.5)
+    results = _results(concretize=1.05, db_read=1.0, db_query=3.0)
+
+    comparison = spack.perf.compare(baseline, results, threshold=0.1)
+    assert comparison == [
+        ('concretize', 1.0, 1.05, pytest.approx(0.05), False),
+        ('db_read', 2.0, 1.0, -0.5, False)]
+
+    comparison = spack.perf.compare(baseline, results, threshold=0.01)
+    assert comparison[0][-1]
+
+    baseline_file = str(tmpdir.join('baseline.json'))
+    results_file = str(tmpdir.join('results.json'))
+    spack.perf.save_results(baseline, baseline_file)
+    spack.perf.save_results(results, results_file)
+
+    out = perf('compare', baseline_file, results_file)
+    assert 'REGRESSION' not in out
+
+    with pytest.raises(SpackCommandError):
+        perf('compare', '-t', '1', baseline_file, results_file)
+    assert perf.returncode == 1
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import os
 from spack.main import SpackCommand
+import spack.config
 import spack.store
 
 install = SpackCommand('install')
@@ -51,3 +52,16 @@ def test_reindex_with_deprecated_packages(mock_packages, mock_archive,
 
     assert spack.store.db.query(installed=any) == all_installed
     assert spack.store.db.query(installed=True) == non_deprecated
+
+
+def test_reindex_jobs(mutable_database, monkeypatch):
+    calls = []
+    monkeypatch.setattr(spack.store.Store, 'reindex',
+                        lambda self, **kwargs: calls.append(kwargs['jobs']))
+    build_jobs = spack.config.get('config:build_jobs')
+
+    # Spec files are read serially unless asked otherwise
+    reindex()
+    reindex('-j', '4')
+    assert calls == [1, 4]
+    assert spack.config.get('config:build_jobs') == build_jobs
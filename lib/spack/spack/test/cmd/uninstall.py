@@ -5,6 +5,8 @@
 
 import pytest
 import llnl.util.tty as tty
+import spack.config
+import spack.package
 import spack.store
 from spack.main import SpackCommand, SpackCommandError
 
@@ -169,3 +171,18 @@ def _warn(*args, **kwargs):
     monkeypatch.setattr(tty, 'warn', _warn)
     # Now try to uninstall and check this doesn't trigger warnings
     uninstall('-y', '-a')
+
+
+@pytest.mark.db
+def test_uninstall_jobs(mutable_database, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        spack.package.Package, 'uninstall_by_specs',
+        staticmethod(lambda specs, force, jobs: calls.append(jobs)))
+    build_jobs = spack.config.get('config:build_jobs')
+
+    # Prefixes are deleted one at a time unless asked otherwise
+    uninstall('-y', 'mpileaks ^mpich')
+    uninstall('-y', '-j', '4', 'mpileaks ^mpich')
+    assert calls == [1, 4]
+    assert spack.config.get('config:build_jobs') == build_jobs
@@ -34,6 +34,7 @@
 import spack.repo
 import spack.stage
 import spack.util.executable
+import spack.util.module_cmd
 import spack.util.gpg
 
 from spack.util.pattern import Bunch
@@ -130,6 +131,15 @@ def reset_compiler_cache():
     spack.compilers._compiler_cache = {}
 
 
+@pytest.fixture(scope='function', autouse=True)
+def reset_module_show_cache():
+    """Ensure that module lookups are not shared across Spack tests, which
+    mock the module command liberally."""
+    spack.util.module_cmd._show_cache.clear()
+    yield
+    spack.util.module_cmd._show_cache.clear()
+
+
 @pytest.fixture(scope='function', autouse=True)
 def mock_stage(tmpdir_factory, monkeypatch, request):
     """Establish the temporary build_stage for the mock archive."""
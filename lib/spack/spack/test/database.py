@@ -13,6 +13,8 @@
 import os
 import pytest
 import json
+import shutil
+import sys
 try:
     import uuid
     _use_uuid = True
@@ -23,11 +25,13 @@
 import llnl.util.lock as lk
 from llnl.util.tty.colify import colify
 
+import spack.config
 import spack.repo
 import spack.store
 import spack.database
 import spack.package
 import spack.spec
+from spack.util.crypto import bit_length
 from spack.util.mock_package import MockPackageMultiRepo
 from spack.util.executable import Executable
 
@@ -500,6 +504,52 @@ def test_025_reindex(mutable_database):
     _check_db_sanity(mutable_database)
 
 
+def test_025_reindex_parallel(mutable_database):
+    """Make sure reading spec files in parallel gives the same records."""
+    def records():
+        return dict(
+            (k, v.to_dict()) for k, v in mutable_database._data.items())
+
+    spack.store.store.reindex()
+    expected = records()
+
+    spack.store.store.reindex(jobs=4)
+    _check_db_sanity(mutable_database)
+    assert records() == expected
+
+
+def test_025_reindex_resume(mutable_database, monkeypatch):
+    """Make sure an interrupted reindex can be resumed."""
+    spec_files = spack.store.store.layout.all_spec_files()
+    construct = spack.database.Database._construct_entry_from_directory_layout
+
+    def interrupted(db, *args, **kwargs):
+        if len(db._data) > 5:
+            raise KeyboardInterrupt()
+        construct(db, *args, **kwargs)
+
+    monkeypatch.setattr(spack.database.Database,
+                        '_construct_entry_from_directory_layout', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        spack.store.store.reindex()
+    assert os.path.exists(mutable_database._reindex_path)
+    monkeypatch.undo()
+
+    read = []
+    layout = spack.store.store.layout
+    read_specs = layout.read_specs
+
+    def recorded_read_specs(paths, jobs=1):
+        read.extend(paths)
+        return read_specs(paths, jobs)
+
+    monkeypatch.setattr(layout, 'read_specs', recorded_read_specs)
+    spack.store.store.reindex(resume=True)
+    assert 0 < len(read) < len(spec_files)
+    assert not os.path.exists(mutable_database._reindex_path)
+    _check_db_sanity(mutable_database)
+
+
 def test_026_reindex_after_deprecate(mutable_database):
     """Make sure reindex works and ref counts are valid after deprecation."""
     mpich = mutable_database.query_one('mpich')
@@ -636,6 +686,29 @@ def test_090_non_root_ref_counts(mutable_database):
     assert mpich_rec.ref_count == 0
 
 
+def test_095_installed_dependents(mutable_database):
+    def dependents(query, transitive=True):
+        spec = mutable_database.query_one(query)
+        relatives = mutable_database.installed_relatives(
+            spec, 'parents', transitive)
+        return sorted(s.short_spec for s in relatives)
+
+    # All the dependents are found, not only one per package name
+    callpaths = mutable_database.query('callpath')
+    mpileaks = mutable_database.query('mpileaks')
+    assert dependents('dyninst', False) == sorted(
+        s.short_spec for s in callpaths)
+    assert dependents('dyninst') == sorted(
+        s.short_spec for s in callpaths + mpileaks)
+
+    # The index follows removals and additions
+    rec = mutable_database.get_record('mpileaks ^mpich')
+    mutable_database.remove('mpileaks ^mpich')
+    assert rec.spec.short_spec not in dependents('callpath ^mpich')
+    mutable_database.add(rec.spec, spack.store.layout)
+    assert dependents('callpath ^mpich') == [rec.spec.short_spec]
+
+
 def test_100_no_write_with_exception_on_remove(database):
     def fail_while_writing():
         with database.write_transaction():
@@ -744,6 +817,43 @@ def test_uninstall_by_spec(mutable_database):
     assert len(mutable_database.query()) == 0
 
 
+def test_uninstall_by_specs(mutable_database):
+    specs = mutable_database.query('dyninst')
+    with pytest.raises(spack.package.PackageStillNeededError):
+        spack.package.PackageBase.uninstall_by_specs(specs)
+
+    # A prefix deleted by an interrupted run only leaves a stale record
+    specs = mutable_database.query()
+    prefixes = [s.prefix for s in specs if not s.external]
+    shutil.rmtree(mutable_database.query_one('mpileaks ^mpich').prefix)
+
+    spack.package.PackageBase.uninstall_by_specs(specs, jobs=4)
+    assert mutable_database.query(installed=any) == []
+    assert not any(os.path.exists(p) for p in prefixes)
+
+
+def test_uninstall_by_specs_interrupted(mutable_database, monkeypatch):
+    delete_prefixes = spack.package._delete_prefixes
+    waves = []
+
+    def interrupted(specs, jobs):
+        waves.append(specs)
+        if len(waves) > 1:
+            raise KeyboardInterrupt()
+        return delete_prefixes(specs, jobs)
+
+    monkeypatch.setattr(spack.package, '_delete_prefixes', interrupted)
+    specs = [mutable_database.query_one(s)
+             for s in ('mpileaks ^mpich', 'callpath ^mpich')]
+    with pytest.raises(KeyboardInterrupt):
+        spack.package.PackageBase.uninstall_by_specs(specs)
+
+    # The first wave was recorded before the second one was interrupted
+    assert [s.name for s in waves[0]] == ['mpileaks']
+    assert not mutable_database.query('mpileaks ^mpich', installed=any)
+    assert mutable_database.query_one('callpath ^mpich', installed=True)
+
+
 def test_query_unused_specs(mutable_database):
     # This spec installs a fake cmake as a build only dependency
     s = spack.spec.Spec('simple-inheritance')
@@ -860,6 +970,35 @@ def _is(db, spec):
     assert spack.store.db.prefix_failed(s)
 
 
+@pytest.mark.parametrize('shards', [1, 4])
+def test_prefix_lock_range(
+        tmpdir, mutable_config, mock_packages, monkeypatch, shards):
+    monkeypatch.setattr(spack.database.Database, '_prefix_locks', {})
+    monkeypatch.setattr(spack.store, 'store',
+                        spack.store.Store(str(tmpdir.join('opt'))))
+    spack.config.set('config:prefix_lock_shards', shards)
+    db = spack.database.Database(str(tmpdir))
+    offset_bits = bit_length(sys.maxsize)
+
+    paths = set()
+    for name in ('a', 'b', 'libelf', 'mpileaks'):
+        s = spack.spec.Spec(name).concretized()
+        path, start = db._prefix_lock_range(db.prefix_lock_path, s)
+        assert start == s.dag_hash_bit_prefix(offset_bits)
+        paths.add(path)
+
+        lock = db.prefix_lock(s)
+        assert (lock.path, lock._start) == (path, start)
+        with db.prefix_write_lock(s):
+            assert os.path.exists(path)
+
+    if shards == 1:
+        assert paths == set([db.prefix_lock_path])
+    else:
+        assert all(p.startswith(db.prefix_lock_path + '.') for p in paths)
+        assert len(paths) > 1
+
+
 def test_prefix_read_lock_error(mutable_database, monkeypatch):
     """Cover the prefix read lock exception."""
     def _raise(db, spec):
@@ -7,6 +7,8 @@
 This test verifies that the Spack directory layout works properly.
 """
 import os
+import shutil
+
 import pytest
 
 import spack.paths
@@ -239,3 +241,39 @@ def test_yaml_directory_layout_build_path(tmpdir, config):
     rel_path = os.path.join(layout.metadata_dir, layout.packages_dir)
     assert layout.build_packages_path(spec) == os.path.join(spec.prefix,
                                                             rel_path)
+
+
+def test_layout_index(layout_and_dir, config, mock_packages):
+    """Test that the index follows the install directories, and that
+    the layout is walked when the index is out of date."""
+    layout, _ = layout_and_dir
+    specs = [Spec(name).concretized()
+             for name in ('libelf', 'libdwarf', 'zmpi')]
+
+    # The first install directory is found walking the layout
+    layout.create_install_directory(specs[0])
+    assert layout.read_index() is None
+    assert [s.name for s in layout.all_specs()] == ['libelf']
+
+    # Then the index is kept up to date
+    for spec in specs[1:]:
+        layout.create_install_directory(spec)
+    layout.remove_install_directory(specs[1])
+
+    expected = dict((s.dag_hash(), layout.relative_path_for_spec(s))
+                    for s in (specs[0], specs[2]))
+    assert layout.read_index() == expected
+    assert sorted(layout.all_spec_files()) == sorted(
+        layout.spec_file_path(s) for s in (specs[0], specs[2]))
+
+    # Removing a prefix behind the layout's back, or an interrupted
+    # write, make the index inconsistent
+    shutil.rmtree(specs[2].prefix)
+    assert layout.read_index() is None
+    assert [s.name for s in layout.all_specs()] == ['libelf']
+    assert layout.read_index() == {
+        specs[0].dag_hash(): layout.relative_path_for_spec(specs[0])}
+
+    with open(layout.index_path, 'a') as f:
+        f.write('+ abcdef')
+    assert layout.read_index() is None
@@ -11,8 +11,10 @@
 
 from llnl.util.filesystem import working_dir, touch, mkdirp
 
+import spack.caches
 import spack.repo
 import spack.config
+import spack.fetch_strategy
 from spack.spec import Spec
 from spack.stage import Stage
 from spack.version import ver
@@ -154,6 +156,38 @@ def test_debug_fetch(mock_packages, type_of_test, mock_git_repository, config):
             assert os.path.isdir(pkg.stage.source_path)
 
 
+@pytest.mark.parametrize("type_of_test", ['commit', 'tag'])
+def test_fetch_from_repo_cache(type_of_test, mock_git_repository, config,
+                               monkeypatch, tmpdir):
+    """Ensure a second fetch is served from the repository cache."""
+    t = mock_git_repository.checks[type_of_test]
+    h = mock_git_repository.hash
+
+    cache = spack.fetch_strategy.FsCache(str(tmpdir.join('cache')))
+    monkeypatch.setattr(spack.caches, 'fetch_cache', cache)
+
+    git = which('git', required=True)
+
+    with spack.config.override('config:git_repo_cache', True):
+        for fetched in (True, False):
+            fetcher = GitFetchStrategy(**t.args)
+            with Stage(fetcher, path=str(tmpdir.join('stage'))) as stage:
+                fetcher.fetch()
+                with working_dir(stage.source_path):
+                    assert h('HEAD') == h(t.revision)
+                    assert os.path.isfile(t.file)
+                    url = git('config', '--get', 'remote.origin.url',
+                              output=str)
+                    assert url.strip() == t.args['git']
+
+            # 'git fetch' into the cache leaves a FETCH_HEAD behind
+            fetch_head = os.path.join(fetcher._repo_cache_path(),
+                                      'FETCH_HEAD')
+            assert os.path.exists(fetch_head) == fetched
+            if fetched:
+                os.remove(fetch_head)
+
+
 def test_git_extra_fetch(tmpdir):
     """Ensure a fetch after 'expanding' is effectively a no-op."""
     testpath = str(tmpdir)
@@ -532,3 +532,35 @@ def test_install_error():
         assert exc.__class__.__name__ == 'InstallError'
         assert exc.message == msg
         assert exc.long_message == long_msg
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_install_defer_tests(install_mockery, mock_fetch, monkeypatch, fail):
+    spec = Spec('trivial-install-test-package').concretized()
+    pkg = spec.package
+
+    def test_callback(pkg):
+        # Runs after the build, apart from it, in the stage
+        assert os.path.isdir(pkg.prefix)
+        assert os.getcwd() == pkg.stage.source_path
+        print('Running deferred tests')
+        assert not fail
+
+    phase = type(pkg)._InstallPhase_install
+    callbacks = phase.run_after + [
+        spack.package.on_package_attributes(run_tests=True)(test_callback)]
+    monkeypatch.setattr(phase, 'run_after', callbacks)
+
+    if fail:
+        with pytest.raises(InstallError, match='Tests failed'):
+            pkg.do_install(tests=True, defer_tests=True)
+    else:
+        pkg.do_install(tests=True, defer_tests=True)
+
+    # Failing tests do not undo the installation
+    assert pkg.installed
+    assert not os.path.exists(pkg.stage.path)
+    with open(pkg.install_log_path) as f:
+        assert 'Running deferred tests' not in f.read()
+    with open(pkg.install_test_log_path) as f:
+        assert 'Running deferred tests' in f.read()
@@ -289,3 +289,15 @@ def test_invalid_family():
     with pytest.raises(AssertionError,
                        match='a target is expected to belong'):
         multi_parents.family
+
+
+def test_ancestors_are_computed_once():
+    target = llnl.util.cpu.targets['skylake']
+    assert target.ancestors is target.ancestors
+    assert target._to_set() is target._to_set()
+
+    # Caching must not change the semantic of comparisons
+    assert target == llnl.util.cpu.targets['skylake']
+    assert target > 'haswell'
+    assert not target < 'haswell'
+    assert target.ancestors[0] == llnl.util.cpu.targets['broadwell']
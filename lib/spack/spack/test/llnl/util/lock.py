@@ -209,6 +209,35 @@ def test_poll_interval_generator():
     assert intervals == [1] * 20 + [2] * 40 + [3] * 40
 
 
+def test_poll_interval_generator_jitter():
+    interval_iter = iter(lk.Lock._poll_interval_generator(
+        _wait_times=[1, 2, 3], jitter=0.5))
+    intervals = list(next(interval_iter) for i in range(100))
+    assert all(0.5 <= i <= 1.5 for i in intervals[:20])
+    assert all(1.5 <= i <= 4.5 for i in intervals[60:])
+    assert len(set(intervals)) > 1
+
+
+def test_lock_stats(tmpdir, monkeypatch):
+    monkeypatch.setattr(lk, 'lock_stats', {})
+    with tmpdir.as_cwd():
+        lock = lk.Lock('lockfile')
+        for i in range(3):
+            with lk.ReadTransaction(lock):
+                # nested transactions do not take the lock again
+                with lk.WriteTransaction(lock):
+                    pass
+
+    stats = lk.lock_stats[str(tmpdir.join('lockfile'))]
+    assert stats.acquired == 6  # read, then upgrade to write
+    assert stats.attempts == 6
+    assert stats.contended == stats.timeouts == 0
+
+    merged = lk.LockStats.from_dict(stats.to_dict())
+    merged.merge(stats)
+    assert merged.acquired == 12
+
+
 def local_multiproc_test(*functions, **kwargs):
     """Order some processes using simple barrier synchronization."""
     b = mp.Barrier(len(functions), timeout=barrier_timeout)
@@ -1214,6 +1243,87 @@ def p2(barrier, q1, q2):
     local_multiproc_test(p2, p1, extra_args=(q1, q2))
 
 
+def test_lock_stats_contended(lock_path):
+    host = socket.getfqdn()
+
+    def p1(barrier, q):
+        lock = lk.Lock(lock_path, debug=True)
+        with lk.WriteTransaction(lock):
+            q.put(os.getpid())
+            barrier.wait()  # ------------------------------------ 1
+            barrier.wait()  # ------------------------------------ 2
+
+    def p2(barrier, q):
+        p1_pid = q.get()
+        lock = lk.Lock(lock_path, debug=True)
+        lk.lock_stats.clear()  # forget what the parent process recorded
+        barrier.wait()  # ---------------------------------------- 1
+
+        with pytest.raises(lk.LockTimeoutError):
+            lock.acquire_read(lock_fail_timeout)
+
+        stats = lk.lock_stats[os.path.abspath(lock_path)]
+        assert stats.timeouts == 1
+        assert stats.contended == 1
+        assert stats.acquired == 0
+        assert stats.wait_time >= lock_fail_timeout
+        assert stats.holders == {'{0}@{1}'.format(p1_pid, host): 1}
+        barrier.wait()  # ---------------------------------------- 2
+
+    local_multiproc_test(p1, p2, extra_args=(Queue(),))
+
+
+@pytest.mark.parametrize('line', ['pid=', 'pid=1234', 'pid=,host=x'])
+def test_truncated_holder_line(lock_path, line):
+    """A holder line only partially written is ignored."""
+    with open(lock_path, 'w') as f:
+        f.write(line)
+
+    lock = lk.Lock(lock_path, debug=True)
+    lock.acquire_read()
+    try:
+        assert lock._read_holder() is None
+        assert lock.pid is None
+    finally:
+        lock.release_read()
+
+
+def test_locks_share_open_file(lock_path):
+    """Locks on ranges of one file share a descriptor, and releasing one
+    of them does not release the others."""
+    nfiles = len(lk.file_tracker)
+
+    def p1(barrier):
+        lock1 = lk.Lock(lock_path, 0, 1)
+        lock2 = lk.Lock(lock_path, 1, 1)
+        lock1.acquire_write()
+        lock2.acquire_write()
+        assert lock1._file is lock2._file
+        assert len(lk.file_tracker) == nfiles + 1
+
+        lock1.release_write()
+        assert not lock2._file.closed
+        barrier.wait()  # ---------------------------------------- 1
+        barrier.wait()  # ---------------------------------------- 2
+
+        fh = lock2._file
+        lock2.release_write()
+        assert fh.closed
+        assert len(lk.file_tracker) == nfiles
+
+    def p2(barrier):
+        barrier.wait()  # ---------------------------------------- 1
+        lock1 = lk.Lock(lock_path, 0, 1)
+        lock2 = lk.Lock(lock_path, 1, 1)
+        with lk.WriteTransaction(lock1):
+            pass
+        with pytest.raises(lk.LockTimeoutError):
+            lock2.acquire_write(lock_fail_timeout)
+        barrier.wait()  # ---------------------------------------- 2
+
+    local_multiproc_test(p1, p2)
+
+
 def test_lock_with_no_parent_directory(tmpdir):
     """Make sure locks work even when their parent directory does not exist."""
     with tmpdir.as_cwd():
@@ -5,6 +5,7 @@
 
 from __future__ import print_function
 import contextlib
+import gzip
 import multiprocessing
 import os
 import signal
@@ -73,6 +74,38 @@ def test_log_python_output_and_echo_output(capfd, tmpdir):
         assert capfd.readouterr()[0] == 'force echo\n'
 
 
+def test_log_output_compressed(capfd, tmpdir):
+    with tmpdir.as_cwd():
+        with log_output('foo.txt.gz') as logger:
+            with logger.force_echo():
+                print('force echo')
+            print('logged')
+
+        with gzip.open('foo.txt.gz', 'rt') as f:
+            assert f.read() == 'force echo\nlogged\n'
+        assert capfd.readouterr()[0] == 'force echo\n'
+
+
+def test_log_output_large(capfd, tmpdir):
+    """Output is relayed in blocks, which can cut lines and control
+    sequences."""
+    lines = ['\x1b[0;32mline %d\x1b[0m' % i for i in range(20000)]
+    long_line = 'x' * (3 * llnl.util.tty.log._read_size + 1)
+
+    with tmpdir.as_cwd():
+        with log_output('foo.txt') as logger:
+            print('\n'.join(lines))
+            with logger.force_echo():
+                print(long_line)
+            print('\n'.join(lines))
+
+        with open('foo.txt') as f:
+            stripped = ['line %d' % i for i in range(20000)]
+            assert f.read().split('\n') == (
+                stripped + [long_line] + stripped + [''])
+        assert capfd.readouterr()[0] == long_line + '\n'
+
+
 @pytest.mark.skipif(not which('echo'), reason="needs echo command")
 def test_log_subproc_and_echo_output_no_capfd(capfd, tmpdir):
     echo = which('echo')
@@ -4,10 +4,15 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import os
+import subprocess
+import sys
+
+import pytest
 
 import llnl.util.filesystem as fs
 
 import spack.paths
+import spack.util.spack_json as sjson
 from spack.main import get_version, main
 
 
@@ -61,3 +66,35 @@ def test_get_version_bad_git(tmpdir, working_env):
 
     os.environ["PATH"] = str(tmpdir)
     assert spack.spack_version == get_version()
+
+
+@pytest.mark.parametrize('module', [
+    'jinja2', 'spack.binary_distribution', 'spack.ci', 'spack.relocate'])
+def test_heavy_modules_not_imported_at_startup(module):
+    """Modules that only some commands need stay out of spack.main."""
+    code = 'import sys, spack.main; print(" ".join(sys.modules))'
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [spack.paths.lib_path, spack.paths.external_path])
+    out = subprocess.check_output([sys.executable, '-c', code], env=env)
+    assert module not in out.decode('utf-8').split()
+
+
+def test_profile_dir(tmpdir):
+    profile_dir = str(tmpdir.join('profiles'))
+    subprocess.check_output([
+        sys.executable, spack.paths.spack_script, '--profile-dir',
+        profile_dir, 'python', '-c', 'pass'])
+
+    names = os.listdir(profile_dir)
+    assert len(names) == 3
+    prefix = os.path.join(profile_dir, names[0].split('.')[0])
+    assert os.path.basename(prefix).startswith('spack-python-')
+
+    with open(prefix + '.trace.json') as f:
+        events = sjson.load(f)['traceEvents']
+    spans = [e['name'] for e in events if e['ph'] == 'X']
+    assert 'parse' in spans
+    assert 'command python' in spans
+    assert os.path.exists(prefix + '.prof')
+    assert os.path.exists(prefix + '.collapsed')
@@ -54,6 +54,7 @@ def test_get_path_from_module_faked(monkeypatch):
         def fake_module(*args):
             return line
         monkeypatch.setattr(spack.util.module_cmd, 'module', fake_module)
+        monkeypatch.setattr(spack.util.module_cmd, '_show_cache', {})
 
         path = get_path_from_module('mod')
         assert path == '/path/to'
@@ -77,6 +77,27 @@ def test_modules_written_with_proper_permissions(mock_module_filename,
         mock_module_filename).st_mode == mock_package_perms
 
 
+def test_unchanged_modules_are_not_rewritten(mock_module_filename,
+                                             mock_packages, config):
+    spec = spack.spec.Spec('mpileaks').concretized()
+    generator = spack.modules.tcl.TclModulefileWriter(spec)
+    generator.write()
+
+    # Only the timestamp changes: the file must be left untouched
+    os.utime(mock_module_filename, (0, 0))
+    generator.write(overwrite=True)
+    assert os.stat(mock_module_filename).st_mtime == 0
+
+    # Any other difference triggers a rewrite
+    with open(mock_module_filename, 'a') as f:
+        f.write('# local modification\n')
+    os.utime(mock_module_filename, (0, 0))
+    generator.write(overwrite=True)
+    assert os.stat(mock_module_filename).st_mtime != 0
+    with open(mock_module_filename) as f:
+        assert 'local modification' not in f.read()
+
+
 class MockDb(object):
     def __init__(self, db_ids, spec_hash_to_db):
         self.upstream_dbs = db_ids
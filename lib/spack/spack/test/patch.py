@@ -10,9 +10,11 @@
 
 from llnl.util.filesystem import working_dir, mkdirp
 
+import spack.config
 import spack.patch
 import spack.paths
 import spack.repo
+import spack.stage
 import spack.util.compression
 from spack.util.executable import Executable
 from spack.stage import Stage
@@ -194,6 +196,39 @@ def test_patched_dependency(
                 assert 'Patched!' in mf.read()
 
 
+def test_patched_source_pool(
+        mock_packages, config, install_mockery, mock_fetch, monkeypatch):
+    """Test that patched sources are reused from the source pool."""
+    monkeypatch.setattr(
+        spack.stage.Stage, '_source_key', lambda self: 'mock-source')
+
+    spec = Spec('patch-a-dependency')
+    spec.concretize()
+    pkg = spec['libelf'].package
+
+    with spack.config.override('config:source_pool_size', 1):
+        pkg.do_patch()
+        pkg.stage.destroy()
+
+        # the patched source now comes from the pool
+        def _apply(self, stage):
+            raise AssertionError('patch applied again')
+        monkeypatch.setattr(spack.patch.FilePatch, 'apply', _apply)
+
+        pkg.do_patch()
+        with working_dir(pkg.stage.source_path):
+            Executable('./configure')()
+            with open('Makefile') as mf:
+                assert 'Patched!' in mf.read()
+        pkg.stage.destroy()
+        spack.stage.purge()
+
+    # the source is pooled with the patches it has
+    assert pkg._patched_source_key() == (
+        'mock-source patched with '
+        'c45c1564f70def3fc1a6e22139f62cb21cd190cc3a7dbe6f4120fa59ce33dcb8:1:.')
+
+
 def test_multiple_patched_dependencies(mock_packages, config):
     """Test whether multiple patched dependencies work."""
     spec = Spec('patch-several-dependencies')
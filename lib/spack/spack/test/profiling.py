@@ -0,0 +1,84 @@
+# Copyright 2013-2020 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import os
+import time
+
+import pytest
+
+import spack.build_environment
+import spack.profiling
+import spack.util.spack_json as sjson
+from spack.spec import Spec
+
+
+@pytest.fixture()
+def profiling(tmpdir):
+    spack.profiling.start(str(tmpdir), 'test')
+    yield str(tmpdir)
+    spack.profiling.finish()
+
+
+def _busy(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+    return 'done'
+
+
+def _spans():
+    events = spack.profiling.trace_events()['traceEvents']
+    return [e for e in events if e['ph'] == 'X']
+
+
+def test_profiles_are_written(profiling):
+    with spack.profiling.span('phase', 'detail'):
+        _busy(0.1)
+    spack.profiling.add_span('parse', None, 1.0, 1.5)
+
+    prefix = os.path.join(profiling, 'test-%d' % os.getpid())
+    paths = spack.profiling.finish()
+    assert paths == [
+        prefix + '.prof', prefix + '.collapsed', prefix + '.trace.json']
+    assert not spack.profiling.enabled()
+
+    with open(prefix + '.collapsed') as f:
+        stacks = f.read().splitlines()
+    assert any(';_busy (' in s for s in stacks)
+
+    with open(prefix + '.trace.json') as f:
+        events = sjson.load(f)['traceEvents']
+    spans = [e for e in events if e['ph'] == 'X']
+    assert [(e['name'], e['cat']) for e in spans] == [
+        ('phase detail', 'phase'), ('parse', 'parse')]
+    assert spans[0]['dur'] >= 100000
+    assert spans[1]['ts'] == 1000000 and spans[1]['dur'] == 500000
+
+
+def test_spanned(profiling):
+    @spack.profiling.spanned('phase', lambda x: 'x=%d' % x)
+    def increment(x):
+        return x + 1
+
+    assert increment(1) == 2
+    assert [e['name'] for e in _spans()] == ['phase x=1']
+
+
+def test_forked_children_are_profiled(mock_packages, config):
+    spec = Spec('trivial-install-test-package').concretized()
+
+    spack.profiling.start(None, 'test')
+    directory = spack.profiling._directory
+    try:
+        result = spack.build_environment.fork(
+            spec.package, lambda: _busy(0.05), dirty=False, fake=True)
+        stats = spack.profiling.stats()
+    finally:
+        spack.profiling.finish()
+
+    # The child wrote its statistics for the parent to print them
+    assert result == 'done'
+    assert '_busy' in [name for _, _, name in stats.stats]
+    assert not os.path.exists(directory)
@@ -73,3 +73,48 @@ def test_copy(mock_packages):
     p = ProviderIndex(spack.repo.all_package_names())
     q = p.copy()
     assert p == q
+
+
+def test_from_json_is_lazy(mock_packages, monkeypatch):
+    p = ProviderIndex(spack.repo.all_package_names())
+    ostream = StringIO()
+    p.to_json(ostream)
+
+    constructed = []
+    from_node_dict = Spec.from_node_dict
+
+    def counting_from_node_dict(node):
+        constructed.append(next(iter(node)))
+        return from_node_dict(node)
+    monkeypatch.setattr(
+        Spec, 'from_node_dict', staticmethod(counting_from_node_dict))
+
+    q = ProviderIndex.from_json(StringIO(ostream.getvalue()))
+    assert not constructed
+    assert 'mpi' in q and 'blas' in q
+
+    # Looking up a virtual only constructs the specs of that virtual
+    for query in ('mpi', 'mpi@2', 'mpi@3:', 'mpi@:1'):
+        assert q.providers_for(query) == p.providers_for(query)
+    assert 'netlib-blas' not in constructed
+    assert 'mpi' in constructed
+
+    # Virtuals that were never looked up are written back as they were
+    q.remove_provider('builtin.mock.netlib-blas')
+    p.remove_provider('builtin.mock.netlib-blas')
+    assert 'netlib-blas' not in constructed
+
+    ostream = StringIO()
+    q.to_json(ostream)
+    assert ProviderIndex.from_json(StringIO(ostream.getvalue())) == p
+
+
+def test_merge_serialized(mock_packages):
+    p = ProviderIndex(spack.repo.all_package_names())
+    ostream = StringIO()
+    p.to_json(ostream)
+
+    q = ProviderIndex()
+    q.merge(ProviderIndex.from_json(StringIO(ostream.getvalue())))
+    assert q == p
+    assert q.providers_for('mpi@3') == p.providers_for('mpi@3')
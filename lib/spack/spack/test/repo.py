@@ -62,3 +62,17 @@ def test_repo_invisibles(mutable_mock_repo, extra_repo):
     with open(os.path.join(extra_repo.root, 'packages', '.invisible'), 'w'):
         pass
     extra_repo.all_package_names()
+
+
+def test_repo_dependents_index(mock_packages):
+    index = spack.repo.path.dependents_index
+    assert 'libdwarf' in index['libelf']
+    assert 'mpileaks' in index['mpi']
+
+    # Packages in repos with higher precedence replace the others
+    other = spack.repo.DependentsIndex()
+    other._dependencies['libdwarf'] = []
+    index = spack.repo.DependentsIndex()
+    index.merge(spack.repo.path.dependents_index)
+    index.merge(other)
+    assert 'libdwarf' not in index['libelf']
@@ -15,8 +15,12 @@
 
 from llnl.util.filesystem import mkdirp
 
+import spack.hooks
 import spack.paths
-from spack.hooks.sbang import shebang_too_long, filter_shebangs_in_directory
+import spack.spec
+from spack.hooks.sbang import (
+    shebang_limit, has_long_shebang, shebang_too_long,
+    filter_shebangs_in_directory)
 from spack.util.executable import which
 
 
@@ -157,3 +161,34 @@ def test_shebang_handles_non_writable_files(script_dir):
 
     st = os.stat(script_dir.long_shebang)
     assert oct(not_writable_mode) == oct(st.st_mode)
+
+
+def test_has_long_shebang():
+    assert has_long_shebang(long_line.encode('UTF-8'))
+    assert has_long_shebang(long_line.encode('UTF-8')[:shebang_limit + 1])
+    assert not has_long_shebang(short_line.encode('UTF-8'))
+    assert not has_long_shebang(b'#!' + b'x' * (shebang_limit - 2))
+    assert not has_long_shebang(b'x' + long_line.encode('UTF-8'))
+
+
+def test_scan_prefix_filters_shebangs(tmpdir, config, mock_packages):
+    spec = spack.spec.Spec('a').concretized()
+    spec.prefix = str(tmpdir)
+
+    scripts = []
+    for subdir in ('bin', 'libexec/a', 'libexec/b', '.'):
+        mkdirp(str(tmpdir.join(subdir)))
+        script = str(tmpdir.join(subdir, 'script'))
+        with open(script, 'wb') as f:
+            f.write(long_line.encode('UTF-8'))
+            f.write(b'\xff\xfe not UTF-8\n' * 10000)
+        scripts.append(script)
+    os.symlink(scripts[0], str(tmpdir.join('bin', 'link')))
+
+    spack.hooks.scan_prefix(spec)
+
+    for script in scripts:
+        with open(script, 'rb') as f:
+            assert f.readline() == sbang_line.encode('UTF-8')
+            assert f.readline() == long_line.encode('UTF-8')
+            assert f.read() == b'\xff\xfe not UTF-8\n' * 10000
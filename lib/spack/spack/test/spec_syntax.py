@@ -10,6 +10,7 @@
 import llnl.util.filesystem as fs
 
 import spack.hash_types as ht
+import spack.parse
 import spack.repo
 import spack.store
 import spack.spec as sp
@@ -764,3 +765,35 @@ def test_kv_with_spaces(self):
     ])
     def test_target_tokenization(self, expected_tokens, spec_string):
         self.check_lex(expected_tokens, spec_string)
+
+    def test_parse_cache(self):
+        string = 'mvapich_foo@1.2 +debug ^_openmpi@1.4 %intel'
+        sp._parse_cache.pop(string, None)
+
+        first, second = Spec(string), Spec(string)
+        assert string in sp._parse_cache
+        assert first == second
+        assert first is not sp._parse_cache[string]
+
+        # Specs from the cache are independent copies
+        first.versions = sp.vn.VersionList(['2.0'])
+        first['_openmpi'].variants['debug'] = sp.vt.BoolValuedVariant(
+            'debug', True)
+        assert Spec(string) == second
+        assert str(Spec(string)) == str(second)
+
+    def test_parse_cache_skips_architectures(self):
+        string = 'mvapich_foo arch=test-debian6-x86_64'
+        Spec(string)
+        assert string not in sp._parse_cache
+
+
+@pytest.mark.parametrize('text', [
+    'mvapich_foo debug=4 ^_openmpi@1.2:1.4,1.6%intel@12.1',
+    '  libelf\t+debug\n~qt_4 ',
+    'mvapich cppflags="-O3 -fPIC" ^ stackwalker',
+    "mvapich cppflags='-O3' \\\"quoted\\\"",
+    '',
+])
+def test_split_words(text):
+    assert spack.parse.split_words(text) == shlex.split(text)
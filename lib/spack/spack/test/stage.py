@@ -5,20 +5,27 @@
 
 """Test that the Stage class works correctly."""
 import errno
+import hashlib
 import os
 import collections
 import shutil
 import stat
+import sys
 import tempfile
 import getpass
 
 import pytest
 
+import llnl.util.tty
 from llnl.util.filesystem import mkdirp, partition_path, touch, working_dir
 
+import spack.config
+import spack.fetch_strategy
 import spack.paths
 import spack.stage
+import spack.util.crypto
 import spack.util.executable
+import spack.version
 
 from spack.resource import Resource
 from spack.stage import Stage, StageComposite, ResourceStage, DIYStage
@@ -935,3 +942,150 @@ def test_cannot_access(capsys):
 
     captured = capsys.readouterr()
     assert 'Insufficient permissions' in str(captured)
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_get_checksums_for_versions(
+        concurrency, mock_archive, tmp_build_stage_dir, monkeypatch):
+    """Ensure archives are checksummed, and failed downloads skipped,
+    whether or not they are downloaded concurrently."""
+    archive_dir = os.path.dirname(mock_archive.archive_file)
+    url_dict = {}
+    for v in ('1.0', '1.1', '1.2', '1.3'):
+        archive = os.path.join(archive_dir, 'foo-{0}.tar.gz'.format(v))
+        shutil.copy(mock_archive.archive_file, archive)
+        url_dict[spack.version.Version(v)] = 'file://' + archive
+    url_dict[spack.version.Version('2.0')] = 'file:///no/such/foo-2.0.tar.gz'
+
+    monkeypatch.setattr(llnl.util.tty, 'get_number', lambda *a, **kw: 5)
+    first_stages = []
+
+    with spack.config.override('config:url_fetch_concurrency', concurrency):
+        version_lines = spack.stage.get_checksums_for_versions(
+            url_dict, 'foo',
+            first_stage_function=lambda stage, url: first_stages.append(url))
+
+    checksum = spack.util.crypto.checksum(
+        hashlib.sha256, mock_archive.archive_file)
+    assert version_lines.split('\n') == [
+        "    version('{0}', sha256='{1}')".format(v, checksum)
+        for v in ('1.3', '1.2', '1.1', '1.0')
+    ]
+    assert first_stages == [url_dict[spack.version.Version('1.3')]]
+
+
+def test_concurrent_fetches_are_quiet(tmp_build_stage_dir, monkeypatch):
+    """Ensure curl shows no progress bar in concurrent downloads."""
+    curl_args = []
+
+    class MockCurl(object):
+        returncode = 22
+
+        def __call__(self, *args, **kwargs):
+            curl_args.extend(args)
+            return ''
+
+    monkeypatch.setattr(spack.fetch_strategy.URLFetchStrategy, 'curl',
+                        MockCurl())
+    monkeypatch.setattr(sys.stdout, 'isatty', lambda: True)
+    url = 'https://example.com/foo-1.0.tar.gz'
+
+    assert spack.stage._fetch_and_checksum(url, None, False) is None
+    assert '-#' in curl_args
+
+    del curl_args[:]
+    assert spack.stage._fetch_and_checksum_wrapper((url, None, False)) is None
+    assert '-#' not in curl_args and '-sS' in curl_args
+
+
+def test_select_stage_root(tmpdir, clear_stage_root, monkeypatch):
+    """New stages spill over to the next build_stage path with enough
+    free space, or go to the fastest filesystem with ``fastest``."""
+    paths = [str(tmpdir.join(d)) for d in ('slow', 'small', 'large')]
+    roots = spack.stage._resolve_paths(paths)
+    free = dict(zip(roots, [10, 100, 1000]))
+    speed = dict(zip(roots, [2, 0, 1]))
+    monkeypatch.setattr(spack.stage, '_free_space', lambda p: free[p])
+    monkeypatch.setattr(spack.stage, '_filesystem_speed', lambda p: speed[p])
+
+    with spack.config.override('config:build_stage:', paths):
+        assert spack.stage._select_stage_root(0) == roots[0]
+        assert spack.stage._select_stage_root(50) == roots[1]
+        assert spack.stage._select_stage_root(500) == roots[2]
+        assert spack.stage._select_stage_root(5000) == roots[2]
+
+        with spack.config.override('config:build_stage_placement',
+                                   'fastest'):
+            assert spack.stage._select_stage_root(0) == roots[1]
+            assert spack.stage._select_stage_root(500) == roots[2]
+
+
+def test_stage_spills_over(mock_stage_archive, tmpdir, monkeypatch):
+    archive = mock_stage_archive()
+    other_root = spack.stage._resolve_paths(
+        [str(tmpdir.join('other-stage'))])[0]
+
+    sizes = {}
+    monkeypatch.setattr(spack.stage, '_select_stage_root', lambda s: sizes[s])
+    monkeypatch.setattr(spack.stage, '_record_stage_size',
+                        lambda key, size: sizes.update({key: size}))
+    monkeypatch.setattr(spack.stage, '_stage_sizes', lambda: sizes)
+
+    with spack.config.override('config:build_stage:',
+                               [archive.stage_path, other_root]):
+        # without a record of the stage size, the stage root is used
+        sizes[0] = archive.stage_path
+        with Stage(archive.url, name='spack-stage-spill') as stage:
+            assert not os.path.islink(stage.path)
+            stage.fetch()
+            stage.expand_archive()
+        assert sizes[stage._size_key()] > 0
+
+        # a stage needing more space goes to the other root, linked from
+        # the stage root
+        sizes[sizes[stage._size_key()]] = other_root
+        with Stage(archive.url, name='spack-stage-spill') as stage:
+            assert os.path.islink(stage.path)
+            assert os.path.realpath(stage.path) == os.path.join(
+                other_root, 'spack-stage-spill')
+            stage.fetch()
+            stage.expand_archive()
+            check_expand_archive(stage, 'spack-stage-spill', [_include_readme])
+
+    assert not os.path.lexists(stage.path)
+    assert not os.path.exists(os.path.join(other_root, 'spack-stage-spill'))
+
+
+def test_source_pool(mock_stage_archive, monkeypatch):
+    archive = mock_stage_archive()
+    digest = spack.util.crypto.checksum(
+        hashlib.sha256, archive.url[len('file://'):])
+
+    def fetcher():
+        return spack.fetch_strategy.URLFetchStrategy(
+            archive.url, sha256=digest)
+
+    with spack.config.override('config:source_pool_size', 1):
+        with Stage(fetcher(), name='spack-stage-pool-1') as stage:
+            stage.fetch()
+            stage.expand_archive()
+
+        # the second stage copies the source from the pool
+        def _fail(self):
+            raise AssertionError('expanded the archive again')
+        monkeypatch.setattr(
+            spack.fetch_strategy.URLFetchStrategy, 'expand', _fail)
+
+        with Stage(fetcher(), name='spack-stage-pool-2') as stage:
+            stage.fetch()
+            stage.expand_archive()
+            check_expand_archive(
+                stage, 'spack-stage-pool-2', [_include_readme])
+
+        # trees are evicted once the pool is too large
+        pool = spack.stage.source_pool()
+        key = stage._source_key()
+        assert pool.restore(key, str(archive.tmpdir.join('copy1')))
+        pool.max_size = 0
+        pool._evict()
+        assert not pool.restore(key, str(archive.tmpdir.join('copy2')))
@@ -3,6 +3,8 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import pytest
+
 from ctest_log_parser import CTestLogParser
 
 
@@ -32,3 +34,48 @@ def test_log_parser(tmpdir):
 
     assert len(warnings) == 1
     assert all(w.text.endswith('W') for w in warnings)
+
+
+@pytest.fixture()
+def long_log(tmpdir):
+    log_file = tmpdir.join('long-log.txt')
+    with log_file.open('w') as f:
+        for i in range(1, 501):
+            if i % 50 == 0:
+                f.write('foo.c:%d: error: something failed\n' % i)
+            elif i % 70 == 0:
+                f.write('foo.c:%d: warning: something is odd\n' % i)
+            else:
+                f.write('gcc -c -o foo%d.o foo%d.c\n' % (i, i))
+    return str(log_file)
+
+
+@pytest.mark.parametrize('chunk_size,jobs', [
+    (10000, 1),  # the whole log in one chunk
+    (7, 1),      # context spans more than one chunk
+    (33, 2),     # chunks parsed in parallel
+])
+def test_log_parser_chunks(long_log, chunk_size, jobs, monkeypatch):
+    monkeypatch.setattr(CTestLogParser, 'chunk_size', chunk_size)
+    errors, warnings = CTestLogParser().parse(long_log, context=3, jobs=jobs)
+
+    assert [e.line_no for e in errors] == list(range(50, 501, 50))
+    assert [w.line_no for w in warnings] == [70, 140, 210, 280, 420, 490]
+
+    for event in errors + warnings:
+        expected = ['gcc -c -o foo%d.o foo%d.c' % (i, i)
+                    for i in range(event.start, event.end)
+                    if i != event.line_no and i <= 500]
+        assert event.pre_context + event.post_context == expected
+    assert errors[-1].post_context == []
+
+
+@pytest.mark.parametrize('chunk_size', [10000, 7])
+def test_log_parser_max_errors(long_log, chunk_size, monkeypatch):
+    monkeypatch.setattr(CTestLogParser, 'chunk_size', chunk_size)
+    errors, warnings = CTestLogParser().parse(
+        long_log, context=3, jobs=1, max_errors=3)
+
+    assert [e.line_no for e in errors] == [50, 100, 150]
+    assert [w.line_no for w in warnings] == [70, 140]
+    assert len(errors[-1].post_context) == 3
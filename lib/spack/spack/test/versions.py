@@ -365,6 +365,13 @@ def test_intersection():
     check_intersection(['2.5:2.7'], ['1.1:2.7'], ['2.5:3.0', '1.0'])
     check_intersection(['0:1'], [':'], ['0:1'])
 
+    check_intersection(['1.2', '1.4:1.5', '2.1'],
+                       ['1.0:1.2', '1.4:2.1', '3.0'],
+                       ['1.2:1.5', '2.1', '2.3:2.9', '3.1'])
+    check_intersection(['1.6.5', '2.0.1:2.0.3'],
+                       [':1.6', '2.0'],
+                       ['1.6.5', '1.7', '2.0.1:2.0.3', '2.1:'])
+
 
 def test_intersect_with_containment():
     check_intersection('1.6.5', '1.6.5', ':1.6')
@@ -562,3 +569,20 @@ def test_list_highest():
     assert vl2.highest_numeric() is None
     assert vl2.preferred() == Version('develop')
     assert vl2.lowest() == Version('master')
+
+
+def test_versions_are_parsed_once():
+    a, b = Version('1.2.3-rc1'), Version('1.2.3-rc1')
+    assert a is not b
+    assert a.version is b.version
+    assert a.separators is b.separators
+    assert a.version == (1, 2, 3, 'rc', 1)
+    assert a.separators == ('.', '.', '-', '', '')
+
+
+def test_sorting_many_versions():
+    versions = ['1.10', '1.2', 'develop', '1.2a', '1.2.1', 'master', 'foo',
+                '2', '1.2b']
+    expected = ['foo', '1.2', '1.2a', '1.2b', '1.2.1', '1.10', '2',
+                'master', 'develop']
+    assert [str(v) for v in sorted(Version(x) for x in versions)] == expected
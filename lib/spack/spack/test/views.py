@@ -41,3 +41,46 @@ def test_remove_extensions_ordered(install_mockery, mock_fetch, tmpdir):
 
     e1 = e2['extension1']
     view.remove_specs(e1, e2)
+
+
+def test_view_manifests(install_mockery, mock_fetch, tmpdir):
+    view_dir = str(tmpdir.join('view'))
+    layout = YamlDirectoryLayout(view_dir)
+    view = YamlFilesystemView(view_dir, layout)
+    spec = Spec('libdwarf').concretized()
+    spec.package.do_install()
+
+    view.add_specs(spec)
+    for s in spec.traverse():
+        assert os.path.exists(view.get_manifest_path(s))
+    assert os.path.exists(os.path.join(view_dir, 'libdwarf'))
+    assert os.path.exists(os.path.join(view_dir, 'libelf'))
+
+    plan = view.read_manifest(spec)
+    assert plan.merge_map == {
+        os.path.join(spec.prefix, 'libdwarf'):
+        os.path.join(view_dir, 'libdwarf')}
+
+    # Removal is driven by the manifest, even if the prefix is gone
+    os.remove(os.path.join(spec.prefix, 'libdwarf'))
+    view.remove_specs(spec)
+    assert not os.path.exists(view.get_manifest_path(spec))
+    assert not os.path.lexists(os.path.join(view_dir, 'libdwarf'))
+    assert os.path.exists(os.path.join(view_dir, 'libelf'))
+
+
+def test_add_specs_serial_and_concurrent(install_mockery, mock_fetch, tmpdir):
+    spec = Spec('libdwarf').concretized()
+    spec.package.do_install()
+
+    contents = []
+    for jobs in (1, 4):
+        view_dir = str(tmpdir.join('view-%d' % jobs))
+        view = YamlFilesystemView(
+            view_dir, YamlDirectoryLayout(view_dir), jobs=jobs)
+        view.add_specs(spec)
+        contents.append(sorted(
+            os.path.relpath(os.path.join(root, f), view_dir)
+            for root, _, files in os.walk(view_dir) for f in files))
+
+    assert contents[0] == contents[1]
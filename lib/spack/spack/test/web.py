@@ -9,8 +9,12 @@
 
 from ordereddict_backport import OrderedDict
 
+import spack.caches
+import spack.config
 import spack.paths
+import spack.util.url as url_util
 import spack.util.web as web_util
+from spack.util.file_cache import FileCache
 from spack.version import ver
 
 
@@ -106,6 +110,32 @@ def test_spider_3():
     assert page_4 in links
 
 
+def test_spider_multiple_roots():
+    pages, links = web_util.spider([root, page_2, root], depth=0)
+
+    assert sorted(pages) == sorted([root, page_2])
+    assert page_1 in links
+    assert page_3 in links
+    assert page_4 in links
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_spider_visits_each_page_once(concurrency, monkeypatch):
+    fetched = []
+    read_from_url = web_util.read_from_url
+
+    def _read_from_url(url, *args, **kwargs):
+        fetched.append(url_util.parse(url).geturl())
+        return read_from_url(url, *args, **kwargs)
+    monkeypatch.setattr(web_util, 'read_from_url', _read_from_url)
+
+    # Page 3 links back to the root, and pages 2 and 3 link to each other
+    pages, _ = web_util.spider(root, depth=4, concurrency=concurrency)
+
+    assert len(pages) == 5
+    assert sorted(fetched) == sorted([root, page_1, page_2, page_3, page_4])
+
+
 def test_find_versions_of_archive_0():
     versions = web_util.find_versions_of_archive(
         root_tarball, root, list_depth=0)
@@ -152,6 +182,30 @@ def test_find_exotic_versions_of_archive_3():
     assert ver('4.5-rc5') in versions
 
 
+def test_find_versions_of_archive_cache(tmpdir, monkeypatch):
+    monkeypatch.setattr(spack.caches, 'misc_cache', FileCache(str(tmpdir)))
+
+    calls = []
+    spider = web_util.spider
+
+    def _spider(*args, **kwargs):
+        calls.append(args)
+        return spider(*args, **kwargs)
+    monkeypatch.setattr(web_util, 'spider', _spider)
+
+    with spack.config.override('config:url_cache_ttl', 3600):
+        for _ in range(2):
+            versions = web_util.find_versions_of_archive(
+                root_tarball, root, list_depth=1)
+            assert ver('0.0.0') in versions
+            assert ver('1.0.0') in versions
+    assert len(calls) == 1
+
+    with spack.config.override('config:url_cache_ttl', 0):
+        web_util.find_versions_of_archive(root_tarball, root, list_depth=1)
+    assert len(calls) == 2
+
+
 def test_get_header():
     headers = {
         'Content-type': 'text/plain'
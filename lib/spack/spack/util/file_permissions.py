@@ -10,13 +10,19 @@
 from spack.error import SpackError
 
 
-def set_permissions_by_spec(path, spec):
-    # Get permissions for spec
+def permissions_by_spec(spec):
+    """Returns the file permissions, directory permissions and group
+    configured for a spec."""
+    return (pp.get_package_permissions(spec),
+            pp.get_package_dir_permissions(spec),
+            pp.get_package_group(spec))
+
+
+def set_permissions_by_spec(path, spec, permissions=None):
+    # Get permissions for spec, unless the caller already looked them up
+    perms, dir_perms, group = permissions or permissions_by_spec(spec)
     if os.path.isdir(path):
-        perms = pp.get_package_dir_permissions(spec)
-    else:
-        perms = pp.get_package_permissions(spec)
-    group = pp.get_package_group(spec)
+        perms = dir_perms
 
     set_permissions(path, perms, group)
 
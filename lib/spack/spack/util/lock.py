@@ -5,14 +5,18 @@
 
 """Wrapper for ``llnl.util.lock`` allows locking to be enabled/disabled."""
 import os
+import socket
 import stat
+import time
 
 import llnl.util.lock
+from llnl.util.filesystem import mkdirp
 from llnl.util.lock import *  # noqa
 
 import spack.config
 import spack.error
 import spack.paths
+import spack.util.spack_json as sjson
 
 
 class Lock(llnl.util.lock.Lock):
@@ -21,8 +25,16 @@ class Lock(llnl.util.lock.Lock):
     This overrides the ``_lock()`` and ``_unlock()`` methods from
     ``llnl.util.lock`` so that all the lock API calls will succeed, but
     the actual locking mechanism can be disabled via ``_enable_locks``.
+
+    The backoff policy used while waiting for a contended lock comes from
+    the ``config:lock_poll_intervals`` and ``config:lock_poll_jitter``
+    settings, unless it is passed explicitly.
     """
     def __init__(self, *args, **kwargs):
+        kwargs.setdefault(
+            'poll_intervals', spack.config.get('config:lock_poll_intervals'))
+        kwargs.setdefault(
+            'jitter', spack.config.get('config:lock_poll_jitter', 0))
         super(Lock, self).__init__(*args, **kwargs)
         self._enable = spack.config.get('config:locks', True)
 
@@ -72,3 +84,66 @@ def check_lock_safety(path):
                 "Running a shared spack without locks is unsafe. You must "
                 "restrict permissions on {0} or enable locks.").format(path)
             raise spack.error.SpackError(msg, long_msg)
+
+
+def stats_dir():
+    """Directory where Spack processes save their lock statistics."""
+    import spack.caches  # avoid circular import at module level
+    return os.path.join(spack.caches.misc_cache.root, 'lock-stats')
+
+
+def save_stats():
+    """Save the lock statistics of this process to ``stats_dir()``.
+
+    Each process writes its own file, so concurrent Spack instances never
+    contend on it.
+    """
+    stats = llnl.util.lock.lock_stats
+    if not stats:
+        return
+
+    data = dict((path, s.to_dict()) for path, s in stats.items())
+    directory = stats_dir()
+    mkdirp(directory)
+
+    name = '{0}-{1}-{2}.json'.format(
+        socket.gethostname(), os.getpid(), int(time.time() * 1e6))
+    tmp = os.path.join(directory, '.' + name)
+    with open(tmp, 'w') as f:
+        sjson.dump(data, f)
+    os.rename(tmp, os.path.join(directory, name))
+
+
+def load_stats():
+    """Aggregate the lock statistics saved by all Spack processes.
+
+    Returns:
+        tuple: (number of processes, dict from path to ``LockStats``)
+    """
+    directory = stats_dir()
+    if not os.path.isdir(directory):
+        return 0, {}
+
+    nprocs, total = 0, {}
+    for name in os.listdir(directory):
+        if name.startswith('.') or not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            data = sjson.load(f)
+
+        nprocs += 1
+        for path, d in data.items():
+            stats = llnl.util.lock.LockStats.from_dict(d)
+            if path in total:
+                total[path].merge(stats)
+            else:
+                total[path] = stats
+    return nprocs, total
+
+
+def clear_stats():
+    """Remove all saved lock statistics."""
+    directory = stats_dir()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
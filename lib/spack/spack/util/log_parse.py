@@ -16,7 +16,8 @@
 __all__ = ['parse_log_events', 'make_log_context']
 
 
-def parse_log_events(stream, context=6, jobs=None, profile=False):
+def parse_log_events(stream, context=6, jobs=None, profile=False,
+                     max_errors=None):
     """Extract interesting events from a log file as a list of LogEvent.
 
     Args:
@@ -24,6 +25,8 @@ def parse_log_events(stream, context=6, jobs=None, profile=False):
         context (int): lines of context to extract around each log event
         jobs (int): number of jobs to parse with; default ncpus
         profile (bool): print out profile information for parsing
+        max_errors (int or None): stop parsing the log after this many
+            errors have been found; default is to parse the whole log
 
     Returns:
         (tuple): two lists containig ``BuildError`` and
@@ -36,7 +39,8 @@ def parse_log_events(stream, context=6, jobs=None, profile=False):
     if parse_log_events.ctest_parser is None:
         parse_log_events.ctest_parser = CTestLogParser(profile=profile)
 
-    result = parse_log_events.ctest_parser.parse(stream, context, jobs)
+    result = parse_log_events.ctest_parser.parse(
+        stream, context, jobs, max_errors)
     if profile:
         parse_log_events.ctest_parser.print_timings()
     return result
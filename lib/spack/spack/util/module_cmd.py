@@ -21,6 +21,9 @@
 py_cmd = "'import os;import json;print(json.dumps(dict(os.environ)))'"
 _cmd_template = "'module ' + ' '.join(args) + ' 2>&1'"
 
+#: Output of ``module show``, keyed by module name and MODULEPATH
+_show_cache = {}
+
 
 def module(*args):
     module_cmd = eval(_cmd_template)  # So we can monkeypatch for testing
@@ -54,6 +57,18 @@ def module(*args):
         return str(module_p.communicate()[0].decode())
 
 
+def show_module(mod):
+    """Returns the output of ``module show`` for a module.
+
+    The output only changes when MODULEPATH does, so it is cached for the
+    rest of the session to avoid spawning a shell for every lookup.
+    """
+    key = (mod, os.environ.get('MODULEPATH'))
+    if key not in _show_cache:
+        _show_cache[key] = module('show', mod)
+    return _show_cache[key]
+
+
 def load_module(mod):
     """Takes a module name and removes modules until it is possible to
     load that module. It then loads the provided module. Depends on the
@@ -63,7 +78,7 @@ def load_module(mod):
     # We do this without checking that they are already installed
     # for ease of programming because unloading a module that is not
     # loaded does nothing.
-    text = module('show', mod).split()
+    text = show_module(mod).split()
     for i, word in enumerate(text):
         if word == 'conflict':
             module('unload', text[i + 1])
@@ -98,7 +113,7 @@ def get_path_from_module(mod):
     at which the library supported by said module can be found.
     """
     # Read the module
-    text = module('show', mod).split('\n')
+    text = show_module(mod).split('\n')
 
     p = get_path_from_module_contents(text, mod)
     if p and not os.path.exists(p):
@@ -10,6 +10,8 @@
 import re
 from six import StringIO
 
+import llnl.util.lang
+
 import spack.error
 
 __all__ = [
@@ -30,6 +32,7 @@
 _valid_fully_qualified_module_re = r'^(\w[\w-]*)(\.\w[\w-]*)*$'
 
 
+@llnl.util.lang.memoized
 def mod_to_class(mod_name):
     """Convert a name from module style to class name style.  Spack mostly
        follows `PEP-8 <http://legacy.python.org/dev/peps/pep-0008/>`_:
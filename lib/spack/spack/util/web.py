@@ -7,14 +7,17 @@
 
 import codecs
 import errno
+import hashlib
 import re
 import os
 import os.path
 import shutil
 import ssl
 import sys
+import time
 import traceback
 
+from six import string_types
 from six.moves.urllib.request import urlopen, Request
 from six.moves.urllib.error import URLError
 import multiprocessing.pool
@@ -39,6 +42,7 @@ class HTMLParseError(Exception):
 import spack.url
 import spack.util.crypto
 import spack.util.s3 as s3_util
+import spack.util.spack_json as sjson
 import spack.util.url as url_util
 
 from spack.util.compression import ALLOWED_ARCHIVE_TYPES
@@ -47,6 +51,9 @@ class HTMLParseError(Exception):
 # Timeout in seconds for web requests
 _timeout = 10
 
+# Default number of pages the spider fetches concurrently
+_default_concurrency = 16
+
 
 class LinkParser(HTMLParser):
     """This parser just takes an HTML page and strips out the hrefs on the
@@ -63,34 +70,6 @@ def handle_starttag(self, tag, attrs):
                     self.links.append(val)
 
 
-class NonDaemonProcess(multiprocessing.Process):
-    """Process that allows sub-processes, so pools can have sub-pools."""
-    @property
-    def daemon(self):
-        return False
-
-    @daemon.setter
-    def daemon(self, value):
-        pass
-
-
-if sys.version_info[0] < 3:
-    class NonDaemonPool(multiprocessing.pool.Pool):
-        """Pool that uses non-daemon processes"""
-        Process = NonDaemonProcess
-else:
-
-    class NonDaemonContext(type(multiprocessing.get_context())):  # novm
-        Process = NonDaemonProcess
-
-    class NonDaemonPool(multiprocessing.pool.Pool):
-        """Pool that uses non-daemon processes"""
-
-        def __init__(self, *args, **kwargs):
-            kwargs['context'] = NonDaemonContext()
-            super(NonDaemonPool, self).__init__(*args, **kwargs)
-
-
 def uses_ssl(parsed_url):
     if parsed_url.scheme == 'https':
         return True
@@ -336,11 +315,11 @@ def list_url(url):
             for key in _iter_s3_prefix(s3, url)))
 
 
-def _spider(url, visited, root, depth, max_depth, raise_on_error):
-    """Fetches URL and any pages it links to up to max_depth.
+def _spider(url, root, depth, max_depth, raise_on_error):
+    """Fetches a single URL and collects the links it contains.
 
-       depth should initially be zero, and max_depth is the max depth of
-       links to follow from the root.
+       depth is the depth of url in the crawl, and max_depth is the max
+       depth of links to follow from the root.
 
        Prints out a warning only if the root can't be fetched; it ignores
        errors with pages that the root links to.
@@ -348,21 +327,22 @@ def _spider(url, visited, root, depth, max_depth, raise_on_error):
        Returns a tuple of:
        - pages: dict of pages visited (URL) mapped to their full text.
        - links: set of links encountered while visiting the pages.
+       - subcalls: arguments to spider the links that should be followed.
     """
     pages = {}     # dict from page URL -> text content.
     links = set()  # set of all links seen on visited pages.
+    subcalls = []
 
     try:
         response_url, _, response = read_from_url(url, 'text/html')
         if not response_url or not response:
-            return pages, links
+            return pages, links, subcalls
 
         page = codecs.getreader('utf-8')(response).read()
         pages[response_url] = page
 
         # Parse out the links in the page
         link_parser = LinkParser()
-        subcalls = []
         link_parser.feed(page)
 
         while link_parser.links:
@@ -381,28 +361,10 @@ def _spider(url, visited, root, depth, max_depth, raise_on_error):
             if not abs_link.startswith(root):
                 continue
 
-            # Skip already-visited links
-            if abs_link in visited:
-                continue
-
             # If we're not at max depth, follow links.
             if depth < max_depth:
-                subcalls.append((abs_link, visited, root,
+                subcalls.append((abs_link, root,
                                  depth + 1, max_depth, raise_on_error))
-                visited.add(abs_link)
-
-        if subcalls:
-            pool = NonDaemonPool(processes=len(subcalls))
-            try:
-                results = pool.map(_spider_wrapper, subcalls)
-
-                for sub_pages, sub_links in results:
-                    pages.update(sub_pages)
-                    links.update(sub_links)
-
-            finally:
-                pool.terminate()
-                pool.join()
 
     except URLError as e:
         tty.debug(e)
@@ -431,7 +393,7 @@ def _spider(url, visited, root, depth, max_depth, raise_on_error):
         tty.debug("Error in _spider: %s:%s" % (type(e), e),
                   traceback.format_exc())
 
-    return pages, links
+    return pages, links, subcalls
 
 
 def _spider_wrapper(args):
@@ -460,18 +422,64 @@ def _urlopen(req, *args, **kwargs):
     return opener(req, *args, **kwargs)
 
 
-def spider(root, depth=0):
-    """Gets web pages from a root URL.
+def spider(root_urls, depth=0, concurrency=None):
+    """Gets web pages from one or more root URLs.
 
        If depth is specified (e.g., depth=2), then this will also follow
-       up to <depth> levels of links from the root.
+       up to <depth> levels of links from each root.
+
+       Pages are fetched by a bounded pool of threads, one level of links
+       at a time, and each URL is visited at most once during a crawl.
 
-       This will spawn processes to fetch the children, for much improved
-       performance over a sequential fetch.
+    Args:
+        root_urls (str or list): root urls used as a starting point
+            for the crawl
+        depth (int): level of recursion into links
+        concurrency (int): maximum number of pages fetched at the same
+            time. Defaults to ``config:url_fetch_concurrency``.
 
+    Returns:
+        A dict of pages visited (URL) mapped to their full text and the
+        set of links encountered while visiting the pages.
     """
-    root = url_util.parse(root)
-    pages, links = _spider(root, set(), root, 0, depth, False)
+    if isinstance(root_urls, string_types):
+        root_urls = [root_urls]
+
+    if concurrency is None:
+        concurrency = spack.config.get(
+            'config:url_fetch_concurrency', _default_concurrency)
+
+    pages = {}
+    links = set()
+
+    visited = set()
+    subcalls = []
+    for root in root_urls:
+        if root in visited:
+            continue
+        visited.add(root)
+        root = url_util.parse(root)
+        subcalls.append((root, root, 0, depth, False))
+
+    pool = multiprocessing.pool.ThreadPool(processes=concurrency)
+    try:
+        while subcalls:
+            results = pool.map(_spider_wrapper, subcalls)
+
+            # Links found by the workers are followed only once, even if
+            # they appear in many pages at this level
+            subcalls = []
+            for sub_pages, sub_links, sub_calls in results:
+                pages.update(sub_pages)
+                links.update(sub_links)
+                for args in sub_calls:
+                    if args[0] not in visited:
+                        visited.add(args[0])
+                        subcalls.append(args)
+    finally:
+        pool.terminate()
+        pool.join()
+
     return pages, links
 
 
@@ -511,12 +519,7 @@ def find_versions_of_archive(archive_urls, list_url=None, list_depth=0):
     list_urls |= additional_list_urls
 
     # Grab some web pages to scrape.
-    pages = {}
-    links = set()
-    for lurl in list_urls:
-        pg, lnk = spider(lurl, depth=list_depth)
-        pages.update(pg)
-        links.update(lnk)
+    links = _find_links(sorted(list_urls), list_depth)
 
     # Scrape them for archive URLs
     regexes = []
@@ -565,6 +568,43 @@ def find_versions_of_archive(archive_urls, list_url=None, list_depth=0):
     return versions
 
 
+def _find_links(list_urls, depth):
+    """Returns the links found by spidering list_urls.
+
+    If ``config:url_cache_ttl`` is set, the links are cached in the misc
+    cache and reused for that many seconds, so that repeated calls to
+    ``spack versions`` or ``spack checksum`` don't crawl the same pages.
+    """
+    import spack.caches  # avoid circular import at module level
+
+    ttl = spack.config.get('config:url_cache_ttl', 0)
+    if not ttl:
+        _, links = spider(list_urls, depth=depth)
+        return links
+
+    misc_cache = spack.caches.misc_cache
+
+    crawl = {'urls': list_urls, 'depth': depth}
+    digest = hashlib.sha256(sjson.dump(crawl).encode('utf-8')).hexdigest()
+    key = 'web/{0}.json'.format(digest)
+
+    if misc_cache.init_entry(key) and \
+            time.time() - misc_cache.mtime(key) < ttl:
+        try:
+            with misc_cache.read_transaction(key) as f:
+                return set(sjson.load(f)['links'])
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    _, links = spider(list_urls, depth=depth)
+
+    crawl['links'] = sorted(links)
+    with misc_cache.write_transaction(key) as (old, new):
+        sjson.dump(crawl, new)
+
+    return links
+
+
 def get_header(headers, header_name):
     """Looks up a dict of headers for the given header value.
 
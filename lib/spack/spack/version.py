@@ -42,6 +42,17 @@
 # Infinity-like versions. The order in the list implies the comparison rules
 infinity_versions = ['develop', 'master', 'head', 'trunk']
 
+_valid_version_re = re.compile(VALID_VERSION)
+_segment_re = re.compile(r'[a-zA-Z]+|[0-9]+')
+
+#: Parsed representation of version strings. Versions are immutable, so
+#: every Version built from the same string in a process shares it.
+_parsed_versions = {}
+
+#: Component of a comparison key that is greater than any other one. It
+#: is used as the upper bound of open ranges and of version prefixes.
+_key_infinity = (3,)
+
 
 def int_if_int(string):
     """Convert a string to int if possible.  Otherwise, return a string."""
@@ -51,6 +62,64 @@ def int_if_int(string):
         return string
 
 
+def _segment_key(segment):
+    """Returns a tuple that compares segments the same way RPM does.
+
+    Numbers are newer than letters, and infinity-like versions are newer
+    than anything else and ordered as in ``infinity_versions``.
+    """
+    if isinstance(segment, string_types):
+        if segment in infinity_versions:
+            return (2, -infinity_versions.index(segment))
+        return (0, segment)
+    return (1, segment)
+
+
+def _parse_version(string):
+    """Returns the trimmed string, the segments, the separators and the
+    comparison key of a version string, parsing it only the first time.
+    """
+    try:
+        return _parsed_versions[string]
+    except KeyError:
+        pass
+
+    if not _valid_version_re.match(string):
+        raise ValueError("Bad characters in version string: %s" % string)
+
+    # preserve the original string, but trimmed.
+    trimmed = string.strip()
+
+    # Split version into alphabetical and numeric segments
+    segments = tuple(int_if_int(seg) for seg in _segment_re.findall(trimmed))
+
+    # Store the separators from the original version string as well.
+    separators = tuple(_segment_re.split(trimmed)[1:])
+
+    key = tuple(_segment_key(seg) for seg in segments)
+
+    parsed = _parsed_versions[string] = (trimmed, segments, separators, key)
+    return parsed
+
+
+def _bounds(version):
+    """Returns the lowest and highest comparison key matched by a
+    Version or VersionRange.
+
+    A Version also matches all the versions it is a prefix of, so
+    two elements overlap if and only if their bounds do.
+    """
+    if type(version) == Version:
+        return version._key, version._key + (_key_infinity,)
+
+    lower = () if version.start is None else version.start._key
+    if version.end is None:
+        upper = (_key_infinity,)
+    else:
+        upper = version.end._key + (_key_infinity,)
+    return lower, upper
+
+
 def coerce_versions(a, b):
     """
     Convert both a and b to the 'greatest' type between them, in this order:
@@ -97,22 +166,8 @@ class Version(object):
     """Class to represent versions"""
 
     def __init__(self, string):
-        string = str(string)
-
-        if not re.match(VALID_VERSION, string):
-            raise ValueError("Bad characters in version string: %s" % string)
-
-        # preserve the original string, but trimmed.
-        string = string.strip()
-        self.string = string
-
-        # Split version into alphabetical and numeric segments
-        segment_regex = r'[a-zA-Z]+|[0-9]+'
-        segments = re.findall(segment_regex, string)
-        self.version = tuple(int_if_int(seg) for seg in segments)
-
-        # Store the separators from the original version string as well.
-        self.separators = tuple(re.split(segment_regex, string)[1:])
+        self.string, self.version, self.separators, self._key = \
+            _parse_version(str(string))
 
     @property
     def dotted(self):
@@ -274,40 +329,17 @@ def __lt__(self, other):
         if other is None:
             return False
 
-        # Coerce if other is not a Version
-        # simple equality test first.
-        if self.version == other.version:
-            return False
-
-        # Standard comparison of two numeric versions
-        for a, b in zip(self.version, other.version):
-            if a == b:
-                continue
-            else:
-                if a in infinity_versions:
-                    if b in infinity_versions:
-                        return (infinity_versions.index(a) >
-                                infinity_versions.index(b))
-                    else:
-                        return False
-                if b in infinity_versions:
-                    return True
-
-                # Neither a nor b is infinity
-                # Numbers are always "newer" than letters.
-                # This is for consistency with RPM.  See patch
-                # #60884 (and details) from bugzilla #50977 in
-                # the RPM project at rpm.org.  Or look at
-                # rpmvercmp.c if you want to see how this is
-                # implemented there.
-                if type(a) != type(b):
-                    return type(b) == int
-                else:
-                    return a < b
-
-        # If the common prefix is equal, the one
-        # with more segments is bigger.
-        return len(self.version) < len(other.version)
+        # The comparison key maps each segment so that plain tuple
+        # comparison gives the right answer:
+        #
+        # - infinity versions are newer than anything else
+        # - numbers are always "newer" than letters. This is for
+        #   consistency with RPM.  See patch #60884 (and details) from
+        #   bugzilla #50977 in the RPM project at rpm.org.  Or look at
+        #   rpmvercmp.c if you want to see how this is implemented there.
+        # - if the common prefix is equal, the one with more segments
+        #   is bigger.
+        return self._key < other._key
 
     @coerced
     def __eq__(self, other):
@@ -737,11 +769,20 @@ def union(self, other):
 
     @coerced
     def intersection(self, other):
-        # TODO: make this faster.  This is O(n^2).
+        # Both lists are sorted and their elements don't overlap, so
+        # we can sweep them once, always advancing past the element
+        # that ends first.
         result = VersionList()
-        for s in self:
-            for o in other:
-                result.add(s.intersection(o))
+        s = o = 0
+        while s < len(self) and o < len(other):
+            s_lower, s_upper = _bounds(self[s])
+            o_lower, o_upper = _bounds(other[o])
+            if s_lower <= o_upper and o_lower <= s_upper:
+                result.add(self[s].intersection(other[o]))
+            if s_upper < o_upper:
+                s += 1
+            else:
+                o += 1
         return result
 
     @coerced
@@ -311,9 +311,9 @@ complete -o bashdefault -o default -F _bash_completion_spack spack
 _spack() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help -H --all-help --color -C --config-scope -d --debug --timestamp --pdb -e --env -D --env-dir -E --no-env --use-env-repo -k --insecure -l --enable-locks -L --disable-locks -m --mock -p --profile --sorted-profile --lines -v --verbose --stacktrace -V --version --print-shell-vars"
+        SPACK_COMPREPLY="-h --help -H --all-help --color -C --config-scope -d --debug --timestamp --pdb -e --env -D --env-dir -E --no-env --use-env-repo -k --insecure -l --enable-locks -L --disable-locks -m --mock -p --profile --sorted-profile --lines --profile-dir -v --verbose --stacktrace -V --version --print-shell-vars"
     else
-        SPACK_COMPREPLY="activate add arch blame bootstrap build build-env buildcache cd checksum ci clean clone commands compiler compilers concretize config configure containerize create deactivate debug dependencies dependents deprecate dev-build diy docs edit env extensions fetch find flake8 gc gpg graph help info install license list load location log-parse maintainers mirror module patch pkg providers pydoc python reindex remove rm repo resource restage setup spec stage test uninstall unload upload-s3 url verify versions view"
+        SPACK_COMPREPLY="activate add arch blame bootstrap build build-env buildcache cd checksum ci clean clone commands compiler compilers concretize config configure containerize create deactivate debug dependencies dependents deprecate dev-build diy docs edit env extensions fetch find flake8 gc gpg graph help info install license list load location log-parse maintainers mirror module patch perf pkg providers pydoc python reindex remove rm repo resource restage setup spec stage test uninstall unload upload-s3 url verify versions view"
     fi
 }
 
@@ -655,7 +655,7 @@ _spack_debug() {
     then
         SPACK_COMPREPLY="-h --help"
     else
-        SPACK_COMPREPLY="create-db-tarball report"
+        SPACK_COMPREPLY="create-db-tarball report startup locks"
     fi
 }
 
@@ -667,6 +667,19 @@ _spack_debug_report() {
     SPACK_COMPREPLY="-h --help"
 }
 
+_spack_debug_startup() {
+    if $list_options
+    then
+        SPACK_COMPREPLY="-h --help -n --top --budget"
+    else
+        SPACK_COMPREPLY=""
+    fi
+}
+
+_spack_debug_locks() {
+    SPACK_COMPREPLY="-h --help -n --top --clear"
+}
+
 _spack_dependencies() {
     if $list_options
     then
@@ -845,7 +858,7 @@ _spack_flake8() {
 }
 
 _spack_gc() {
-    SPACK_COMPREPLY="-h --help -y --yes-to-all"
+    SPACK_COMPREPLY="-h --help -y --yes-to-all -j --jobs"
 }
 
 _spack_gpg() {
@@ -949,7 +962,7 @@ _spack_info() {
 _spack_install() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help --only -u --until -j --jobs --overwrite --keep-prefix --keep-stage --dont-restage --use-cache --no-cache --cache-only --no-check-signature --show-log-on-error --source -n --no-checksum -v --verbose --fake --only-concrete -f --file --clean --dirty --test --run-tests --log-format --log-file --help-cdash --cdash-upload-url --cdash-build --cdash-site --cdash-track --cdash-buildstamp -y --yes-to-all"
+        SPACK_COMPREPLY="-h --help --only -u --until -j --jobs --overwrite --keep-prefix --keep-stage --dont-restage --use-cache --no-cache --cache-only --no-check-signature --show-log-on-error --source -n --no-checksum -v --verbose --fake --only-concrete -f --file --clean --dirty --test --run-tests --defer-tests --log-format --log-file --help-cdash --cdash-upload-url --cdash-build --cdash-site --cdash-track --cdash-buildstamp -y --yes-to-all"
     else
         _all_packages
     fi
@@ -1002,7 +1015,7 @@ _spack_location() {
 _spack_log_parse() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help --show -c --context -p --profile -w --width -j --jobs"
+        SPACK_COMPREPLY="-h --help --show -c --context -p --profile -w --width -j --jobs -n --max-errors"
     else
         SPACK_COMPREPLY=""
     fi
@@ -1096,7 +1109,7 @@ _spack_module_lmod() {
 _spack_module_lmod_refresh() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help --delete-tree --upstream-modules -y --yes-to-all"
+        SPACK_COMPREPLY="-h --help --delete-tree --upstream-modules -y --yes-to-all -j --jobs"
     else
         _installed_packages
     fi
@@ -1150,7 +1163,7 @@ _spack_module_tcl() {
 _spack_module_tcl_refresh() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help --delete-tree --upstream-modules -y --yes-to-all"
+        SPACK_COMPREPLY="-h --help --delete-tree --upstream-modules -y --yes-to-all -j --jobs"
     else
         _installed_packages
     fi
@@ -1192,6 +1205,37 @@ _spack_patch() {
     fi
 }
 
+_spack_perf() {
+    if $list_options
+    then
+        SPACK_COMPREPLY="-h --help"
+    else
+        SPACK_COMPREPLY="list run compare"
+    fi
+}
+
+_spack_perf_list() {
+    SPACK_COMPREPLY="-h --help"
+}
+
+_spack_perf_run() {
+    if $list_options
+    then
+        SPACK_COMPREPLY="-h --help -r --repeat -s --scale -o --output -b --baseline -t --threshold"
+    else
+        SPACK_COMPREPLY=""
+    fi
+}
+
+_spack_perf_compare() {
+    if $list_options
+    then
+        SPACK_COMPREPLY="-h --help -t --threshold"
+    else
+        SPACK_COMPREPLY=""
+    fi
+}
+
 _spack_pkg() {
     if $list_options
     then
@@ -1283,7 +1327,7 @@ _spack_python() {
 }
 
 _spack_reindex() {
-    SPACK_COMPREPLY="-h --help"
+    SPACK_COMPREPLY="-h --help -j --jobs --resume"
 }
 
 _spack_remove() {
@@ -1423,7 +1467,7 @@ _spack_test() {
 _spack_uninstall() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help -f --force -R --dependents -y --yes-to-all -a --all"
+        SPACK_COMPREPLY="-h --help -f --force -R --dependents -y --yes-to-all -j --jobs -a --all"
     else
         _installed_packages
     fi